@@ -8,13 +8,24 @@ import os
 import logging
 import sys
 import json
-from typing import Optional
-from bedrock_agentcore.runtime import BedrockAgentCoreApp
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional
+from bedrock_agentcore.runtime import BedrockAgentCoreApp, RequestContext
 from strands import Agent, tool
+from strands.agent.conversation_manager import SlidingWindowConversationManager
+from strands.hooks import HookProvider, HookRegistry, MessageAddedEvent
 from strands.models import BedrockModel
-from mcp import stdio_client, StdioServerParameters
-from strands.tools.mcp import MCPClient
-import requests
+
+# El cliente MCP (mcp, stdio) y requests se importan en el primer uso (primer
+# agente / primera llamada a la API pública), no al arrancar el runtime
+from countries_graphql import get_countries_engine
+
+if TYPE_CHECKING:
+    from strands.tools.mcp import MCPClient
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -24,10 +35,117 @@ logger = logging.getLogger(__name__)
 app = BedrockAgentCoreApp()
 
 # Initialize MCP server and client (will be set up on first use)
-_mcp_client: Optional[MCPClient] = None
+_mcp_client: Optional["MCPClient"] = None
 _mcp_context = None  # Context manager for MCP client
-_agent: Optional[Agent] = None
 _server_script_path: Optional[str] = None
+_bedrock_model: Optional[BedrockModel] = None
+_sessions: "OrderedDict[str, AgentSession]" = OrderedDict()
+_sessions_lock = threading.Lock()
+_sessions_bytes = 0
+_session_metrics = {"hits": 0, "misses": 0, "evictions": 0, "memory_evictions": 0, "expirations": 0}
+
+# Per-session agent cache bounds (entries, estimated history bytes, idle seconds)
+AGENT_SESSION_MAX_ENTRIES = int(os.getenv("AGENT_SESSION_MAX_ENTRIES", "100"))
+AGENT_SESSION_MAX_BYTES = int(os.getenv("AGENT_SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+AGENT_SESSION_TTL = float(os.getenv("AGENT_SESSION_TTL", "1800"))
+
+# Answer query_countries_graphql from the in-memory dataset (countries_graphql.py)
+COUNTRIES_LOCAL_ENGINE = os.getenv("COUNTRIES_LOCAL_ENGINE", "false").lower() in ("true", "1", "yes")
+
+# Identical concurrent GraphQL requests share one POST (single-flight)
+_graphql_in_flight: dict[str, Future] = {}
+_graphql_in_flight_lock = threading.Lock()
+_coalescing_metrics = {"executed": 0, "shared": 0}
+
+
+class GraphQLRequestError(Exception):
+    """HTTP error talking to the public GraphQL API."""
+
+
+def post_graphql_coalesced(url: str, query: str, variables: dict) -> dict:
+    """POST a GraphQL query; concurrent identical calls wait for the same response."""
+    key = json.dumps(
+        {"url": url, "query": " ".join(query.split()), "variables": variables},
+        sort_keys=True,
+    )
+
+    with _graphql_in_flight_lock:
+        future = _graphql_in_flight.get(key)
+        leader = future is None
+        if leader:
+            future = Future()
+            _graphql_in_flight[key] = future
+            _coalescing_metrics["executed"] += 1
+        else:
+            _coalescing_metrics["shared"] += 1
+        executed, shared = _coalescing_metrics["executed"], _coalescing_metrics["shared"]
+
+    logger.info(
+        f"GraphQL coalescing: {'executing' if leader else 'sharing in-flight request'} "
+        f"(executed={executed}, shared={shared}, "
+        f"rate={100.0 * shared / (executed + shared):.1f}%)"
+    )
+    if not leader:
+        return future.result()
+
+    try:
+        import requests
+
+        try:
+            response = requests.post(
+                url,
+                json={"query": query, "variables": variables},
+                headers={"Content-Type": "application/json"},
+                timeout=10
+            )
+            response.raise_for_status()
+            result = response.json()
+        except requests.exceptions.RequestException as e:
+            raise GraphQLRequestError(str(e)) from e
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _graphql_in_flight_lock:
+            _graphql_in_flight.pop(key, None)
+
+
+class HistorySizeTracker(HookProvider):
+    """Measures each message as Strands adds it, for the history size estimate."""
+
+    def __init__(self):
+        self.added_bytes = 0
+        self.added_messages = 0
+
+    def register_hooks(self, registry: HookRegistry, **kwargs) -> None:
+        registry.add_callback(MessageAddedEvent, self._message_added)
+
+    def _message_added(self, event: MessageAddedEvent) -> None:
+        try:
+            self.added_bytes += len(json.dumps(event.message, default=str))
+        except Exception:
+            pass
+        self.added_messages += 1
+
+    def estimate(self, message_count: int) -> int:
+        """Bytes of a history of message_count messages (the window drops old ones)."""
+        if not self.added_messages:
+            return 0
+        return self.added_bytes * message_count // self.added_messages
+
+
+@dataclass
+class AgentSession:
+    """Agent and conversation history of one runtime session."""
+    agent: Agent
+    # Turns of the same session run one at a time
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    history: HistorySizeTracker = field(default_factory=HistorySizeTracker)
+    last_used: float = field(default_factory=time.monotonic)
+    size_bytes: int = 0
 
 
 # Define tools with @tool decorator
@@ -183,18 +301,16 @@ def query_countries_graphql(query_type: str = "country", code: str = "US", name:
             return json.dumps({"error": error_msg})
         
         # Log the complete GraphQL query for observability
-        logger.info(f"GraphQL Query - URL: {graphql_url}, query_type: {query_type}")
+        source = "local engine" if COUNTRIES_LOCAL_ENGINE else graphql_url
+        logger.info(f"GraphQL Query - Source: {source}, query_type: {query_type}")
         logger.info(f"GraphQL Query String:\n{query}")
         logger.info(f"GraphQL Variables: {json.dumps(variables, indent=2)}")
         
-        response = requests.post(
-            graphql_url,
-            json={"query": query, "variables": variables},
-            headers={"Content-Type": "application/json"},
-            timeout=10
-        )
-        response.raise_for_status()
-        result = response.json()
+        if COUNTRIES_LOCAL_ENGINE:
+            # Dataset indexado en memoria: sin round trip a la API pública
+            result = get_countries_engine().execute(query, variables)
+        else:
+            result = post_graphql_coalesced(graphql_url, query, variables)
         
         if "errors" in result:
             error_msg = result["errors"]
@@ -207,7 +323,7 @@ def query_countries_graphql(query_type: str = "country", code: str = "US", name:
         logger.info(f"GraphQL query successful. Response data (first 500 chars): {response_str[:500]}...")
         return response_str
         
-    except requests.exceptions.RequestException as e:
+    except GraphQLRequestError as e:
         error_msg = f"GraphQL request failed: {str(e)}"
         logger.error(f"query_countries_graphql error: {error_msg}")
         return json.dumps({"error": error_msg})
@@ -220,13 +336,55 @@ def query_countries_graphql(query_type: str = "country", code: str = "US", name:
 def create_mcp_server_script() -> str:
     """Create a Python script for the MCP server subprocess."""
     script_content = '''
+import asyncio
+import logging
+import os
 import sys
 import json
 import requests
 from mcp.server.fastmcp import FastMCP
 
+# stdout is the MCP channel: logs go to stderr
+logging.basicConfig(stream=sys.stderr, level=os.getenv("LOG_LEVEL", "INFO").upper())
+logger = logging.getLogger("mcp_tools_server")
+
+COUNTRIES_LOCAL_ENGINE = os.getenv("COUNTRIES_LOCAL_ENGINE", "false").lower() in ("true", "1", "yes")
+if COUNTRIES_LOCAL_ENGINE:
+    # countries_graphql.py is next to agent_runtime.py (PYTHONPATH set by the runtime)
+    from countries_graphql import get_countries_engine
+
 mcp = FastMCP("AgentCore Tools Server")
 
+# Single-flight: identical concurrent GraphQL requests share one POST
+_graphql_in_flight = {}
+_coalescing_metrics = {"executed": 0, "shared": 0}
+
+
+def _post_graphql(url, query, variables):
+    response = requests.post(
+        url,
+        json={"query": query, "variables": variables},
+        headers={"Content-Type": "application/json"},
+        timeout=10
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+async def post_graphql_coalesced(url, query, variables):
+    key = json.dumps({"url": url, "query": " ".join(query.split()), "variables": variables}, sort_keys=True)
+    task = _graphql_in_flight.get(key)
+    if task is None:
+        # Off the event loop, so other tool calls keep being served meanwhile
+        task = asyncio.ensure_future(asyncio.to_thread(_post_graphql, url, query, variables))
+        _graphql_in_flight[key] = task
+        task.add_done_callback(lambda _: _graphql_in_flight.pop(key, None))
+        _coalescing_metrics["executed"] += 1
+    else:
+        _coalescing_metrics["shared"] += 1
+        logger.debug("GraphQL coalescing: sharing in-flight request")
+    return await asyncio.shield(task)
+
 @mcp.tool()
 def get_weather(city: str = "default") -> str:
     """Get current weather information for a city."""
@@ -255,7 +413,7 @@ def reverse_string(text: str) -> str:
     return text[::-1]
 
 @mcp.tool()
-def query_countries_graphql(query_type: str = "country", code: str = "US", name: str = "", currency: str = "") -> str:
+async def query_countries_graphql(query_type: str = "country", code: str = "US", name: str = "", currency: str = "") -> str:
     """Query the Countries GraphQL API (https://countries.trevorblades.com) for country information.
     
     Args:
@@ -339,14 +497,11 @@ def query_countries_graphql(query_type: str = "country", code: str = "US", name:
             error_msg = f"Unknown query_type: {query_type}. Use 'country', 'countries', 'continent', or 'filter_by_currency'"
             return json.dumps({"error": error_msg})
         
-        response = requests.post(
-            graphql_url,
-            json={"query": query, "variables": variables},
-            headers={"Content-Type": "application/json"},
-            timeout=10
-        )
-        response.raise_for_status()
-        result = response.json()
+        if COUNTRIES_LOCAL_ENGINE:
+            # La primera llamada carga el dataset (fetch a la API): fuera del event loop
+            result = await get_countries_engine().execute_async(query, variables)
+        else:
+            result = await post_graphql_coalesced(graphql_url, query, variables)
         
         if "errors" in result:
             error_msg = result["errors"]
@@ -364,7 +519,7 @@ if __name__ == "__main__":
     return script_content
 
 
-def create_mcp_client() -> MCPClient:
+def create_mcp_client() -> "MCPClient":
     """Create MCP client connected to local server via stdio subprocess."""
     global _mcp_client, _server_script_path
     
@@ -372,6 +527,8 @@ def create_mcp_client() -> MCPClient:
         try:
             # Create temporary script file for MCP server
             import tempfile
+            from mcp import stdio_client, StdioServerParameters
+            from strands.tools.mcp import MCPClient
             server_script = create_mcp_server_script()
             
             # Write server script to a temporary file
@@ -380,11 +537,19 @@ def create_mcp_client() -> MCPClient:
                 _server_script_path = f.name
             
             # Create MCP client that connects to server via stdio
+            # The server subprocess needs COUNTRIES_* and this directory on its path
+            server_env = dict(os.environ)
+            runtime_dir = os.path.dirname(os.path.abspath(__file__))
+            server_env["PYTHONPATH"] = os.pathsep.join(
+                p for p in (runtime_dir, os.environ.get("PYTHONPATH")) if p
+            )
+
             def create_client():
                 return stdio_client(
                     StdioServerParameters(
                         command=sys.executable,
-                        args=[_server_script_path]
+                        args=[_server_script_path],
+                        env=server_env
                     )
                 )
             
@@ -425,46 +590,165 @@ def initialize_mcp_tools():
             raise RuntimeError(f"MCP connection failed - {str(e)}")
 
 
-def get_or_create_agent() -> Agent:
-    """Get or create the Strands agent with BedrockModel and MCP tools."""
-    global _agent
-    
-    if _agent is None:
-        try:
-            # Get Bedrock model ID from environment or use default
-            model_id = os.getenv(
-                "BEDROCK_MODEL_ID",
-                "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
-            )
-            
-            # Create BedrockModel
-            bedrock_model = BedrockModel(
-                model_id=model_id,
-                temperature=0.3,
-                top_p=0.8
+def get_or_create_bedrock_model() -> BedrockModel:
+    """Get or create the shared Bedrock model instance."""
+    global _bedrock_model
+
+    if _bedrock_model is None:
+        # Get Bedrock model ID from environment or use default
+        model_id = os.getenv(
+            "BEDROCK_MODEL_ID",
+            "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
+        )
+        _bedrock_model = BedrockModel(
+            model_id=model_id,
+            temperature=0.3,
+            top_p=0.8
+        )
+        logger.info(f"Bedrock model created: {model_id}")
+
+    return _bedrock_model
+
+
+def _create_agent() -> Agent:
+    """Create a Strands agent with the Bedrock model and the Gateway MCP tools."""
+    try:
+        # Initialize MCP and get tools
+        # The MCP context will remain open for tool execution
+        tools = initialize_mcp_tools()
+
+        # Create agent with model and MCP tools
+        agent = Agent(
+            model=get_or_create_bedrock_model(),
+            tools=tools,
+            conversation_manager=SlidingWindowConversationManager(
+                window_size=int(os.getenv("AGENT_SESSION_WINDOW_SIZE", "40"))
+            ),
+        )
+
+        logger.info(f"Strands agent created with {len(tools)} MCP tools")
+        return agent
+
+    except RuntimeError:
+        # Re-raise RuntimeError (MCP errors)
+        raise
+    except Exception as e:
+        logger.error(f"Failed to create agent: {str(e)}")
+        raise RuntimeError(f"Agent creation failed - {str(e)}")
+
+
+def get_or_create_agent_session(session_id: Optional[str] = None) -> AgentSession:
+    """Get the agent of a runtime session, creating it on first use.
+
+    Each session keeps its own conversation history. Sessions are evicted
+    least recently used first beyond AGENT_SESSION_MAX_ENTRIES or
+    AGENT_SESSION_MAX_BYTES of estimated history, and after AGENT_SESSION_TTL
+    seconds idle. Requests without a session id get a one-off agent that is
+    never cached, so callers never share history.
+    """
+    if not session_id or session_id == "unknown":
+        return AgentSession(agent=_create_agent())
+
+    now = time.monotonic()
+
+    with _sessions_lock:
+        # Expire idle sessions (oldest first)
+        while _sessions:
+            oldest_id, oldest = next(iter(_sessions.items()))
+            if now - oldest.last_used <= AGENT_SESSION_TTL:
+                break
+            _remove_session_locked(oldest_id)
+            _session_metrics["expirations"] += 1
+
+        cached = _sessions.get(session_id)
+        if cached is not None:
+            cached.last_used = now
+            _sessions.move_to_end(session_id)
+            _session_metrics["hits"] += 1
+            return cached
+
+    agent = _create_agent()
+    logger.info(f"Agent created for session {session_id}")
+
+    with _sessions_lock:
+        # Another request of the same session may have won the race
+        cached = _sessions.get(session_id)
+        if cached is not None:
+            _session_metrics["hits"] += 1
+            return cached
+
+        _session_metrics["misses"] += 1
+        session = AgentSession(agent=agent)
+        agent.hooks.add_hook(session.history)
+        _sessions[session_id] = session
+        _evict_sessions_locked(keep=session_id)
+        _log_session_stats_locked()
+
+    return session
+
+
+def record_agent_session_turn(session_id: Optional[str], session: AgentSession) -> None:
+    """Update the history size of a cached session after a turn and enforce AGENT_SESSION_MAX_BYTES."""
+    global _sessions_bytes
+
+    # Tamaño medio de los mensajes medidos al añadirse por los que quedan en la ventana
+    size = session.history.estimate(len(session.agent.messages))
+
+    with _sessions_lock:
+        if not session_id or _sessions.get(session_id) is not session:
+            # One-off agent, or evicted while the turn ran
+            return
+
+        session.last_used = time.monotonic()
+        _sessions_bytes += size - session.size_bytes
+        session.size_bytes = size
+
+        if size > AGENT_SESSION_MAX_BYTES:
+            _remove_session_locked(session_id)
+            _session_metrics["memory_evictions"] += 1
+            logger.warning(
+                f"Session {session_id} history ({size} bytes) exceeds AGENT_SESSION_MAX_BYTES; not caching it"
             )
-            
-            # Initialize MCP and get tools
-            # The MCP context will remain open for tool execution
-            tools = initialize_mcp_tools()
-            
-            # Create agent with model and MCP tools
-            _agent = Agent(model=bedrock_model, tools=tools)
-            
-            logger.info(f"Strands agent created with model {model_id} and {len(tools)} MCP tools")
-            
-        except RuntimeError:
-            # Re-raise RuntimeError (MCP errors)
-            raise
-        except Exception as e:
-            logger.error(f"Failed to create agent: {str(e)}")
-            raise RuntimeError(f"Agent creation failed - {str(e)}")
-    
-    return _agent
+        else:
+            _evict_sessions_locked(keep=session_id)
+        _log_session_stats_locked()
+
+
+def agent_session_stats() -> dict:
+    """Session cache occupancy and hit/miss/eviction counters."""
+    with _sessions_lock:
+        return {"entries": len(_sessions), "bytes": _sessions_bytes, **_session_metrics}
+
+
+def _remove_session_locked(session_id: str) -> None:
+    global _sessions_bytes
+    session = _sessions.pop(session_id)
+    _sessions_bytes -= session.size_bytes
+
+
+def _evict_sessions_locked(keep: str) -> None:
+    while len(_sessions) > AGENT_SESSION_MAX_ENTRIES or _sessions_bytes > AGENT_SESSION_MAX_BYTES:
+        victim = next((sid for sid in _sessions if sid != keep), None)
+        if victim is None:
+            break
+        if len(_sessions) > AGENT_SESSION_MAX_ENTRIES:
+            _session_metrics["evictions"] += 1
+        else:
+            _session_metrics["memory_evictions"] += 1
+        _remove_session_locked(victim)
+
+
+def _log_session_stats_locked() -> None:
+    logger.info(
+        f"Agent sessions: {len(_sessions)} cached, {_sessions_bytes} bytes "
+        f"(hits={_session_metrics['hits']}, misses={_session_metrics['misses']}, "
+        f"evictions={_session_metrics['evictions']}, memory_evictions={_session_metrics['memory_evictions']}, "
+        f"expirations={_session_metrics['expirations']})"
+    )
 
 
 @app.entrypoint
-def agent_handler(payload: dict) -> dict:
+def agent_handler(payload: dict, context: Optional[RequestContext] = None) -> dict:
     """
     Entry point for the AgentCore Runtime.
     This function is called by the runtime when the agent is invoked.
@@ -478,52 +762,60 @@ def agent_handler(payload: dict) -> dict:
                 "response": ["Error: No prompt provided"]
             }
         
-        # Get or create agent
-        agent = get_or_create_agent()
+        # Get or create the agent of this session (header first, then payload)
+        session_id = (context.session_id if context else None) or payload.get("sessionId")
+        session = get_or_create_agent_session(session_id)
+        agent = session.agent
         
-        # Track messages before agent call to detect tool usage
-        messages_before = []
-        try:
-            # Try to access agent messages if available
-            if hasattr(agent, 'messages'):
-                messages_before = list(agent.messages) if agent.messages else []
-        except:
-            pass
+        # Turns of the same session run one at a time
+        with session.lock:
+            # Track messages before agent call to detect tool usage
+            messages_before = []
+            try:
+                # Try to access agent messages if available
+                if hasattr(agent, 'messages'):
+                    messages_before = list(agent.messages) if agent.messages else []
+            except:
+                pass
         
-        # Use agent to process the input
-        # The agent will automatically use tools when needed
-        logger.info(f"Processing user input: {user_input}")
-        response = agent(user_input)
+            # Use agent to process the input
+            # The agent will automatically use tools when needed
+            logger.info(f"Processing user input: {user_input}")
+            response = agent(user_input)
         
-        # Extract response text
-        if isinstance(response, str):
-            response_text = response
-        else:
-            # Handle different response types
-            response_text = str(response)
+            # Extract response text
+            if isinstance(response, str):
+                response_text = response
+            else:
+                # Handle different response types
+                response_text = str(response)
         
-        logger.info(f"Agent response received (length: {len(response_text)} chars)")
+            logger.info(f"Agent response received (length: {len(response_text)} chars)")
         
-        # Detect if tools were used by checking if messages changed
-        tools_used = False
-        try:
-            if hasattr(agent, 'messages') and agent.messages:
-                # Check if we have more messages after the call (indicating tool usage)
-                messages_after = list(agent.messages) if agent.messages else []
-                if len(messages_after) > len(messages_before):
-                    tools_used = True
-                # Also check message content for tool-related indicators
-                for msg in messages_after:
-                    msg_str = str(msg).lower()
-                    if any(indicator in msg_str for indicator in ['tool', 'function_call', 'tool_call', 'mcp']):
+            # Detect if tools were used by checking if messages changed
+            # (still under the session lock: the next turn appends to agent.messages)
+            tools_used = False
+            try:
+                if hasattr(agent, 'messages') and agent.messages:
+                    # Check if we have more messages after the call (indicating tool usage)
+                    messages_after = list(agent.messages) if agent.messages else []
+                    if len(messages_after) > len(messages_before):
                         tools_used = True
-                        break
-        except:
-            # If we can't detect, check response content for tool indicators
-            response_lower = response_text.lower()
-            # Check for JSON responses (common in tool results) or specific patterns
-            if any(indicator in response_lower for indicator in ['{"code"', '"name"', '"capital"', '"currency"', 'graphql']):
-                tools_used = True
+                    # Also check message content for tool-related indicators
+                    for msg in messages_after:
+                        msg_str = str(msg).lower()
+                        if any(indicator in msg_str for indicator in ['tool', 'function_call', 'tool_call', 'mcp']):
+                            tools_used = True
+                            break
+            except:
+                # If we can't detect, check response content for tool indicators
+                response_lower = response_text.lower()
+                # Check for JSON responses (common in tool results) or specific patterns
+                if any(indicator in response_lower for indicator in ['{"code"', '"name"', '"capital"', '"currency"', 'graphql']):
+                    tools_used = True
+
+            # History size of this session for AGENT_SESSION_MAX_BYTES
+            record_agent_session_turn(session_id, session)
         
         # Add indicator to response based on tool usage
         # Note: The final response text is ALWAYS generated by the model LLM
@@ -26,6 +26,10 @@ fi
 echo "✓ CLI tool 'agentcore' encontrado"
 echo ""
 
+# El motor de países es una copia de agentcore-demo-4 (ver sync-countries-engine.sh)
+"$(dirname "$0")/sync-countries-engine.sh" --check
+echo ""
+
 # Configure
 echo "Configurando despliegue para el agente: $AGENT_NAME"
 agentcore configure -e agent_runtime.py --name $AGENT_NAME
@@ -0,0 +1,40 @@
+#!/bin/bash
+#
+# Sincroniza el motor local de países con la copia canónica de agentcore-demo-4
+# (countries_graphql.py y fixtures/countries.json). demo-3 mantiene una copia
+# porque cada demo se despliega desde su propio directorio: `agentcore configure`
+# solo empaqueta este directorio, así que no puede importar de ../agentcore-demo-4.
+#
+# Uso:
+#   ./sync-countries-engine.sh          # copia los archivos desde demo-4
+#   ./sync-countries-engine.sh --check  # falla si las copias difieren
+#
+
+set -e
+
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+SOURCE_DIR="$SCRIPT_DIR/../agentcore-demo-4"
+FILES="countries_graphql.py fixtures/countries.json"
+
+if [ ! -d "$SOURCE_DIR" ]; then
+    echo "⚠ $SOURCE_DIR no existe; no se puede comprobar el motor de países"
+    exit 0
+fi
+
+if [ "$1" = "--check" ]; then
+    STATUS=0
+    for f in $FILES; do
+        if ! cmp -s "$SOURCE_DIR/$f" "$SCRIPT_DIR/$f"; then
+            echo "✗ $f difiere de agentcore-demo-4/$f (ejecuta ./sync-countries-engine.sh)"
+            STATUS=1
+        fi
+    done
+    [ $STATUS -eq 0 ] && echo "✓ Motor de países sincronizado con agentcore-demo-4"
+    exit $STATUS
+fi
+
+mkdir -p "$SCRIPT_DIR/fixtures"
+for f in $FILES; do
+    cp "$SOURCE_DIR/$f" "$SCRIPT_DIR/$f"
+    echo "✓ $f copiado desde agentcore-demo-4"
+done
@@ -5,73 +5,191 @@ Entry point para despliegue local (Docker) y AWS AgentCore.
 Usa Strands Agents con BedrockModel y MCP tools via AgentCore Gateway.
 
 Módulos:
-- runtime_config: AWS session, detección local/AWS
-- runtime_metrics: Métricas y logging
+- runtime_config: RuntimeConfig (env + archivos JSON), AWS session
+- runtime_metrics: Registro de métricas (Prometheus en /metrics)
+- runtime_logging: Logging texto/JSON con escritura en segundo plano
 - runtime_mcp: Cliente MCP Gateway (JWT auth)
 - runtime_agent: BedrockModel, Strands Agent
 - runtime_handler: Lógica del entrypoint
+- runtime_warmup: Warm-up al arrancar y readiness de /ping
+- runtime_admission: Control de admisión (concurrencia, orden por sesión, 429)
+- runtime_tracing: Spans OpenTelemetry por invocación (export OTLP/JSON)
+
+runtime_handler (strands, mcp, httpx) se importa en el warm-up o en la primera
+invocación, no al cargar este módulo: el servidor responde /ping antes.
+Perfil de arranque: python profile_startup.py
 """
 
 import logging
 import os
 import sys
 
-from bedrock_agentcore import BedrockAgentCoreApp, RequestContext
+from bedrock_agentcore import BedrockAgentCoreApp, PingStatus, RequestContext
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
 
+from runtime_admission import setup_admission_middleware
 from runtime_auth import inbound_token, setup_local_auth_middleware
-from runtime_handler import agent_handler_impl
-
-# Configure structured logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - [%(funcName)s:%(lineno)d] - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
+from runtime_config import (
+    COGNITO_INFO_FILE,
+    GATEWAY_INFO_FILE,
+    TOKEN_FILE,
+    env_bool,
+    env_float,
+    env_int,
+    get_runtime_config,
 )
+from runtime_logging import configure_logging, structured_logging
+from runtime_metrics import get_metrics
+from runtime_tracing import configure_tracing, setup_tracing_middleware, tracing_enabled
+from runtime_warmup import is_ready, start_warmup, warmup_enabled
+
+# Logging: texto o JSON (LOG_FORMAT), escrito por un thread de fondo
+configure_logging()
 logger = logging.getLogger(__name__)
 
-# Middleware JWT solo en modo local (JWT_LOCAL_VALIDATION=true)
+# Tracing (TRACE_FILE / OTEL_EXPORTER_OTLP_ENDPOINT): antes del primer Agent
+configure_tracing()
+
+# Middleware: tracing (span del request) > JWT local > control de admisión
 _middleware: list = []
+if mw := setup_tracing_middleware():
+    _middleware.append(mw)
+# Middleware JWT solo en modo local (JWT_LOCAL_VALIDATION=true)
 if mw := setup_local_auth_middleware():
     _middleware.append(mw)
-elif os.getenv("JWT_LOCAL_VALIDATION", "").lower() not in ("true", "1", "yes"):
+elif not get_runtime_config().jwt_local_validation:
     logger.info("Auth: AWS mode - JWT handled by AgentCore infrastructure")
+# Control de admisión después del auth: las peticiones sin token no ocupan cola
+if mw := setup_admission_middleware():
+    _middleware.append(mw)
 
 app = BedrockAgentCoreApp(middleware=_middleware)
 
 
-@app.entrypoint
-def agent_handler(payload: dict, context: RequestContext | None = None) -> dict:
-    """Entry point registrado en el runtime."""
+def _bearer_token(context: RequestContext | None) -> str | None:
     if context and context.request_headers:
         auth = context.request_headers.get("Authorization")
         if auth and auth.startswith("Bearer "):
-            inbound_token.set(auth[7:].strip())
+            return auth[7:].strip()
+    return None
+
+
+def _with_session_id(payload: dict, context: RequestContext | None) -> dict:
+    # El header de sesión de AgentCore manda sobre el sessionId del payload
+    if context and context.session_id:
+        return {**payload, "sessionId": context.session_id}
+    return payload
+
+
+def _set_inbound_token(context: RequestContext | None) -> None:
+    token = _bearer_token(context)
+    if token:
+        inbound_token.set(token)
+
+
+def agent_handler(payload: dict, context: RequestContext | None = None) -> dict:
+    """Entry point síncrono (un hilo del pool por invocación)."""
+    from runtime_handler import agent_handler_impl
+
+    _set_inbound_token(context)
+    try:
+        return agent_handler_impl(_with_session_id(payload, context))
+    finally:
+        inbound_token.set(None)
+
+
+async def agent_handler_async(payload: dict, context: RequestContext | None = None):
+    """Entry point asíncrono: no bloquea un hilo mientras espera al modelo o al Gateway.
+
+    Devuelve un async generator (respuesta SSE) cuando se pide streaming.
+    """
+    if payload.get("stream", STREAMING_DEFAULT):
+        return _stream_with_token(_bearer_token(context), _with_session_id(payload, context))
+
+    from runtime_handler import agent_handler_async_impl
+
+    _set_inbound_token(context)
     try:
-        return agent_handler_impl(payload)
+        return await agent_handler_async_impl(_with_session_id(payload, context))
     finally:
         inbound_token.set(None)
 
 
+async def _stream_with_token(token: str | None, payload: dict):
+    # El generator se consume después de que el handler retorna: el token se
+    # fija en el contexto que itera el stream
+    from runtime_handler import agent_handler_stream_impl
+
+    inbound_token.set(token)
+    try:
+        async for event in agent_handler_stream_impl(payload):
+            yield event
+    finally:
+        inbound_token.set(None)
+
+
+# RUNTIME_STREAMING=true: respuestas SSE por defecto (payload {"stream": false} lo desactiva)
+STREAMING_DEFAULT = env_bool("RUNTIME_STREAMING")
+
+# RUNTIME_ASYNC=true registra la variante asíncrona como entrypoint (requerida para streaming)
+if env_bool("RUNTIME_ASYNC") or STREAMING_DEFAULT:
+    app.entrypoint(agent_handler_async)
+    logger.info(f"Entrypoint: async (streaming by default: {STREAMING_DEFAULT})")
+else:
+    app.entrypoint(agent_handler)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """Métricas del runtime en formato texto de Prometheus."""
+    return PlainTextResponse(
+        get_metrics().render_prometheus(), media_type="text/plain; version=0.0.4"
+    )
+
+
+# METRICS_ENDPOINT=false desactiva GET /metrics. Con JWT_LOCAL_VALIDATION requiere
+# token, salvo METRICS_PUBLIC=true
+if env_bool("METRICS_ENDPOINT", True):
+    app.add_route("/metrics", metrics_endpoint, methods=["GET"])
+
+
+@app.ping
+def ping_status() -> PingStatus | None:
+    """HealthyBusy mientras corre el warm-up; después, el estado automático del SDK."""
+    return None if is_ready() else PingStatus.HEALTHY_BUSY
+
+
 def log_startup_info() -> None:
     """Log startup information for observability."""
     logger.info("=" * 80)
     logger.info("AGENTCORE RUNTIME STARTUP")
     logger.info("=" * 80)
     logger.info(f"Python Version: {sys.version.split()[0]}")
-    logger.info(f"Region: {os.getenv('AWS_REGION', 'us-east-1')}")
+    config = get_runtime_config()
+    logger.info(f"Region: {config.region}")
+    logger.info(f"Model ID: {config.model_id}")
+    logger.info(f"Model Backend: {config.model_backend}")
     logger.info(
-        f"Model ID: {os.getenv('BEDROCK_MODEL_ID', 'us.anthropic.claude-3-7-sonnet-20250219-v1:0')}"
+        f"Countries GraphQL: {'local engine' if env_bool('COUNTRIES_LOCAL_ENGINE') else 'Gateway'}"
     )
+    warmup_prompt = "yes" if os.getenv("WARMUP_PROMPT") else "no"
+    logger.info(f"Warm-up: {'enabled' if warmup_enabled() else 'disabled'} (prompt: {warmup_prompt})")
+    logger.info(
+        f"Logging: {'json' if structured_logging() else 'text'} "
+        f"({'background writer' if env_bool('LOG_QUEUE', True) else 'synchronous'})"
+    )
+    logger.info(f"Tracing: {'enabled' if tracing_enabled() else 'disabled'}")
 
-    config_files = {
-        ".gateway-info.json": "Gateway configuration",
-        ".cognito-info.json": "Cognito configuration",
-        ".cognito-token.json": "JWT token",
+    descriptions = {
+        GATEWAY_INFO_FILE: "Gateway configuration",
+        COGNITO_INFO_FILE: "Cognito configuration",
+        TOKEN_FILE: "JWT token",
     }
-
-    logger.info("Configuration Files:")
-    for file, desc in config_files.items():
-        exists = os.path.exists(file)
+    reload_interval = env_float("CONFIG_RELOAD_INTERVAL", 5.0)
+    reload = f"every {reload_interval:g}s" if reload_interval > 0 else "disabled"
+    logger.info(f"Configuration Files (reload check: {reload}):")
+    for file, desc in descriptions.items():
+        exists = config.has_file(file)
         status = "✓" if exists else "✗"
         logger.info(f"  {status} {file}: {desc} {'(found)' if exists else '(not found)'}")
 
@@ -80,4 +198,6 @@ def log_startup_info() -> None:
 
 if __name__ == "__main__":
     log_startup_info()
-    app.run()
+    # /ping responde HealthyBusy hasta que termina el warm-up
+    start_warmup()
+    app.run(port=env_int("RUNTIME_PORT", 8080))
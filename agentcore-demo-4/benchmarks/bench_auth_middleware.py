@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: per-request overhead of the local JWT auth middleware.
+
+Compares runtime_auth.LocalJWTAuthMiddleware (pure ASGI) with the previous
+BaseHTTPMiddleware implementation, both running the same token checks with
+the verified-token cache, and an app without auth as the floor. Requests are
+driven straight through the ASGI interface (no sockets), so the numbers are
+the middleware cost only:
+- POST /invocations with a JSON response
+- an SSE response: time to first chunk and whether chunks arrive one by one
+- GET /ping (auth bypass)
+
+Uso:
+  python benchmarks/bench_auth_middleware.py [--requests N] [--chunks N]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+from starlette.applications import Starlette  # noqa: E402
+from starlette.middleware import Middleware  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+from starlette.responses import JSONResponse, Response, StreamingResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+from runtime_auth import (  # noqa: E402
+    PUBLIC_PATHS,
+    JWKSKeyStore,
+    LocalJWTAuthMiddleware,
+    TokenRejection,
+    VerifiedTokenCache,
+    inbound_token,
+)
+
+KID = "bench-key"
+CLIENT_ID = "bench-client"
+CHUNK_DELAY = 0.005
+
+
+class LegacyLocalJWTAuthMiddleware(BaseHTTPMiddleware):
+    """Previous implementation: BaseHTTPMiddleware around the same checks."""
+
+    def __init__(self, app, auth: LocalJWTAuthMiddleware):
+        super().__init__(app)
+        self._auth = auth
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        if request.url.path.rstrip("/") in PUBLIC_PATHS:
+            return await call_next(request)
+        outcome = self._auth.check(request.headers.get("Authorization"))
+        if isinstance(outcome, TokenRejection):
+            return outcome.response()
+        inbound_token.set(outcome)
+        try:
+            return await call_next(request)
+        finally:
+            inbound_token.set(None)
+
+
+def build_app(middleware: list, chunks: int) -> Starlette:
+    async def invocations(request: Request) -> Response:
+        payload = await request.json()
+        if payload.get("stream"):
+
+            async def events():
+                for i in range(chunks):
+                    yield f"data: {json.dumps({'chunk': i})}\n\n"
+                    await asyncio.sleep(CHUNK_DELAY)
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+        return JSONResponse({"response": ["ok"], "authenticated": inbound_token.get() is not None})
+
+    async def ping(request: Request) -> Response:
+        return JSONResponse({"status": "Healthy"})
+
+    return Starlette(
+        routes=[Route("/invocations", invocations, methods=["POST"]), Route("/ping", ping)],
+        middleware=middleware,
+    )
+
+
+async def call(app, method: str, path: str, headers: list, body: bytes = b"") -> tuple[float, list]:
+    """Run one request through the ASGI app; returns (start, [(time, message)])."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 9001),
+    }
+    body_sent = False
+    disconnected = asyncio.Event()
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    messages = []
+
+    async def send(message):
+        messages.append((time.perf_counter(), message))
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    disconnected.set()
+    return start, messages
+
+
+def summary(values: list[float]) -> str:
+    ordered = sorted(values)
+    p50 = ordered[len(ordered) // 2]
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return f"mean {statistics.fmean(ordered) * 1e6:8.1f} us  p50 {p50 * 1e6:8.1f} us  p99 {p99 * 1e6:8.1f} us"
+
+
+async def bench_json(app, headers: list, requests: int) -> list[float]:
+    body = json.dumps({"prompt": "hola"}).encode()
+    timings = []
+    for _ in range(requests):
+        start, messages = await call(app, "POST", "/invocations", headers, body)
+        timings.append(messages[-1][0] - start)
+        assert messages[0][1]["status"] == 200, messages[0][1]
+    return timings
+
+
+async def bench_ping(app, requests: int) -> list[float]:
+    timings = []
+    for _ in range(requests):
+        start, messages = await call(app, "GET", "/ping", [])
+        timings.append(messages[-1][0] - start)
+    return timings
+
+
+async def bench_stream(app, headers: list, chunks: int) -> tuple[float, int]:
+    """Time to first body chunk and number of body messages (1 = buffered)."""
+    body = json.dumps({"prompt": "hola", "stream": True}).encode()
+    start, messages = await call(app, "POST", "/invocations", headers, body)
+    bodies = [(t, m) for t, m in messages if m["type"] == "http.response.body" and m.get("body")]
+    return bodies[0][0] - start, len(bodies)
+
+
+async def run(args) -> None:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    key_store = JWKSKeyStore("")
+    # Claves en memoria: sin discovery ni refresher
+    key_store._keys = {KID: private_key.public_key()}
+    token = jwt.encode(
+        {"client_id": CLIENT_ID, "token_use": "access", "exp": int(time.time()) + 3600},
+        private_key,
+        algorithm="RS256",
+        headers={"kid": KID},
+    )
+    headers = [(b"authorization", f"Bearer {token}".encode()), (b"content-type", b"application/json")]
+    auth_options = {"key_store": key_store, "allowed_clients": [CLIENT_ID]}
+
+    variants = [
+        ("no auth", []),
+        (
+            "BaseHTTPMiddleware",
+            [
+                Middleware(
+                    LegacyLocalJWTAuthMiddleware,
+                    auth=LocalJWTAuthMiddleware(None, token_cache=VerifiedTokenCache(), **auth_options),
+                )
+            ],
+        ),
+        ("pure ASGI", [Middleware(LocalJWTAuthMiddleware, token_cache=VerifiedTokenCache(), **auth_options)]),
+    ]
+
+    print(f"{args.requests} requests per case, SSE with {args.chunks} chunks ({CHUNK_DELAY * 1000:.0f}ms apart)")
+    for name, middleware in variants:
+        app = build_app(middleware, args.chunks)
+        # Warm-up: rutas, caché de tokens, streaming
+        await bench_json(app, headers, 50)
+        await bench_stream(app, headers, args.chunks)
+        json_timings = await bench_json(app, headers, args.requests)
+        ping_timings = await bench_ping(app, args.requests)
+        streams = [await bench_stream(app, headers, args.chunks) for _ in range(5)]
+        first_chunk, body_messages = min(streams)
+        print(name)
+        print(f"  POST /invocations  {summary(json_timings)}")
+        print(f"  GET /ping          {summary(ping_timings)}")
+        print(f"  SSE first chunk    {first_chunk * 1000:8.2f} ms   ({body_messages} body messages)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--chunks", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: local countries GraphQL engine (countries_graphql.py).
+
+Times the queries the agents send (country by code, continent, currency
+filter, full list) against the in-memory dataset. Optionally times the same
+queries against the public API (--remote) for comparison.
+
+Uso:
+  python benchmarks/bench_countries_engine.py [--repeat N] [--fixture PATH] [--remote]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import timeit
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from countries_graphql import (  # noqa: E402
+    COUNTRIES_API_URL,
+    DEFAULT_FIXTURE,
+    CountriesDataset,
+    execute_graphql,
+)
+
+QUERIES = [
+    (
+        "country(code)",
+        "query GetCountry($code: ID!) { country(code: $code) { code name native capital emoji currency "
+        "languages { code name } continent { code name } } }",
+        {"code": "BR"},
+    ),
+    (
+        "continent(code)",
+        "query GetCountriesByContinent($code: ID!) { continent(code: $code) { code name "
+        "countries { code name capital emoji } } }",
+        {"code": "SA"},
+    ),
+    (
+        "currency filter",
+        "query GetCountriesByCurrency($currency: String!) { countries(filter: { currency: { eq: $currency } }) "
+        "{ code name currency capital emoji } }",
+        {"currency": "EUR"},
+    ),
+    ("all countries", "query GetCountries { countries { code name capital emoji currency } }", {}),
+]
+
+
+def remote(query: str, variables: dict) -> dict:
+    request = urllib.request.Request(
+        COUNTRIES_API_URL,
+        data=json.dumps({"query": query, "variables": variables}).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=10) as resp:
+        return json.loads(resp.read().decode("utf-8"))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE)
+    parser.add_argument("--remote", action="store_true", help="Also time countries.trevorblades.com")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    dataset = CountriesDataset.from_file(args.fixture)
+    print(f"Dataset: {len(dataset.countries)} countries, loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for name, query, variables in QUERIES:
+        result = execute_graphql(dataset, query, variables)
+        if "errors" in result:
+            print(f"  {name:<16} error: {result['errors']}")
+            continue
+        size = len(json.dumps(result))
+        seconds = min(timeit.repeat(lambda: execute_graphql(dataset, query, variables), number=1, repeat=args.repeat))
+        line = f"  {name:<16} local {seconds * 1e6:10.1f} us   ({size} bytes)"
+        if args.remote:
+            try:
+                start = time.perf_counter()
+                remote(query, variables)
+                line += f"   remote {(time.perf_counter() - start) * 1000:8.1f} ms"
+            except Exception as e:
+                line += f"   remote error: {e}"
+        print(line)
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
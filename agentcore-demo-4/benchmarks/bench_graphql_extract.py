@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: GraphQL query extraction on large agent payloads.
+
+Compares runtime_metrics.find_graphql_queries with the previous recursive
+implementation on:
+- a single tool-use input (what the handler passes today)
+- a message history holding the full `countries` list as a tool result
+- a deeply nested structure and a cyclic object (the recursive version fails)
+
+Uso:
+  python benchmarks/bench_graphql_extract.py [--repeat N] [--countries N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+from typing import Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from runtime_metrics import find_graphql_queries  # noqa: E402
+
+QUERY = 'query { countries { code name capital currency languages { name } } }'
+
+
+def legacy_find_graphql_queries(value: Any) -> list[str]:
+    """Previous implementation: recursive, lowercases every string."""
+    queries: list[str] = []
+
+    if isinstance(value, str):
+        lower = value.lower()
+        if ("query" in lower or "mutation" in lower) and "{" in value and "}" in value:
+            queries.append(value)
+        return queries
+
+    if isinstance(value, dict):
+        query_value = value.get("query")
+        if isinstance(query_value, str):
+            queries.append(query_value)
+        for item in value.values():
+            queries.extend(legacy_find_graphql_queries(item))
+        return queries
+
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            queries.extend(legacy_find_graphql_queries(item))
+        return queries
+
+    if hasattr(value, "__dict__"):
+        queries.extend(legacy_find_graphql_queries(value.__dict__))
+
+    return queries
+
+
+def countries_payload(count: int) -> list[dict]:
+    return [
+        {
+            "code": f"C{i:03d}",
+            "name": f"Country {i}",
+            "native": f"País {i}",
+            "capital": f"Capital {i}",
+            "emoji": "🏳",
+            "currency": "USD,EUR",
+            "languages": [{"code": "es", "name": "Spanish"}, {"code": "en", "name": "English"}],
+            "continent": {"code": "SA", "name": "South America"},
+        }
+        for i in range(count)
+    ]
+
+
+def message_history(count: int, turns: int = 5) -> list[dict]:
+    messages: list[dict] = []
+    result = json.dumps({"data": {"countries": countries_payload(count)}})
+    for turn in range(turns):
+        messages.append({"role": "user", "content": [{"text": f"Pregunta {turn}"}]})
+        messages.append(
+            {
+                "role": "assistant",
+                "content": [
+                    {
+                        "toolUse": {
+                            "toolUseId": f"tool-{turn}",
+                            "name": "countries-graphql-target___executeGraphQLQuery",
+                            "input": {"query": QUERY},
+                        }
+                    }
+                ],
+            }
+        )
+        messages.append(
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "toolResult": {
+                            "toolUseId": f"tool-{turn}",
+                            "status": "success",
+                            # Structured and text copies, as Gateway results carry both
+                            "content": [{"json": json.loads(result)}, {"text": result}],
+                        }
+                    }
+                ],
+            }
+        )
+        messages.append({"role": "assistant", "content": [{"text": "Respuesta"}]})
+    return messages
+
+
+def nested(depth: int) -> dict:
+    root: dict = {}
+    node = root
+    for _ in range(depth):
+        node["child"] = {}
+        node = node["child"]
+    node["query"] = QUERY
+    return root
+
+
+class Node:
+    def __init__(self):
+        self.query = QUERY
+        self.parent = self
+
+
+def bench(label: str, fn, value: Any, repeat: int) -> None:
+    try:
+        found = len(fn(value))
+        seconds = min(timeit.repeat(lambda: fn(value), number=1, repeat=repeat))
+        print(f"  {label:<12} {seconds * 1000:10.3f} ms   ({found} queries)")
+    except RecursionError:
+        print(f"  {label:<12} {'RecursionError':>13}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--countries", type=int, default=250)
+    args = parser.parse_args()
+
+    cases = [
+        ("tool-use input", {"query": QUERY}),
+        (f"history ({args.countries} countries x 5 turns)", message_history(args.countries)),
+        ("nested depth 5000", nested(5000)),
+        ("cyclic object", Node()),
+    ]
+
+    for name, value in cases:
+        print(name)
+        bench("legacy", legacy_find_graphql_queries, value, args.repeat)
+        bench("iterative", find_graphql_queries, value, args.repeat)
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
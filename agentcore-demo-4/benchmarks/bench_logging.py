@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: logging cost on the request thread per invocation.
+
+Logs what one invocation logs (start, two tool calls, completion). Between
+phases the request thread sleeps WAIT_MS, standing in for the model and the
+Gateway; only the time spent in logging calls is counted. Cases:
+- legacy: the previous banners with eager f-strings, written synchronously
+  by basicConfig's StreamHandler
+- text, queue: runtime_handler in LOG_FORMAT=text behind the queue writer
+- json, queue: runtime_handler in LOG_FORMAT=json (invocation record + stage events)
+- json, queue, LOG_SAMPLE_INFO=0.1
+
+Records are written to a temporary file so the synchronous writer pays a real
+write() per record. Without the waits (--wait-ms 0) the writer thread competes
+with the request thread for the GIL, which a real invocation does not do.
+
+Uso:
+  python benchmarks/bench_logging.py [--invocations N] [--wait-ms 2]
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import runtime_handler  # noqa: E402
+from runtime_logging import TEXT_DATEFMT, TEXT_FORMAT, configure_logging, log_scope, shutdown_logging  # noqa: E402
+from runtime_tool_calls import ToolCallRecord  # noqa: E402
+
+logger = logging.getLogger("runtime_handler")
+
+QUERY = "query GetCountry($code: ID!) { country(code: $code) { code name capital currency } }"
+RESPONSE = "La capital de Brasil es Brasília. " * 20
+
+
+def tool_calls() -> list[ToolCallRecord]:
+    return [
+        ToolCallRecord(f"tooluse_{i}", "countries-graphql-target___executeGraphQLQuery",
+                       {"query": QUERY, "variables": {"code": code}}, 0.08, 225, "success")
+        for i, code in enumerate(("BR", "CL"))
+    ]
+
+
+class PhaseClock:
+    """Request-thread time spent logging; pause() stands in for model/Gateway waits."""
+
+    def __init__(self, wait: float):
+        self._wait = wait
+        self.busy = 0.0
+        self._resumed = time.perf_counter()
+
+    def pause(self) -> None:
+        self.busy += time.perf_counter() - self._resumed
+        if self._wait:
+            time.sleep(self._wait)
+        self._resumed = time.perf_counter()
+
+    def stop(self) -> float:
+        self.busy += time.perf_counter() - self._resumed
+        return self.busy
+
+
+def legacy_invocation(clock: PhaseClock, request_id: str, session_id: str, prompt: str,
+                      calls: list[ToolCallRecord]) -> None:
+    """Previous handler logging: banners, eager f-strings."""
+    start = time.time()
+    logger.info("=" * 80)
+    logger.info("AGENT INVOCATION START")
+    logger.info(f"Request ID: {request_id}")
+    logger.info(f"Session ID: {session_id}")
+    logger.info(f"User Input: {prompt}")
+    logger.info(f"Timestamp: {datetime.utcnow().isoformat()}Z")
+    logger.info("=" * 80)
+    logger.info(f"✓ MCP session acquired from pool ({0.0:.3f}s)")
+    logger.info(f"MCP tools available: {1} tool(s)")
+    logger.info(f"Agent initialization time: {0.001:.3f}s")
+    logger.info("Calling agent with user input...")
+    for _ in calls:
+        clock.pause()
+    clock.pause()
+    logger.info(f"Agent call completed in {0.5:.3f}s")
+    logger.info("=" * 80)
+    logger.info("GRAPHQL QUERIES USED")
+    logger.info("=" * 80)
+    logger.info(QUERY)
+    logger.info("=" * 80)
+    total = time.time() - start
+    logger.info("=" * 80)
+    logger.info("AGENT INVOCATION COMPLETE")
+    logger.info(f"Request ID: {request_id}")
+    logger.info(f"Total Time: {total:.3f}s")
+    logger.info(f"Agent Init Time: {0.001:.3f}s")
+    logger.info(f"Agent Call Time: {0.5:.3f}s")
+    logger.info(f"Tools Used: {bool(calls)}")
+    for call in calls:
+        logger.info(
+            f"Tool Call: {call.name} ({call.duration:.3f}s, {call.result_bytes} bytes, "
+            f"status={call.status})" + (f" error={call.error}" if call.error else "")
+        )
+    logger.info(f"Response Length: {len(RESPONSE)} chars")
+    logger.info(f"Response Preview: {RESPONSE[:200]}...")
+    logger.info("=" * 80)
+
+
+def current_invocation(clock: PhaseClock, request_id: str, session_id: str, prompt: str,
+                       calls: list[ToolCallRecord]) -> None:
+    """runtime_handler logging for the same invocation."""
+    mcp = logging.getLogger("runtime_mcp")
+    stages = logging.getLogger("runtime_tool_calls")
+    start = time.time()
+    with log_scope(request_id=request_id, session_id=session_id, mode="sync"):
+        runtime_handler._start_invocation({"prompt": prompt}, request_id, session_id)
+        mcp.log(runtime_handler.detail_level(), "✓ MCP session acquired from pool (%.3fs)", 0.0)
+        mcp.log(runtime_handler.detail_level(), "MCP tools available: %d tool(s)", 1)
+        runtime_handler._log_stage("agent_init", 0.001, "Agent initialization time: %.3fs")
+        logger.log(runtime_handler.detail_level(), "Calling agent with user input...")
+        for call in calls:
+            clock.pause()
+            runtime_handler.log_stage(stages, "model_call", 0.2)
+            runtime_handler.log_stage(stages, "tool_call", call.duration, tool=call.name, status=call.status,
+                                      bytes=call.result_bytes)
+        clock.pause()
+        runtime_handler._log_stage("agent_call", 0.5, "Agent call completed in %.3fs")
+        runtime_handler._finish_invocation(RESPONSE, calls, request_id, start, 0.001, 0.5)
+
+
+def run_case(name: str, invocations: int, wait: float, invoke, configure) -> None:
+    with tempfile.NamedTemporaryFile("w", suffix=".log", delete=False) as out:
+        path = out.name
+    with open(path, "w", buffering=1) as stream:
+        configure(stream)
+        calls = tool_calls()
+        timings = []
+        for i in range(invocations):
+            clock = PhaseClock(wait)
+            invoke(clock, f"req-{i}", "sess-1", "¿Cuál es la capital de Brasil?", calls)
+            timings.append(clock.stop())
+        drain_start = time.perf_counter()
+        shutdown_logging()
+        drain = time.perf_counter() - drain_start
+    lines = sum(1 for _ in open(path))
+    os.unlink(path)
+    timings.sort()
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(
+        f"{name:<28} p50 {statistics.median(timings) * 1e6:7.1f} us  p99 {p99 * 1e6:7.1f} us  "
+        f"{lines / invocations:5.1f} lines/inv  writer drain {drain * 1000:6.1f} ms"
+    )
+
+
+def legacy_configure(stream) -> None:
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    logging.basicConfig(level=logging.INFO, format=TEXT_FORMAT, datefmt=TEXT_DATEFMT, stream=stream, force=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--invocations", type=int, default=1000)
+    parser.add_argument("--wait-ms", type=float, default=2.0, help="Simulated wait between phases")
+    args = parser.parse_args()
+    wait = args.wait_ms / 1000.0
+
+    print(f"{args.invocations} invocations per case, {args.wait_ms:g}ms waits (request-thread logging time)")
+    run_case("legacy (sync, f-strings)", args.invocations, wait, legacy_invocation, legacy_configure)
+    run_case("text, sync", args.invocations, wait, current_invocation,
+             lambda stream: configure_logging("text", "INFO", False, stream))
+    run_case("text, queue", args.invocations, wait, current_invocation,
+             lambda stream: configure_logging("text", "INFO", True, stream))
+    run_case("json, queue", args.invocations, wait, current_invocation,
+             lambda stream: configure_logging("json", "INFO", True, stream))
+    os.environ["LOG_SAMPLE_INFO"] = "0.1"
+    run_case("json, queue, sample 10%", args.invocations, wait, current_invocation,
+             lambda stream: configure_logging("json", "INFO", True, stream))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Load test para /invocations del runtime local.
+
+Lanza N workers concurrentes contra el runtime (por defecto
+http://localhost:9001/invocations), con reutilización de sesiones y una mezcla
+de prompts ponderada. Mide time-to-first-byte, latencia total (percentiles),
+throughput y tasa de errores, y escribe los resultados en JSON. Con
+--baseline compara contra una ejecución anterior y sale con código 1 si hay
+regresión.
+
+Uso:
+  python benchmarks/load_test.py --concurrency 8 --requests 200 --sessions 4
+  python benchmarks/load_test.py --stream --duration 60 --output results.json
+  python benchmarks/load_test.py --baseline results.json --max-regression 0.2
+
+  # Sin runtime: valida el propio harness contra un servidor stub embebido
+  python benchmarks/load_test.py --stub --requests 50
+
+Para medir el runtime completo sin AWS, arráncalo con los backends locales
+(modelo y Gateway stub) descritos en el README.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import httpx
+
+SESSION_HEADER = "X-Amzn-Bedrock-AgentCore-Runtime-Session-Id"
+DEFAULT_URL = "http://localhost:9001/invocations"
+
+DEFAULT_PROMPTS = [
+    {"label": "country", "prompt": "¿Cuál es la capital de Brasil?", "weight": 4},
+    {"label": "continent", "prompt": "Lista los países de Sudamérica con su moneda", "weight": 2},
+    {"label": "currency", "prompt": "¿Qué países usan el euro?", "weight": 1},
+    {"label": "no-tool", "prompt": "Hola, ¿qué puedes hacer?", "weight": 1},
+]
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+@dataclass
+class RequestResult:
+    """Outcome of one invocation."""
+
+    label: str
+    session_id: str
+    status: int
+    ttfb: Optional[float]
+    latency: float
+    bytes: int
+    error: Optional[str] = None
+
+
+@dataclass
+class LoadTestConfig:
+    url: str
+    concurrency: int
+    requests: Optional[int]
+    duration: Optional[float]
+    sessions: int
+    stream: bool
+    warmup: int
+    timeout: float
+    prompts: list = field(default_factory=list)
+
+
+def load_prompts(path: Optional[str]) -> list[dict]:
+    """Prompt mix: JSON list of {"prompt", "label"?, "weight"?}."""
+    if not path:
+        return DEFAULT_PROMPTS
+    with open(path, "r") as f:
+        prompts = json.load(f)
+    for i, item in enumerate(prompts):
+        item.setdefault("label", f"prompt-{i}")
+        item.setdefault("weight", 1)
+    return prompts
+
+
+def percentiles(values: list[float]) -> dict:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    summary = {
+        f"p{p}": ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+        for p in PERCENTILES
+    }
+    summary["mean"] = statistics.fmean(ordered)
+    summary["max"] = ordered[-1]
+    return summary
+
+
+def response_error(body: bytes, streamed: bool) -> Optional[str]:
+    """Errors the runtime reports with HTTP 200."""
+    text = body.decode("utf-8", errors="replace")
+    if streamed:
+        for line in text.splitlines():
+            if line.startswith("data: ") and '"event": "error"' in line:
+                return "stream error event"
+        return None
+    try:
+        response = json.loads(text).get("response", [""])[0]
+    except (ValueError, AttributeError, IndexError):
+        return "invalid JSON response"
+    if response.startswith(("Error:", "Unexpected error:")):
+        return response.split(" - ")[0][:80]
+    return None
+
+
+async def invoke_once(
+    client: httpx.AsyncClient,
+    config: LoadTestConfig,
+    prompt: dict,
+    session_id: str,
+    headers: dict,
+) -> RequestResult:
+    payload = {"prompt": prompt["prompt"], "sessionId": session_id}
+    if config.stream:
+        payload["stream"] = True
+
+    start = time.perf_counter()
+    ttfb = None
+    body = bytearray()
+    try:
+        async with client.stream(
+            "POST", config.url, json=payload, headers={**headers, SESSION_HEADER: session_id}
+        ) as response:
+            async for chunk in response.aiter_raw():
+                if ttfb is None:
+                    ttfb = time.perf_counter() - start
+                body.extend(chunk)
+            streamed = "text/event-stream" in response.headers.get("content-type", "")
+            status = response.status_code
+    except httpx.HTTPError as e:
+        return RequestResult(
+            label=prompt["label"],
+            session_id=session_id,
+            status=0,
+            ttfb=ttfb,
+            latency=time.perf_counter() - start,
+            bytes=len(body),
+            error=type(e).__name__,
+        )
+
+    error = f"HTTP {status}" if status != 200 else response_error(bytes(body), streamed)
+    return RequestResult(
+        label=prompt["label"],
+        session_id=session_id,
+        status=status,
+        ttfb=ttfb,
+        latency=time.perf_counter() - start,
+        bytes=len(body),
+        error=error,
+    )
+
+
+async def run_load(config: LoadTestConfig, token: Optional[str], seed: int) -> tuple[list, float]:
+    rng = random.Random(seed)
+    weights = [p.get("weight", 1) for p in config.prompts]
+    # --sessions 0: una sesión nueva por request (sin reutilización)
+    session_ids = [str(uuid.uuid4()) for _ in range(config.sessions)]
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+
+    results: list[RequestResult] = []
+    issued = 0
+    deadline = time.monotonic() + config.duration if config.duration else None
+
+    def next_request() -> Optional[tuple[dict, str]]:
+        nonlocal issued
+        if config.requests is not None and issued >= config.requests:
+            return None
+        if deadline is not None and time.monotonic() >= deadline:
+            return None
+        index = issued
+        issued += 1
+        prompt = rng.choices(config.prompts, weights=weights)[0]
+        session_id = session_ids[index % len(session_ids)] if session_ids else str(uuid.uuid4())
+        return prompt, session_id
+
+    limits = httpx.Limits(max_connections=config.concurrency, max_keepalive_connections=config.concurrency)
+    async with httpx.AsyncClient(timeout=config.timeout, limits=limits) as client:
+        for _ in range(config.warmup):
+            await invoke_once(client, config, config.prompts[0], str(uuid.uuid4()), headers)
+
+        async def worker() -> None:
+            while (item := next_request()) is not None:
+                prompt, session_id = item
+                results.append(await invoke_once(client, config, prompt, session_id, headers))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(config.concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return results, elapsed
+
+
+def summarize(results: list[RequestResult], elapsed: float) -> dict:
+    ok = [r for r in results if r.error is None]
+    errors: dict[str, int] = {}
+    for r in results:
+        if r.error is not None:
+            errors[r.error] = errors.get(r.error, 0) + 1
+
+    by_label = {}
+    for label in sorted({r.label for r in results}):
+        subset = [r for r in results if r.label == label]
+        by_label[label] = {
+            "requests": len(subset),
+            "errors": sum(1 for r in subset if r.error is not None),
+            "latency": percentiles([r.latency for r in subset if r.error is None]),
+        }
+
+    return {
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "error_rate": (len(results) - len(ok)) / len(results) if results else 0.0,
+        "errors_by_type": errors,
+        "elapsed_seconds": elapsed,
+        "throughput_rps": len(ok) / elapsed if elapsed > 0 else 0.0,
+        "ttfb": percentiles([r.ttfb for r in ok if r.ttfb is not None]),
+        "latency": percentiles([r.latency for r in ok]),
+        "response_bytes_mean": statistics.fmean([r.bytes for r in ok]) if ok else 0.0,
+        "by_prompt": by_label,
+    }
+
+
+def compare(summary: dict, baseline: dict, max_regression: float) -> list[str]:
+    """Regressions of the current run against a baseline summary."""
+    regressions = []
+    for metric in ("ttfb", "latency"):
+        for key in ("p50", "p95", "p99"):
+            current = summary.get(metric, {}).get(key)
+            previous = baseline.get(metric, {}).get(key)
+            if current is not None and previous and current > previous * (1 + max_regression):
+                regressions.append(
+                    f"{metric} {key}: {current * 1000:.1f} ms vs {previous * 1000:.1f} ms "
+                    f"(+{(current / previous - 1) * 100:.0f}%)"
+                )
+    if summary["error_rate"] > baseline.get("error_rate", 0.0) + 0.01:
+        regressions.append(
+            f"error rate: {summary['error_rate']:.1%} vs {baseline.get('error_rate', 0.0):.1%}"
+        )
+    previous_rps = baseline.get("throughput_rps")
+    if previous_rps and summary["throughput_rps"] < previous_rps * (1 - max_regression):
+        regressions.append(
+            f"throughput: {summary['throughput_rps']:.1f} rps vs {previous_rps:.1f} rps"
+        )
+    return regressions
+
+
+def print_summary(summary: dict) -> None:
+    def fmt(stats: dict) -> str:
+        if not stats:
+            return "n/a"
+        return "  ".join(f"{k}={v * 1000:.1f}ms" for k, v in stats.items())
+
+    print("=" * 80)
+    print("LOAD TEST RESULTS")
+    print("=" * 80)
+    print(f"Requests:   {summary['requests']} ({summary['errors']} errors, {summary['error_rate']:.1%})")
+    print(f"Elapsed:    {summary['elapsed_seconds']:.2f}s")
+    print(f"Throughput: {summary['throughput_rps']:.2f} req/s")
+    print(f"TTFB:       {fmt(summary['ttfb'])}")
+    print(f"Latency:    {fmt(summary['latency'])}")
+    for label, stats in summary["by_prompt"].items():
+        print(f"  [{label}] {stats['requests']} req, {stats['errors']} err, {fmt(stats['latency'])}")
+    for error, count in summary["errors_by_type"].items():
+        print(f"  error {error!r}: {count}")
+    print("=" * 80)
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Minimal /invocations stand-in (JSON o SSE) para validar el harness offline."""
+
+    latency = 0.05
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        time.sleep(self.latency)
+        text = f"Respuesta stub a: {payload.get('prompt', '')}"
+
+        if payload.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for word in text.split():
+                event = {"event": "text", "data": word + " "}
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                self.wfile.flush()
+                time.sleep(self.latency / 10)
+            done = {"event": "done", "response": f"[Model response] {text}"}
+            self.wfile.write(f"data: {json.dumps(done)}\n\n".encode())
+            return
+
+        body = json.dumps({"response": [f"[Model response] {text}"]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def start_stub_server(latency: float) -> str:
+    _StubHandler.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-runtime", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/invocations"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test para /invocations")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=None, help="Total de requests (default 100)")
+    parser.add_argument("--duration", type=float, default=None, help="Segundos de prueba (en vez de --requests)")
+    parser.add_argument("--sessions", type=int, default=0, help="Sesiones reutilizadas (0 = una por request)")
+    parser.add_argument("--prompts", default=None, help="JSON con la mezcla de prompts")
+    parser.add_argument("--stream", action="store_true", help="Pedir respuestas SSE")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--token", default=os.environ.get("BEARER_TOKEN"))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Archivo JSON de resultados")
+    parser.add_argument("--raw", action="store_true", help="Incluir cada request en el JSON")
+    parser.add_argument("--baseline", default=None, help="JSON de una ejecución anterior")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    parser.add_argument("--stub", action="store_true", help="Usar un servidor stub embebido")
+    parser.add_argument("--stub-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    if args.requests is None and args.duration is None:
+        args.requests = 100
+
+    url = start_stub_server(args.stub_latency) if args.stub else args.url
+    config = LoadTestConfig(
+        url=url,
+        concurrency=max(1, args.concurrency),
+        requests=args.requests,
+        duration=args.duration,
+        sessions=max(0, args.sessions),
+        stream=args.stream,
+        warmup=args.warmup,
+        timeout=args.timeout,
+        prompts=load_prompts(args.prompts),
+    )
+
+    print(
+        f"Target: {config.url} | concurrency={config.concurrency} "
+        f"{'requests=' + str(config.requests) if config.requests else f'duration={config.duration}s'} "
+        f"sessions={config.sessions or 'per-request'} stream={config.stream}"
+    )
+    results, elapsed = asyncio.run(run_load(config, args.token, args.seed))
+    summary = summarize(results, elapsed)
+    print_summary(summary)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": asdict(config),
+        "summary": summary,
+    }
+    if args.raw:
+        report["results"] = [asdict(r) for r in results]
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados escritos en {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(summary, baseline.get("summary", baseline), args.max_regression)
+        if regressions:
+            print("REGRESIONES respecto al baseline:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("Sin regresiones respecto al baseline")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,790 @@
+"""
+Local Countries GraphQL engine: answers countries.trevorblades.com queries
+in-process from an indexed in-memory dataset.
+
+Implements the subset of GraphQL the agents send (operations with variables,
+aliases, nested selections, fragments and the `filter` arguments of the
+Countries schema) and returns the same `{"data": ..., "errors": [...]}` shape
+as the public API. The dataset is keyed by country, continent and language
+code, with country indexes by continent and currency. CountriesEngine loads
+it once (public API, bundled fixture as fallback) and refreshes it
+periodically. The bundled fixture is a partial offline subset: startup warns
+loudly when it is used, and the engine retries the full dataset every
+COUNTRIES_RETRY_INTERVAL seconds until it loads.
+
+This file and fixtures/ are shared by agentcore-demo-3 and agentcore-demo-4.
+agentcore-demo-4 holds the canonical copy, and agentcore-demo-3 keeps a copy
+because each demo is deployed from its own directory. Edit it in demo-4 and run
+agentcore-demo-3/sync-countries-engine.sh.
+
+Uso:
+  engine = get_countries_engine()
+  engine.execute('query { country(code: "BR") { name capital } }')
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "countries.json")
+# Countries in the public API; a smaller dataset (the bundled fixture) is partial
+FULL_DATASET_COUNTRIES = 250
+
+
+class GraphQLError(Exception):
+    """Query error reported in the response `errors` list."""
+
+
+# ---------------------------------------------------------------------------
+# Dataset
+# ---------------------------------------------------------------------------
+
+
+def flag_emoji(code: str) -> str:
+    return "".join(chr(0x1F1E6 + ord(c) - ord("A")) for c in code.upper())
+
+
+@dataclass
+class CountriesDataset:
+    """Countries, continents and languages keyed by code, with secondary indexes.
+
+    `by_continent` and `by_currency` hold country codes in dataset order, so
+    filtered queries touch only the matching countries.
+    """
+
+    countries: dict[str, dict] = field(default_factory=dict)
+    continents: dict[str, dict] = field(default_factory=dict)
+    languages: dict[str, dict] = field(default_factory=dict)
+    by_continent: dict[str, list[str]] = field(default_factory=dict)
+    by_currency: dict[str, list[str]] = field(default_factory=dict)
+    order: dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CountriesDataset":
+        """Build from `{"countries": [...], "continents": [...], "languages": [...]}`."""
+        dataset = cls()
+        for continent in data.get("continents", []):
+            dataset.continents[continent["code"]] = dict(continent)
+        for language in data.get("languages", []):
+            dataset.languages[language["code"]] = dict(language)
+        for country in data.get("countries", []):
+            country = dict(country)
+            continent = country.get("continent")
+            if isinstance(continent, dict):
+                # Dumps of the public API embed the continent object
+                dataset.continents.setdefault(continent["code"], dict(continent))
+                country["continent"] = continent["code"]
+            languages = []
+            for language in country.get("languages", []):
+                if isinstance(language, dict):
+                    dataset.languages.setdefault(language["code"], dict(language))
+                    language = language["code"]
+                languages.append(language)
+            country["languages"] = languages
+            dataset.countries[country["code"]] = country
+        dataset._build_indexes()
+        return dataset
+
+    def _build_indexes(self) -> None:
+        self.by_continent = {}
+        self.by_currency = {}
+        self.order = {}
+        for position, (code, country) in enumerate(self.countries.items()):
+            self.order[code] = position
+            self.by_continent.setdefault(country.get("continent"), []).append(code)
+            for currency in currencies(country):
+                self.by_currency.setdefault(currency, []).append(code)
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_FIXTURE) -> "CountriesDataset":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+# ---------------------------------------------------------------------------
+# Parser
+# ---------------------------------------------------------------------------
+
+_TOKEN = re.compile(
+    r"""
+    (?P<ignored>[\s,\ufeff]+|\#[^\n\r]*)
+  | (?P<block>\"\"\"(?:\\\"\"\"|[^"]|"(?!""))*\"\"\")
+  | (?P<string>"(?:\\.|[^"\\\n\r])*")
+  | (?P<spread>\.\.\.)
+  | (?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<name>[_A-Za-z][_0-9A-Za-z]*)
+  | (?P<punct>[!$():=@\[\]{}|&])
+    """,
+    re.VERBOSE,
+)
+
+
+@dataclass
+class Field:
+    name: str
+    alias: Optional[str] = None
+    arguments: dict = field(default_factory=dict)
+    selections: Optional[list] = None
+
+    @property
+    def response_key(self) -> str:
+        return self.alias or self.name
+
+
+@dataclass
+class FragmentSpread:
+    name: str
+
+
+@dataclass
+class InlineFragment:
+    type_condition: Optional[str]
+    selections: list
+
+
+@dataclass
+class Variable:
+    name: str
+
+
+@dataclass
+class Operation:
+    kind: str
+    name: Optional[str]
+    variable_defaults: dict
+    selections: list
+
+
+def _tokenize(source: str) -> list[tuple[str, str]]:
+    tokens = []
+    position = 0
+    while position < len(source):
+        match = _TOKEN.match(source, position)
+        if match is None:
+            raise GraphQLError(f"Syntax Error: Unexpected character {source[position]!r}.")
+        position = match.end()
+        kind = match.lastgroup
+        if kind != "ignored":
+            tokens.append((kind, match.group()))
+    tokens.append(("eof", ""))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, source: str):
+        self._tokens = _tokenize(source)
+        self._index = 0
+
+    def _peek(self, value: Optional[str] = None) -> bool:
+        kind, text = self._tokens[self._index]
+        return kind != "eof" and (value is None or text == value)
+
+    def _next(self) -> tuple[str, str]:
+        token = self._tokens[self._index]
+        self._index += 1
+        return token
+
+    def _expect(self, value: str) -> None:
+        kind, text = self._next()
+        if text != value or kind in ("string", "block"):
+            raise GraphQLError(f"Syntax Error: Expected \"{value}\", found {text or '<EOF>'!r}.")
+
+    def _name(self) -> str:
+        kind, text = self._next()
+        if kind != "name":
+            raise GraphQLError(f"Syntax Error: Expected Name, found {text or '<EOF>'!r}.")
+        return text
+
+    def parse_document(self) -> tuple[list[Operation], dict[str, list]]:
+        operations: list[Operation] = []
+        fragments: dict[str, list] = {}
+        while self._peek():
+            if self._peek("{"):
+                operations.append(Operation("query", None, {}, self._selection_set()))
+            elif self._peek("fragment"):
+                self._next()
+                name = self._name()
+                self._expect("on")
+                self._name()
+                self._directives()
+                fragments[name] = self._selection_set()
+            elif self._peek("query") or self._peek("mutation") or self._peek("subscription"):
+                kind = self._next()[1]
+                name = self._name() if self._tokens[self._index][0] == "name" else None
+                defaults = self._variable_definitions() if self._peek("(") else {}
+                self._directives()
+                operations.append(Operation(kind, name, defaults, self._selection_set()))
+            else:
+                raise GraphQLError(f"Syntax Error: Unexpected {self._tokens[self._index][1]!r}.")
+        if not operations:
+            raise GraphQLError("Syntax Error: Unexpected <EOF>.")
+        return operations, fragments
+
+    def _variable_definitions(self) -> dict:
+        defaults = {}
+        self._expect("(")
+        while not self._peek(")"):
+            self._expect("$")
+            name = self._name()
+            self._expect(":")
+            self._type()
+            if self._peek("="):
+                self._next()
+                defaults[name] = self._value(const=True)
+            self._directives()
+        self._expect(")")
+        return defaults
+
+    def _type(self) -> None:
+        if self._peek("["):
+            self._next()
+            self._type()
+            self._expect("]")
+        else:
+            self._name()
+        if self._peek("!"):
+            self._next()
+
+    def _directives(self) -> None:
+        # Parsed and ignored (@include/@skip are not used by the agents)
+        while self._peek("@"):
+            self._next()
+            self._name()
+            if self._peek("("):
+                self._arguments()
+
+    def _selection_set(self) -> list:
+        self._expect("{")
+        selections = []
+        while not self._peek("}"):
+            if not self._peek():
+                raise GraphQLError("Syntax Error: Expected Name, found <EOF>.")
+            selections.append(self._selection())
+        self._expect("}")
+        return selections
+
+    def _selection(self):
+        if self._tokens[self._index][0] == "spread":
+            self._next()
+            if self._peek("on"):
+                self._next()
+                type_condition = self._name()
+                self._directives()
+                return InlineFragment(type_condition, self._selection_set())
+            if self._peek("{") or self._peek("@"):
+                self._directives()
+                return InlineFragment(None, self._selection_set())
+            name = self._name()
+            self._directives()
+            return FragmentSpread(name)
+
+        alias = None
+        name = self._name()
+        if self._peek(":"):
+            self._next()
+            alias, name = name, self._name()
+        arguments = self._arguments() if self._peek("(") else {}
+        self._directives()
+        selections = self._selection_set() if self._peek("{") else None
+        return Field(name, alias, arguments, selections)
+
+    def _arguments(self) -> dict:
+        arguments = {}
+        self._expect("(")
+        while not self._peek(")"):
+            name = self._name()
+            self._expect(":")
+            arguments[name] = self._value()
+        self._expect(")")
+        return arguments
+
+    def _value(self, const: bool = False) -> Any:
+        kind, text = self._next()
+        if text == "$" and kind == "punct" and not const:
+            return Variable(self._name())
+        if kind == "string":
+            return json.loads(text)
+        if kind == "block":
+            return text[3:-3].replace('\\"""', '"""').strip()
+        if kind == "number":
+            return float(text) if any(c in text for c in ".eE") else int(text)
+        if kind == "name":
+            return {"true": True, "false": False, "null": None}.get(text, text)
+        if text == "[":
+            values = []
+            while not self._peek("]"):
+                values.append(self._value(const))
+            self._expect("]")
+            return values
+        if text == "{":
+            values = {}
+            while not self._peek("}"):
+                name = self._name()
+                self._expect(":")
+                values[name] = self._value(const)
+            self._expect("}")
+            return values
+        raise GraphQLError(f"Syntax Error: Unexpected {text or '<EOF>'!r}.")
+
+
+@lru_cache(maxsize=256)
+def parse_graphql(query: str, operation_name: Optional[str] = None) -> tuple[Operation, dict[str, list]]:
+    """Parse a document and select the operation to run (cached: agents repeat queries)."""
+    operations, fragments = _Parser(query).parse_document()
+    if operation_name:
+        for operation in operations:
+            if operation.name == operation_name:
+                return operation, fragments
+        raise GraphQLError(f'Unknown operation named "{operation_name}".')
+    if len(operations) > 1:
+        raise GraphQLError("Must provide operation name if query contains multiple operations.")
+    return operations[0], fragments
+
+
+# ---------------------------------------------------------------------------
+# Execution
+# ---------------------------------------------------------------------------
+
+
+def _resolve_value(value: Any, variables: dict) -> Any:
+    if isinstance(value, Variable):
+        return variables.get(value.name)
+    if isinstance(value, list):
+        return [_resolve_value(item, variables) for item in value]
+    if isinstance(value, dict):
+        return {key: _resolve_value(item, variables) for key, item in value.items()}
+    return value
+
+
+def _matches(value: Any, operators: Optional[dict]) -> bool:
+    """StringQueryOperatorInput: eq, ne, in, nin, regex (list values match any)."""
+    if not operators:
+        return True
+    values = value if isinstance(value, list) else [value]
+    for operator, expected in operators.items():
+        if expected is None:
+            continue
+        if operator == "eq":
+            ok = expected in values
+        elif operator == "ne":
+            ok = expected not in values
+        elif operator == "in":
+            ok = any(v in expected for v in values)
+        elif operator == "nin":
+            ok = not any(v in expected for v in values)
+        elif operator == "regex":
+            try:
+                pattern = re.compile(expected)
+            except re.error as e:
+                raise GraphQLError(f"Invalid regex {expected!r}: {e}")
+            ok = any(v is not None and pattern.search(str(v)) for v in values)
+        else:
+            raise GraphQLError(f'Field "{operator}" is not defined by type "StringQueryOperatorInput".')
+        if not ok:
+            return False
+    return True
+
+
+def currencies(country: dict) -> list[str]:
+    return [c for c in (country.get("currency") or "").split(",") if c]
+
+
+class _CodeIndex:
+    """Primary-key view with the index interface used by _lookup."""
+
+    def __init__(self, countries: dict):
+        self._countries = countries
+
+    def get(self, code: str, default=()):
+        return (code,) if code in self._countries else default
+
+
+def _lookup(index, operators: Optional[dict]) -> Optional[set]:
+    """Codes matching an `eq`/`in` filter through an index (None: not indexable)."""
+    if not operators:
+        return None
+    if operators.get("eq") is not None:
+        return set(index.get(operators["eq"], ()))
+    if operators.get("in") is not None:
+        return {code for key in operators["in"] for code in index.get(key, ())}
+    return None
+
+
+def _candidates(dataset: "CountriesDataset", filters: dict) -> Optional[list[str]]:
+    """Smallest indexed candidate set for a countries filter, in dataset order."""
+    sets = [
+        _lookup(_CodeIndex(dataset.countries), filters.get("code")),
+        _lookup(dataset.by_continent, filters.get("continent")),
+        _lookup(dataset.by_currency, filters.get("currency")),
+    ]
+    sets = [s for s in sets if s is not None]
+    if not sets:
+        return None
+    return sorted(min(sets, key=len), key=dataset.order.__getitem__)
+
+
+class _Executor:
+    def __init__(self, dataset: CountriesDataset, fragments: dict[str, list], variables: dict):
+        self._dataset = dataset
+        self._fragments = fragments
+        self._variables = variables
+
+    # Root fields -----------------------------------------------------------
+
+    def countries(self, args: dict) -> list[dict]:
+        filters = args.get("filter") or {}
+        dataset = self._dataset
+        candidates = _candidates(dataset, filters)
+        countries = (
+            (dataset.countries[code] for code in candidates)
+            if candidates is not None
+            else dataset.countries.values()
+        )
+        return [
+            country
+            for country in countries
+            if _matches(country["code"], filters.get("code"))
+            and _matches(country.get("continent"), filters.get("continent"))
+            and _matches(currencies(country), filters.get("currency"))
+            and _matches(country.get("name"), filters.get("name"))
+        ]
+
+    def country(self, args: dict) -> Optional[dict]:
+        return self._dataset.countries.get(str(args.get("code") or "").upper())
+
+    def continents(self, args: dict) -> list[dict]:
+        filters = args.get("filter") or {}
+        return [c for c in self._dataset.continents.values() if _matches(c["code"], filters.get("code"))]
+
+    def continent(self, args: dict) -> Optional[dict]:
+        return self._dataset.continents.get(str(args.get("code") or "").upper())
+
+    def languages(self, args: dict) -> list[dict]:
+        filters = args.get("filter") or {}
+        return [l for l in self._dataset.languages.values() if _matches(l["code"], filters.get("code"))]
+
+    def language(self, args: dict) -> Optional[dict]:
+        return self._dataset.languages.get(str(args.get("code") or "").lower())
+
+    def continent_countries(self, continent: dict) -> list[dict]:
+        codes = self._dataset.by_continent.get(continent["code"], [])
+        return [self._dataset.countries[code] for code in codes]
+
+    # Object fields ---------------------------------------------------------
+
+    def _field_value(self, type_name: str, obj: dict, name: str) -> Any:
+        if name == "__typename":
+            return type_name
+        if type_name == "Country":
+            if name == "continent":
+                return self._dataset.continents.get(obj.get("continent"))
+            if name == "languages":
+                return [self._dataset.languages[c] for c in obj.get("languages", []) if c in self._dataset.languages]
+            if name == "currencies":
+                return currencies(obj)
+            if name == "emoji":
+                return obj.get("emoji") or flag_emoji(obj["code"])
+            if name == "emojiU":
+                return obj.get("emojiU") or " ".join(f"U+{ord(c):X}" for c in flag_emoji(obj["code"]))
+            if name in ("states", "subdivisions"):
+                return obj.get(name, [])
+        if type_name == "Continent" and name == "countries":
+            return self.continent_countries(obj)
+        if name in _SCALAR_FIELDS[type_name]:
+            return obj.get(name)
+        raise GraphQLError(f'Cannot query field "{name}" on type "{type_name}".')
+
+    def _collect(self, selections: list, type_name: str) -> list[Field]:
+        fields = []
+        for selection in selections:
+            if isinstance(selection, Field):
+                fields.append(selection)
+            elif isinstance(selection, FragmentSpread):
+                if selection.name not in self._fragments:
+                    raise GraphQLError(f'Unknown fragment "{selection.name}".')
+                fields.extend(self._collect(self._fragments[selection.name], type_name))
+            elif selection.type_condition in (None, type_name):
+                fields.extend(self._collect(selection.selections, type_name))
+        return fields
+
+    def complete(self, type_name: str, value: Any, selections: Optional[list], field_name: str) -> Any:
+        if value is None:
+            return None
+        if isinstance(value, list) and type_name in _OBJECT_TYPES:
+            return [self.complete(type_name, item, selections, field_name) for item in value]
+        if type_name not in _OBJECT_TYPES:
+            if selections:
+                raise GraphQLError(f'Field "{field_name}" must not have a selection since type "{type_name}" has no subfields.')
+            return value
+        if not selections:
+            raise GraphQLError(f'Field "{field_name}" of type "{type_name}" must have a selection of subfields.')
+        result = {}
+        for selected in self._collect(selections, type_name):
+            child_type = _FIELD_TYPES.get((type_name, selected.name), "String")
+            child = self._field_value(type_name, value, selected.name)
+            result[selected.response_key] = self.complete(child_type, child, selected.selections, selected.name)
+        return result
+
+    def execute(self, selections: list) -> dict:
+        data = {}
+        for selected in self._collect(selections, "Query"):
+            if selected.name == "__typename":
+                data[selected.response_key] = "Query"
+                continue
+            if selected.name not in _ROOT_TYPES:
+                raise GraphQLError(f'Cannot query field "{selected.name}" on type "Query".')
+            args = _resolve_value(selected.arguments, self._variables)
+            value = getattr(self, selected.name)(args)
+            data[selected.response_key] = self.complete(
+                _ROOT_TYPES[selected.name], value, selected.selections, selected.name
+            )
+        return data
+
+
+_OBJECT_TYPES = ("Country", "Continent", "Language")
+
+_ROOT_TYPES = {
+    "countries": "Country",
+    "country": "Country",
+    "continents": "Continent",
+    "continent": "Continent",
+    "languages": "Language",
+    "language": "Language",
+}
+
+_FIELD_TYPES = {
+    ("Country", "continent"): "Continent",
+    ("Country", "languages"): "Language",
+    ("Continent", "countries"): "Country",
+}
+
+_SCALAR_FIELDS = {
+    "Country": ("code", "name", "native", "phone", "capital", "currency"),
+    "Continent": ("code", "name"),
+    "Language": ("code", "name", "native", "rtl"),
+}
+
+
+def execute_graphql(
+    dataset: CountriesDataset,
+    query: str,
+    variables: Optional[dict] = None,
+    operation_name: Optional[str] = None,
+) -> dict:
+    """Run a query against the dataset; errors are returned, never raised."""
+    try:
+        operation, fragments = parse_graphql(query, operation_name)
+        if operation.kind != "query":
+            raise GraphQLError(f"Schema is not configured for {operation.kind}s.")
+        resolved = {**operation.variable_defaults, **(variables or {})}
+        return {"data": _Executor(dataset, fragments, resolved).execute(operation.selections)}
+    except GraphQLError as e:
+        return {"errors": [{"message": str(e)}]}
+
+
+# ---------------------------------------------------------------------------
+# Engine: dataset lifecycle (initial load + periodic refresh)
+# ---------------------------------------------------------------------------
+
+COUNTRIES_API_URL = "https://countries.trevorblades.com/graphql"
+
+# Full dump in one request; from_dict flattens the embedded objects
+DUMP_QUERY = """
+query Dump {
+  continents { code name }
+  languages { code name native rtl }
+  countries {
+    code name native phone capital currency emoji emojiU
+    continent { code name }
+    languages { code name native rtl }
+  }
+}
+"""
+
+
+def fetch_dataset(source: str, timeout: float = 10.0) -> CountriesDataset:
+    """Load the dataset from the public API (http/https URL) or a JSON file."""
+    if not source.startswith(("http://", "https://")):
+        return CountriesDataset.from_file(source)
+
+    import urllib.request
+
+    request = urllib.request.Request(
+        source,
+        data=json.dumps({"query": DUMP_QUERY}).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as resp:
+        body = json.loads(resp.read().decode("utf-8"))
+    if body.get("errors") or not body.get("data"):
+        raise GraphQLError(f"Dump query failed: {body.get('errors')}")
+    return CountriesDataset.from_dict(body["data"])
+
+
+class CountriesEngine:
+    """In-process Countries GraphQL with a dataset refreshed in the background.
+
+    The dataset is loaded once from `source` (the public API by default; the
+    bundled fixture if that fails) and replaced every `refresh_interval`
+    seconds. Queries read an immutable snapshot, so a refresh never blocks them.
+    """
+
+    def __init__(
+        self,
+        source: str = COUNTRIES_API_URL,
+        fallback: Optional[str] = DEFAULT_FIXTURE,
+        refresh_interval: float = 86400.0,
+        retry_interval: float = 300.0,
+    ):
+        self._source = source
+        self._fallback = fallback
+        self._refresh_interval = refresh_interval
+        # While serving the partial fixture the full dataset is retried sooner
+        self._retry_interval = retry_interval
+        self._partial = False
+        self._dataset: Optional[CountriesDataset] = None
+        self._loaded_at = 0.0
+        self._load_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "CountriesEngine":
+        """Build an engine configured from COUNTRIES_* environment variables."""
+        interval = os.getenv("COUNTRIES_REFRESH_INTERVAL", "")
+        retry = os.getenv("COUNTRIES_RETRY_INTERVAL", "")
+        return cls(
+            source=os.getenv("COUNTRIES_DATA_SOURCE") or COUNTRIES_API_URL,
+            refresh_interval=float(interval) if interval.strip() else 86400.0,
+            retry_interval=float(retry) if retry.strip() else 300.0,
+        )
+
+    @property
+    def dataset(self) -> CountriesDataset:
+        """Current snapshot, loaded on first use."""
+        dataset = self._dataset
+        if dataset is None:
+            with self._load_lock:
+                if self._dataset is None:
+                    self._dataset = self._initial_load()
+                    self._loaded_at = time.time()
+                    self._start_refresher()
+                dataset = self._dataset
+        return dataset
+
+    def execute(self, query: str, variables: Optional[dict] = None, operation_name: Optional[str] = None) -> dict:
+        return execute_graphql(self.dataset, query, variables, operation_name)
+
+    async def execute_async(
+        self, query: str, variables: Optional[dict] = None, operation_name: Optional[str] = None
+    ) -> dict:
+        """execute() for event-loop callers: until the dataset is loaded (API fetch,
+        then fixture) the query runs in a worker thread so the loop is never blocked."""
+        if self._dataset is None:
+            return await asyncio.to_thread(self.execute, query, variables, operation_name)
+        return self.execute(query, variables, operation_name)
+
+    def refresh(self) -> bool:
+        """Reload from the source; the current snapshot is kept on failure."""
+        try:
+            dataset = fetch_dataset(self._source)
+        except Exception as e:
+            logger.warning(f"Countries dataset refresh failed ({self._source}): {e}")
+            return False
+        if self._partial:
+            logger.warning(f"Countries dataset recovered from {self._source}: no longer using the partial fixture")
+        self._dataset = dataset
+        self._loaded_at = time.time()
+        self._partial = False
+        logger.info(f"Countries dataset refreshed: {len(dataset.countries)} countries")
+        return True
+
+    def stats(self) -> dict:
+        dataset = self._dataset
+        return {
+            "countries": len(dataset.countries) if dataset else 0,
+            "continents": len(dataset.continents) if dataset else 0,
+            "languages": len(dataset.languages) if dataset else 0,
+            "age_seconds": round(time.time() - self._loaded_at, 1) if dataset else None,
+            "partial": self._partial,
+        }
+
+    def close(self) -> None:
+        self._stop.set()
+
+    def _initial_load(self) -> CountriesDataset:
+        start = time.perf_counter()
+        try:
+            dataset = fetch_dataset(self._source)
+            source = self._source
+        except Exception as e:
+            if not self._fallback:
+                raise
+            dataset = CountriesDataset.from_file(self._fallback)
+            source = self._fallback
+            self._partial = len(dataset.countries) < FULL_DATASET_COUNTRIES
+            self._warn_fallback(e, dataset)
+        logger.info(
+            f"Countries dataset loaded from {source}: {len(dataset.countries)} countries, "
+            f"{len(dataset.continents)} continents, {len(dataset.languages)} languages "
+            f"({(time.perf_counter() - start) * 1000:.0f}ms)"
+        )
+        return dataset
+
+    def _warn_fallback(self, error: Exception, dataset: CountriesDataset) -> None:
+        logger.warning("=" * 80)
+        logger.warning(f"COUNTRIES DATASET: could not load {self._source} ({error})")
+        if self._partial:
+            logger.warning(
+                f"USING THE PARTIAL OFFLINE FIXTURE {self._fallback}: only {len(dataset.countries)} of "
+                f"~{FULL_DATASET_COUNTRIES} countries. Queries for other countries return null/empty "
+                f"until the full dataset loads (retry every {self._retry_interval:g}s)"
+            )
+        else:
+            logger.warning(f"Using the fixture {self._fallback} ({len(dataset.countries)} countries)")
+        logger.warning("=" * 80)
+
+    def _start_refresher(self) -> None:
+        if self._refresher is not None:
+            return
+        if self._refresh_interval <= 0 and not (self._partial and self._retry_interval > 0):
+            return
+        self._refresher = threading.Thread(target=self._refresh_loop, name="countries-refresh", daemon=True)
+        self._refresher.start()
+
+    def _refresh_loop(self) -> None:
+        while True:
+            if self._partial and self._retry_interval > 0:
+                interval = self._retry_interval
+            elif self._refresh_interval > 0:
+                interval = self._refresh_interval
+            else:
+                return
+            if self._stop.wait(interval):
+                return
+            self.refresh()
+
+
+_engine: Optional[CountriesEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_countries_engine() -> CountriesEngine:
+    """Get or create the process-wide countries engine."""
+    global _engine
+
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = CountriesEngine.from_env()
+
+    return _engine
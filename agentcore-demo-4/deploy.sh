@@ -82,6 +82,18 @@ else
     agentcore configure -e agent_runtime.py --name $AGENT_NAME
 fi
 
+# Snapshot del catálogo de tools: entra en la imagen y evita tools/list en el arranque en frío
+echo ""
+echo "Generando snapshot del catálogo de tools..."
+PYTHON_BIN=${PYTHON_BIN:-python3}
+if [ -x ".venv/bin/python" ]; then
+    PYTHON_BIN=".venv/bin/python"
+fi
+if ! "$PYTHON_BIN" snapshot-tool-catalog.py; then
+    rm -f .mcp-tool-catalog.json
+    echo "⚠ Advertencia: no se generó el snapshot; el runtime llamará a tools/list al arrancar"
+fi
+
 # Launch
 echo ""
 echo "Lanzando agente..."
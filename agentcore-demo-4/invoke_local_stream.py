@@ -6,6 +6,7 @@ Cuando JWT_LOCAL_VALIDATION=true en el runtime, debes pasar el token:
   --token <TOKEN>     Token JWT en la línea de comandos
   BEARER_TOKEN=<...>  Variable de entorno con el token
 """
+import json
 import os
 import sys
 import uuid
@@ -25,13 +26,35 @@ def iter_sse_lines(response: requests.Response) -> Iterable[str]:
         yield raw_line.decode("utf-8", errors="replace")
 
 
-def extract_sse_data(lines: Iterable[str]) -> List[str]:
-    """Collect data payloads from SSE lines."""
-    chunks: List[str] = []
+def extract_sse_data(lines: Iterable[str]) -> Iterable[str]:
+    """Yield data payloads from SSE lines as they arrive."""
     for line in lines:
         if line.startswith("data: "):
-            chunks.append(line[len("data: "):])
-    return chunks
+            yield line[len("data: "):]
+
+
+def render_event(chunk: str) -> Optional[str]:
+    """Print one streamed event; returns the final response on 'done'."""
+    try:
+        event = json.loads(chunk)
+    except ValueError:
+        event = None
+    if not isinstance(event, dict) or "event" not in event:
+        print(f"chunk: {chunk}")
+        return None
+
+    kind = event["event"]
+    if kind == "text":
+        print(event.get("data", ""), end="", flush=True)
+    elif kind == "tool_start":
+        print(f"\n[tool] {event.get('name')} ...", flush=True)
+    elif kind == "tool_end":
+        print(f"[tool] {event.get('name')} -> {event.get('status')} ({event.get('durationMs')} ms)", flush=True)
+    elif kind == "error":
+        print(f"\nError: {event.get('error')}")
+    elif kind == "done":
+        return event.get("response", "")
+    return None
 
 
 def parse_args(
@@ -70,10 +93,10 @@ def invoke(
 
         if "text/event-stream" in content_type:
             print("Procesando respuesta en streaming (SSE):")
-            chunks = extract_sse_data(iter_sse_lines(response))
-            for chunk in chunks:
-                print(f"chunk: {chunk}")
-            full_response = " ".join(chunks).strip()
+            full_response = None
+            for chunk in extract_sse_data(iter_sse_lines(response)):
+                full_response = render_event(chunk) or full_response
+            print()
             if full_response:
                 print("\nRespuesta completa:\n")
                 print(full_response)
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Local MCP Gateway stand-in for repeatable performance runs.
+
+Serves the `executeGraphQLQuery` operation of gateway-config.json over
+streamable HTTP MCP, named like the AgentCore Gateway exposes it
+(`<target>___executeGraphQLQuery`), and answers from a local fixture dataset
+(countries_graphql.py) instead of countries.trevorblades.com. Latency and
+jitter are injected per tool call; JWT checking can be disabled, use a shared
+HS256 secret, or validate Cognito tokens like the Gateway's CUSTOM_JWT.
+
+Uso:
+  python local_gateway.py --port 8765 --latency-ms 80 --jitter-ms 20
+  export AGENTCORE_GATEWAY_URL=http://127.0.0.1:8765/mcp
+
+  # JWT HS256: el runtime lee el token de .cognito-token.json
+  python local_gateway.py --auth hs256 --jwt-secret dev --print-token > .cognito-token.json
+  python local_gateway.py --auth hs256 --jwt-secret dev
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from typing import Any, Optional
+
+from mcp.server.fastmcp import FastMCP
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from countries_graphql import DEFAULT_FIXTURE, CountriesDataset, execute_graphql
+
+logger = logging.getLogger("local_gateway")
+
+GATEWAY_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gateway-config.json")
+DEFAULT_TARGET = "countries-graphql-target"
+DEFAULT_CLIENT_ID = "local-gateway-client"
+
+
+def load_operation(path: str = GATEWAY_CONFIG) -> tuple[str, str]:
+    """operationId and description of the GraphQL operation in the OpenAPI spec."""
+    with open(path, "r") as f:
+        spec = json.load(f)
+    for methods in spec.get("paths", {}).values():
+        for operation in methods.values():
+            if "operationId" in operation:
+                return operation["operationId"], operation.get("description") or operation.get("summary", "")
+    raise ValueError(f"No operation with operationId in {path}")
+
+
+class LatencyModel:
+    """Per-call delay: base latency plus uniform jitter, reproducible with a seed."""
+
+    def __init__(self, latency_ms: float, jitter_ms: float, seed: Optional[int] = None):
+        self._latency = latency_ms / 1000.0
+        self._jitter = jitter_ms / 1000.0
+        self._random = random.Random(seed)
+
+    def sample(self) -> float:
+        if self._jitter <= 0:
+            return self._latency
+        return max(0.0, self._latency + self._random.uniform(-self._jitter, self._jitter))
+
+
+class TokenVerifier:
+    """Validates Bearer tokens: HS256 shared secret or Cognito (RS256 via JWKS)."""
+
+    def __init__(self, mode: str, secret: Optional[str], discovery_url: str, allowed_clients: list[str]):
+        self._mode = mode
+        self._secret = secret
+        self._allowed_clients = allowed_clients
+        self._key_store = None
+        if mode == "cognito":
+            from runtime_auth import JWKSKeyStore
+
+            # Keys loaded before serving; verification never fetches
+            self._key_store = JWKSKeyStore.from_env(discovery_url)
+            self._key_store.start()
+
+    def verify(self, token: str) -> dict:
+        import jwt
+
+        if self._mode == "hs256":
+            claims = jwt.decode(token, self._secret, algorithms=["HS256"], options={"verify_aud": False})
+        else:
+            kid = jwt.get_unverified_header(token).get("kid")
+            signing_key = self._key_store.get_key(kid)
+            if signing_key is None:
+                raise jwt.InvalidTokenError(f"Unknown signing key {kid!r}")
+            claims = jwt.decode(token, signing_key, algorithms=["RS256"], options={"verify_aud": False})
+
+        client_id = claims.get("client_id")
+        if self._allowed_clients and client_id not in self._allowed_clients:
+            raise PermissionError(f"client_id {client_id!r} not allowed")
+        return claims
+
+
+class GatewayAuthMiddleware(BaseHTTPMiddleware):
+    """Rejects MCP requests without a valid Bearer token, like the Gateway authorizer."""
+
+    def __init__(self, app, verifier: TokenVerifier):
+        super().__init__(app)
+        self._verifier = verifier
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        import jwt
+
+        auth_header = request.headers.get("Authorization", "")
+        if not auth_header.startswith("Bearer "):
+            return JSONResponse(
+                status_code=401,
+                content={"error": "Missing or invalid Authorization header"},
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        try:
+            self._verifier.verify(auth_header[7:].strip())
+        except PermissionError as e:
+            logger.warning(f"Rejected token: {e}")
+            return JSONResponse(status_code=403, content={"error": str(e)})
+        except jwt.InvalidTokenError as e:
+            logger.warning(f"Invalid JWT: {e}")
+            return JSONResponse(
+                status_code=401,
+                content={"error": "Invalid token"},
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return await call_next(request)
+
+
+def create_server(
+    dataset: CountriesDataset,
+    latency: LatencyModel,
+    target: str = DEFAULT_TARGET,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    json_response: bool = True,
+) -> FastMCP:
+    """FastMCP server exposing the Gateway-named GraphQL tool."""
+    operation_id, description = load_operation()
+    server = FastMCP(
+        "local-agentcore-gateway",
+        host=host,
+        port=port,
+        json_response=json_response,
+        log_level="WARNING",
+    )
+
+    @server.tool(name=f"{target}___{operation_id}", description=description, structured_output=False)
+    async def execute_graphql_query(query: str, variables: Optional[dict[str, Any]] = None) -> str:
+        delay = latency.sample()
+        start = time.perf_counter()
+        if delay:
+            await asyncio.sleep(delay)
+        # El Gateway devuelve el body HTTP del target como texto
+        body = json.dumps(execute_graphql(dataset, query, variables), ensure_ascii=False)
+        logger.info(
+            f"{operation_id}: {len(body)} bytes in {(time.perf_counter() - start) * 1000:.1f}ms "
+            f"(injected {delay * 1000:.1f}ms)"
+        )
+        return body
+
+    return server
+
+
+def issue_token(secret: str, client_id: str, lifetime: int) -> dict:
+    """HS256 access token in the .cognito-token.json format."""
+    import jwt
+
+    now = int(time.time())
+    token = jwt.encode(
+        {"client_id": client_id, "token_use": "access", "iat": now, "exp": now + lifetime},
+        secret,
+        algorithm="HS256",
+    )
+    return {"access_token": token, "token_type": "Bearer", "expires_in": lifetime}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local MCP Gateway stand-in (countries GraphQL)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--target", default=DEFAULT_TARGET, help="Gateway target name (tool prefix)")
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE, help="Countries dataset (JSON)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Base latency per tool call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform jitter (+/-) per tool call")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible jitter")
+    parser.add_argument("--sse", action="store_true", help="SSE responses instead of JSON")
+    parser.add_argument("--auth", choices=("none", "hs256", "cognito"), default="none")
+    parser.add_argument("--jwt-secret", default=os.getenv("LOCAL_GATEWAY_JWT_SECRET"))
+    parser.add_argument(
+        "--allowed-client",
+        action="append",
+        default=[],
+        help="Allowed client_id (repeatable; cognito mode defaults to .cognito-info.json)",
+    )
+    parser.add_argument("--print-token", action="store_true", help="Print an HS256 token and exit")
+    parser.add_argument("--client-id", default=DEFAULT_CLIENT_ID, help="client_id of --print-token")
+    parser.add_argument("--token-lifetime", type=int, default=3600)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.print_token:
+        if not args.jwt_secret:
+            parser.error("--print-token requires --jwt-secret")
+        print(json.dumps(issue_token(args.jwt_secret, args.client_id, args.token_lifetime), indent=2))
+        return 0
+
+    dataset = CountriesDataset.from_file(args.fixture)
+    latency = LatencyModel(args.latency_ms, args.jitter_ms, args.seed)
+    server = create_server(
+        dataset, latency, target=args.target, host=args.host, port=args.port, json_response=not args.sse
+    )
+    app = server.streamable_http_app()
+
+    allowed_clients = list(args.allowed_client)
+    if args.auth == "hs256":
+        if not args.jwt_secret:
+            parser.error("--auth hs256 requires --jwt-secret (or LOCAL_GATEWAY_JWT_SECRET)")
+        verifier = TokenVerifier("hs256", args.jwt_secret, "", allowed_clients)
+        app.add_middleware(GatewayAuthMiddleware, verifier=verifier)
+    elif args.auth == "cognito":
+        from runtime_config import get_runtime_config
+
+        config = get_runtime_config()
+        if not config.discovery_url:
+            parser.error("--auth cognito requires discoveryUrl/clientId in .cognito-info.json")
+        verifier = TokenVerifier("cognito", None, config.discovery_url, allowed_clients or config.allowed_clients)
+        app.add_middleware(GatewayAuthMiddleware, verifier=verifier)
+
+    url = f"http://{args.host}:{args.port}{server.settings.streamable_http_path}"
+    logger.info("=" * 80)
+    logger.info("LOCAL MCP GATEWAY")
+    logger.info(f"URL: {url}")
+    logger.info(f"Tool: {args.target}___{load_operation()[0]}")
+    logger.info(f"Dataset: {args.fixture} ({len(dataset.countries)} countries)")
+    logger.info(f"Latency: {args.latency_ms}ms +/- {args.jitter_ms}ms")
+    logger.info(f"Auth: {args.auth}")
+    logger.info(f"Use: export AGENTCORE_GATEWAY_URL={url}")
+    logger.info("=" * 80)
+
+    import uvicorn
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Startup profile of the runtime: import time per module and time to /ping ready.
+
+Starts `python -X importtime agent_runtime.py` on a free port and polls /ping.
+It reports three times: when the server first answers, when it reports
+Healthy (warm-up done), and the import-time breakdown. Imports finished
+before the startup banner belong to loading agent_runtime.py, which must
+finish before the server can listen. Later imports come from starting uvicorn
+and from the warm-up thread (or the first invocation). The warm-up imports
+in parallel, so those times overlap and include waits on import locks.
+
+Uso:
+  python profile_startup.py [--top 15] [--timeout 120] [--json profile.json]
+
+  # Sin AWS: modelo offline y Gateway local
+  MODEL_BACKEND=offline AGENTCORE_GATEWAY_URL=http://127.0.0.1:8765/mcp python profile_startup.py
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+RUNTIME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "agent_runtime.py")
+STARTUP_BANNER = "AGENTCORE RUNTIME STARTUP"
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+@dataclass
+class ImportRecord:
+    """One line of -X importtime (microseconds)."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+    # Finished before the startup banner (while loading agent_runtime.py)
+    module_load: bool
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def ping(port: int) -> Optional[str]:
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/ping", timeout=1) as resp:
+            return json.loads(resp.read().decode()).get("status")
+    except Exception:
+        return None
+
+
+def collect_stderr(stream, records: list[ImportRecord], log_lines: list[str]) -> None:
+    loaded = False
+    for line in stream:
+        match = _IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append(
+                ImportRecord(module, int(self_us), int(cumulative_us), len(indent) // 2, not loaded)
+            )
+            continue
+        log_lines.append(line.rstrip())
+        if STARTUP_BANNER in line:
+            loaded = True
+
+
+def package_totals(records: list[ImportRecord]) -> dict[str, int]:
+    """Self time summed per top-level package."""
+    totals: dict[str, int] = defaultdict(int)
+    for record in records:
+        totals[record.module.split(".")[0]] += record.self_us
+    return dict(totals)
+
+
+def print_report(result: dict, records: list[ImportRecord], top: int) -> None:
+    print("=" * 80)
+    print("RUNTIME STARTUP PROFILE")
+    print("=" * 80)
+    for label, key in (("Server answering /ping", "listening_s"), ("/ping Healthy (ready)", "ready_s")):
+        value = result.get(key)
+        print(f"{label:<28} {f'{value:.3f}s' if value is not None else 'not reached'}")
+
+    for title, subset in (
+        ("Imports loading agent_runtime.py", [r for r in records if r.module_load]),
+        ("Imports after loading (uvicorn, warm-up; overlapping)", [r for r in records if not r.module_load]),
+    ):
+        print()
+        total = sum(r.self_us for r in subset)
+        print(f"{title}: {len(subset)} modules, {total / 1e6:.3f}s")
+        for package, us in sorted(package_totals(subset).items(), key=lambda item: -item[1])[:top]:
+            print(f"  {package:<40} {us / 1e3:9.1f} ms")
+
+    print()
+    print(f"Slowest modules (cumulative, top {top}):")
+    roots = sorted(records, key=lambda r: -r.cumulative_us)
+    seen = set()
+    for record in roots:
+        if record.module in seen:
+            continue
+        seen.add(record.module)
+        when = "module load" if record.module_load else "after load"
+        print(f"  {record.module:<52} {record.cumulative_us / 1e3:9.1f} ms  ({when})")
+        if len(seen) >= top:
+            break
+    print("=" * 80)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--top", type=int, default=15, help="Rows per table")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for /ping Healthy")
+    parser.add_argument("--json", dest="json_path", help="Write the profile as JSON")
+    parser.add_argument("--log", action="store_true", help="Print the runtime log")
+    args = parser.parse_args()
+
+    port = free_port()
+    env = {**os.environ, "RUNTIME_PORT": str(port), "PYTHONUNBUFFERED": "1"}
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-X", "importtime", RUNTIME],
+        cwd=os.getcwd(),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    records: list[ImportRecord] = []
+    log_lines: list[str] = []
+    reader = threading.Thread(target=collect_stderr, args=(process.stderr, records, log_lines), daemon=True)
+    reader.start()
+
+    result: dict = {"listening_s": None, "ready_s": None}
+    deadline = start + args.timeout
+    try:
+        while time.perf_counter() < deadline and process.poll() is None:
+            status = ping(port)
+            now = time.perf_counter() - start
+            if status is not None and result["listening_s"] is None:
+                result["listening_s"] = now
+            if status == "Healthy":
+                result["ready_s"] = now
+                break
+            time.sleep(0.05)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        reader.join(timeout=5)
+
+    if process.returncode not in (None, 0, -15) and result["listening_s"] is None:
+        print("\n".join(log_lines[-30:]), file=sys.stderr)
+        print(f"Runtime exited with code {process.returncode}", file=sys.stderr)
+        return 1
+
+    if args.log:
+        print("\n".join(log_lines))
+    print_report(result, records, args.top)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({**result, "imports": [asdict(r) for r in records]}, f, indent=2)
+        print(f"Profile written to {args.json_path}")
+    return 0 if result["ready_s"] is not None else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
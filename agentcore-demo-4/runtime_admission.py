@@ -0,0 +1,309 @@
+"""
+Admission control for /invocations: global concurrency limit, per-session FIFO.
+
+AdmissionMiddleware runs in front of the entrypoint. An invocation runs once
+it holds one of ADMISSION_MAX_CONCURRENT slots and every earlier turn of its
+session has finished, so turns of one session never overlap and run in arrival
+order. Waiting requests are queued on the event loop (no handler thread is
+held). The runtime answers 429 with Retry-After without queueing when the
+global queue (ADMISSION_MAX_QUEUE) or the session's queue
+(ADMISSION_MAX_SESSION_QUEUE) is full, and after ADMISSION_QUEUE_TIMEOUT
+seconds of waiting.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from runtime_config import env_bool, env_float, env_int
+from runtime_metrics import ADMISSION_QUEUE, ADMISSIONS, STAGE_LATENCY
+from runtime_tracing import annotate, start_span
+
+logger = logging.getLogger(__name__)
+
+SESSION_HEADER = b"x-amzn-bedrock-agentcore-runtime-session-id"
+ADMITTED_PATHS = ("/invocations",)
+
+
+class AdmissionRejected(Exception):
+    """The invocation was not admitted; answer 429 with Retry-After."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def response(self) -> JSONResponse:
+        return JSONResponse(
+            status_code=429,
+            content={"error": "Too many requests", "reason": self.reason, "retryAfter": self.retry_after},
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+
+@dataclass(eq=False)
+class _Ticket:
+    seq: int
+    session_id: Optional[str]
+    queued_at: float
+    future: Optional[asyncio.Future] = None
+    granted_at: Optional[float] = None
+    abandoned: bool = False
+
+    def __lt__(self, other: "_Ticket") -> bool:
+        return self.seq < other.seq
+
+
+@dataclass
+class AdmissionController:
+    """Slots and queues of the admission layer (event-loop only, not thread-safe)."""
+
+    max_concurrent: int = 8
+    max_queue: int = 32
+    max_session_queue: int = 4
+    queue_timeout: float = 30.0
+    _running: int = 0
+    _queued: int = 0
+    # Tickets whose session turn has come, ordered by arrival (lazy deletion)
+    _eligible: list = field(default_factory=list)
+    # Per session: the turn running or next to run, then the waiting turns
+    _sessions: dict = field(default_factory=dict)
+    _seq: "itertools.count" = field(default_factory=itertools.count)
+    # Smoothed invocation duration, for Retry-After
+    _service_time: float = 1.0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        """Build a controller configured from ADMISSION_* environment variables."""
+        return cls(
+            max_concurrent=max(1, env_int("ADMISSION_MAX_CONCURRENT", 8)),
+            max_queue=max(0, env_int("ADMISSION_MAX_QUEUE", 32)),
+            max_session_queue=max(0, env_int("ADMISSION_MAX_SESSION_QUEUE", 4)),
+            queue_timeout=env_float("ADMISSION_QUEUE_TIMEOUT", 30.0),
+        )
+
+    def stats(self) -> dict:
+        return {"running": self._running, "queued": self._queued, "sessions": len(self._sessions)}
+
+    async def acquire(self, session_id: Optional[str]) -> _Ticket:
+        """Wait for a slot and the session's turn; raises AdmissionRejected."""
+        ticket = _Ticket(seq=next(self._seq), session_id=session_id, queued_at=time.monotonic())
+        turns = self._sessions.get(session_id) if session_id else None
+
+        if not turns and not self._eligible and self._running < self.max_concurrent:
+            # Camino rápido: hay slot libre y la sesión no tiene turnos pendientes
+            self._grant(ticket)
+            if session_id:
+                self._sessions[session_id] = deque([ticket])
+            ADMISSIONS.inc(result="admitted")
+            STAGE_LATENCY.observe(0.0, stage="admission_wait")
+            return ticket
+
+        if turns is not None and len(turns) > self.max_session_queue:
+            raise self._reject("session_queue_full", len(turns))
+        if self._queued >= self.max_queue:
+            raise self._reject("queue_full", self._queued)
+
+        ticket.future = asyncio.get_running_loop().create_future()
+        self._queued += 1
+        if session_id:
+            self._sessions.setdefault(session_id, deque()).append(ticket)
+        if not session_id or self._sessions[session_id][0] is ticket:
+            heapq.heappush(self._eligible, ticket)
+        self._dispatch()
+
+        try:
+            await asyncio.wait({ticket.future}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # Cliente desconectado mientras esperaba
+            if ticket.future.done():
+                self.release(ticket)
+            else:
+                self._abandon(ticket)
+            raise
+
+        wait = time.monotonic() - ticket.queued_at
+        STAGE_LATENCY.observe(wait, stage="admission_wait")
+        if not ticket.future.done():
+            self._abandon(ticket)
+            raise self._reject("timeout", self._queued)
+        ADMISSIONS.inc(result="admitted")
+        return ticket
+
+    def release(self, ticket: _Ticket) -> None:
+        """Finish an admitted invocation: free its slot and start the session's next turn."""
+        self._running -= 1
+        if ticket.granted_at is not None:
+            elapsed = time.monotonic() - ticket.granted_at
+            self._service_time = 0.8 * self._service_time + 0.2 * elapsed
+        self._advance_session(ticket)
+        self._dispatch()
+
+    def _grant(self, ticket: _Ticket) -> None:
+        self._running += 1
+        ticket.granted_at = time.monotonic()
+
+    def _dispatch(self) -> None:
+        while self._eligible and self._running < self.max_concurrent:
+            ticket = heapq.heappop(self._eligible)
+            if ticket.abandoned:
+                continue
+            self._queued -= 1
+            self._grant(ticket)
+            ticket.future.set_result(None)
+
+    def _abandon(self, ticket: _Ticket) -> None:
+        ticket.abandoned = True
+        self._queued -= 1
+        turns = self._sessions.get(ticket.session_id) if ticket.session_id else None
+        if turns is None:
+            return
+        if turns[0] is ticket:
+            self._advance_session(ticket)
+            self._dispatch()
+        else:
+            turns.remove(ticket)
+
+    def _advance_session(self, ticket: _Ticket) -> None:
+        if not ticket.session_id:
+            return
+        turns = self._sessions.get(ticket.session_id)
+        if not turns or turns[0] is not ticket:
+            return
+        turns.popleft()
+        if turns:
+            heapq.heappush(self._eligible, turns[0])
+        else:
+            del self._sessions[ticket.session_id]
+
+    def _reject(self, reason: str, ahead: int) -> AdmissionRejected:
+        ADMISSIONS.inc(result=reason)
+        # Turnos por delante repartidos entre los slots, al ritmo medio observado
+        estimate = self._service_time * (ahead / self.max_concurrent + 1)
+        return AdmissionRejected(reason, max(1, math.ceil(estimate)))
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware that admits POST /invocations through an AdmissionController."""
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController):
+        self.app = app
+        self._controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"].rstrip("/") not in ADMITTED_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        session_id = _header(scope, SESSION_HEADER)
+        if session_id is None:
+            # Sin header: sessionId del payload (se vuelve a entregar el body al handler)
+            body = await _read_body(receive)
+            session_id = _payload_session_id(body)
+            receive = _replay(body, receive)
+
+        with start_span("admission.wait"):
+            try:
+                ticket = await self._controller.acquire(session_id)
+            except AdmissionRejected as rejection:
+                annotate(**{"admission.result": rejection.reason, "admission.retry_after": rejection.retry_after})
+                logger.warning(
+                    "Invocation rejected (%s, session=%s, retry after %ds)",
+                    rejection.reason,
+                    session_id,
+                    rejection.retry_after,
+                )
+                await rejection.response()(scope, receive, send)
+                return
+            annotate(**{"admission.result": "admitted"})
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._controller.release(ticket)
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1") or None
+    return None
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _replay(body: bytes, receive: Receive) -> Receive:
+    sent = False
+
+    async def replay() -> Message:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
+
+
+def _payload_session_id(body: bytes) -> Optional[str]:
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return None
+    session_id = payload.get("sessionId") if isinstance(payload, dict) else None
+    return str(session_id) if session_id else None
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Get or create the process-wide admission controller."""
+    global _controller
+
+    if _controller is None:
+        _controller = AdmissionController.from_env()
+        ADMISSION_QUEUE.set_function(
+            lambda: {(state,): value for state, value in _controller.stats().items()}
+        )
+    return _controller
+
+
+def setup_admission_middleware():
+    """Starlette Middleware for the runtime, or None when ADMISSION_CONTROL=false."""
+    from starlette.middleware import Middleware
+
+    if not env_bool("ADMISSION_CONTROL", True):
+        logger.info("Admission control: disabled (ADMISSION_CONTROL=false)")
+        return None
+
+    controller = get_admission_controller()
+    logger.info(
+        f"Admission control: {controller.max_concurrent} concurrent, queue {controller.max_queue}, "
+        f"{controller.max_session_queue} waiting turn(s) per session, timeout {controller.queue_timeout:g}s"
+    )
+    return Middleware(AdmissionMiddleware, controller=controller)
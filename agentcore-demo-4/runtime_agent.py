@@ -1,17 +1,28 @@
 """
-Agent factory: BedrockModel and Strands Agent creation.
+Agent factory: model backend (Bedrock or offline) and Strands Agent creation.
 """
 
 import logging
-import os
+import threading
 from typing import Optional
 
 from strands import Agent
-from strands.models import BedrockModel
+from strands.agent.conversation_manager import SlidingWindowConversationManager
+from strands.models import BedrockModel, Model
+
+from runtime_config import env_int, get_runtime_config
+from runtime_countries import with_local_engine
+from runtime_logging import log_event, structured_logging
+from runtime_mcp import wrap_gateway_tools
+from runtime_tool_calls import ModelCallTimer, ToolCallRecorder
+from runtime_tracing import start_span
 
 logger = logging.getLogger(__name__)
 
 _bedrock_model: Optional[BedrockModel] = None
+_offline_model: Optional[Model] = None
+# Warm-up and the first requests may create the model concurrently
+_model_lock = threading.Lock()
 
 
 def get_or_create_bedrock_model() -> BedrockModel:
@@ -19,36 +30,80 @@ def get_or_create_bedrock_model() -> BedrockModel:
     global _bedrock_model
 
     if _bedrock_model is None:
-        model_id = os.getenv(
-            "BEDROCK_MODEL_ID",
-            "us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-        )
-        _bedrock_model = BedrockModel(
-            model_id=model_id,
-            temperature=0.3,
-            top_p=0.8,
-        )
-        logger.info("=" * 80)
-        logger.info("BEDROCK MODEL INITIALIZED")
-        logger.info(f"Model: {model_id}")
-        logger.info("Temperature: 0.3")
-        logger.info("Top P: 0.8")
-        logger.info("=" * 80)
+        with _model_lock:
+            if _bedrock_model is None:
+                model_id = get_runtime_config().model_id
+                _bedrock_model = BedrockModel(
+                    model_id=model_id,
+                    temperature=0.3,
+                    top_p=0.8,
+                )
+                logger.info("=" * 80)
+                logger.info("BEDROCK MODEL INITIALIZED")
+                logger.info(f"Model: {model_id}")
+                logger.info("Temperature: 0.3")
+                logger.info("Top P: 0.8")
+                logger.info("=" * 80)
 
     return _bedrock_model
 
 
+def get_or_create_model() -> Model:
+    """Model backend selected by MODEL_BACKEND: "bedrock" (default) or "offline"."""
+    global _offline_model
+
+    if get_runtime_config().model_backend != "offline":
+        return get_or_create_bedrock_model()
+
+    if _offline_model is None:
+        with _model_lock:
+            if _offline_model is None:
+                from runtime_offline_model import OfflineModel
+
+                _offline_model = OfflineModel.from_env()
+                config = _offline_model.get_config()
+                logger.info("=" * 80)
+                logger.info("OFFLINE MODEL INITIALIZED (MODEL_BACKEND=offline)")
+                logger.info(f"Time to first token: {config['time_to_first_token']}s")
+                logger.info(f"Tokens per second: {config['tokens_per_second']}")
+                logger.info(f"Throttle rate: {config['throttle_rate']}")
+                logger.info("=" * 80)
+
+    return _offline_model
+
+
 def create_agent(tools: list) -> Agent:
-    """Create the Strands agent with BedrockModel and MCP tools."""
-    bedrock_model = get_or_create_bedrock_model()
-    agent = Agent(model=bedrock_model, tools=tools)
-
-    logger.info("=" * 80)
-    logger.info("AGENT INITIALIZED (per-invocation MCP context)")
-    logger.info(f"MCP Tools: {len(tools)}")
-    for i, tool in enumerate(tools, 1):
-        tool_name = getattr(tool, "name", "unknown")
-        logger.info(f"  - {tool_name}")
-    logger.info("=" * 80)
+    """Create the Strands agent with the selected model and MCP tools."""
+    with start_span("agent.create", **{"agent.tools": len(tools)}):
+        return _create_agent(tools)
+
+
+def _create_agent(tools: list) -> Agent:
+    model = get_or_create_model()
+    tools = wrap_gateway_tools(with_local_engine(tools))
+    # Cached session agents keep their history; the window bounds its size
+    # En modo JSON sin PrintingCallbackHandler: el texto del modelo no se
+    # imprime token a token en stdout, entre las líneas JSON
+    callback_options = {"callback_handler": None} if structured_logging() else {}
+    agent = Agent(
+        model=model,
+        tools=tools,
+        hooks=[ToolCallRecorder(), ModelCallTimer()],
+        conversation_manager=SlidingWindowConversationManager(
+            window_size=env_int("AGENT_SESSION_WINDOW_SIZE", 40)
+        ),
+        **callback_options,
+    )
+
+    if structured_logging():
+        log_event(logger, "agent_created", tools=[getattr(tool, "tool_name", "unknown") for tool in tools])
+    else:
+        logger.info("=" * 80)
+        logger.info("AGENT INITIALIZED (pooled MCP session)")
+        logger.info(f"MCP Tools: {len(tools)}")
+        for i, tool in enumerate(tools, 1):
+            tool_name = getattr(tool, "tool_name", "unknown")
+            logger.info(f"  - {tool_name}")
+        logger.info("=" * 80)
 
     return agent
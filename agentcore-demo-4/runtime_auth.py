@@ -3,18 +3,35 @@ Local JWT authentication: valida el token del header Authorization.
 
 Solo activo cuando JWT_LOCAL_VALIDATION=true (despliegue local).
 En AWS, la validación la hace AgentCore Identity.
+
+Las claves públicas (JWKS) se cargan al arrancar y un thread las refresca
+periódicamente o cuando llega un `kid` desconocido; la validación de un
+request nunca hace I/O. Los tokens ya verificados se guardan (por digest)
+hasta su `exp`, así que los turnos siguientes de una sesión no repiten la
+verificación RS256.
+
+El middleware es ASGI puro (sin BaseHTTPMiddleware): no crea una task ni un
+memory stream por request, las respuestas SSE pasan sin buffering y
+`inbound_token` se fija en el mismo contexto en que corre el handler.
 """
 
+import hashlib
 import json
 import logging
-import os
+import threading
+import time
+from collections import OrderedDict
 from contextvars import ContextVar
-from typing import Optional
+from dataclasses import dataclass
+from typing import Any, Optional, Union
 
 from starlette.middleware import Middleware
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import JSONResponse, Response
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from runtime_config import env_bool, env_float, env_int, get_runtime_config
+from runtime_metrics import JWKS_REFRESHES, JWT_CACHE_EVICTIONS, JWT_CACHE_LOOKUPS, JWT_CACHE_SIZE
+from runtime_tracing import annotate, start_span
 
 logger = logging.getLogger(__name__)
 
@@ -23,22 +40,15 @@ inbound_token: ContextVar[Optional[str]] = ContextVar(
     "inbound_token", default=None
 )
 
+# Rutas que no requieren auth
+PUBLIC_PATHS = ("/ping", "")
+# Expone nombres de tools, sesiones y tamaños de caché: con token salvo METRICS_PUBLIC=true
+METRICS_PATH = "/metrics"
+
 
-def _load_auth_config() -> tuple[str, list[str]]:
-    """Carga discoveryUrl y allowedClients desde .cognito-info.json."""
-    path = ".cognito-info.json"
-    if not os.path.exists(path):
-        return "", []
-    try:
-        with open(path, "r") as f:
-            data = json.load(f)
-        discovery_url = data.get("discoveryUrl")
-        client_id = data.get("clientId")
-        if discovery_url and client_id:
-            return discovery_url, [client_id]
-    except Exception as e:
-        logger.debug(f"Could not load auth config from {path}: {e}")
-    return "", []
+def public_paths() -> tuple[str, ...]:
+    """Paths served without a token; /metrics only with METRICS_PUBLIC=true."""
+    return PUBLIC_PATHS + ((METRICS_PATH,) if env_bool("METRICS_PUBLIC") else ())
 
 
 def _resolve_jwks_uri(discovery_url: str) -> str:
@@ -53,117 +63,356 @@ def _resolve_jwks_uri(discovery_url: str) -> str:
     return jwks_uri
 
 
-class LocalJWTAuthMiddleware(BaseHTTPMiddleware):
-    """Valida JWT inbound solo en despliegue local."""
+class JWKSKeyStore:
+    """In-memory map kid -> public key, refreshed off the request path.
 
-    def __init__(self, app, discovery_url: str, allowed_clients: list[str]):
-        super().__init__(app)
+    load() runs once at startup. A daemon thread reloads the JWKS every
+    refresh_interval seconds, or early when a token with an unknown `kid`
+    shows up (rotation), at most once per min_refresh_interval.
+    """
+
+    def __init__(
+        self,
+        discovery_url: str,
+        refresh_interval: float = 3600.0,
+        min_refresh_interval: float = 60.0,
+    ):
         self._discovery_url = discovery_url
+        self._refresh_interval = refresh_interval
+        self._min_refresh_interval = min_refresh_interval
+        self._jwks_uri: Optional[str] = None
+        # Replaced as a whole on refresh; readers never lock
+        self._keys: dict[str, Any] = {}
+        self._loaded_at = 0.0
+        self._last_attempt = 0.0
+        self._wakeup = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        self._stopped = False
+
+    @classmethod
+    def from_env(cls, discovery_url: str) -> "JWKSKeyStore":
+        """Build a key store configured from JWKS_* environment variables."""
+        return cls(
+            discovery_url,
+            refresh_interval=env_float("JWKS_REFRESH_INTERVAL", 3600.0),
+            min_refresh_interval=env_float("JWKS_MIN_REFRESH_INTERVAL", 60.0),
+        )
+
+    @property
+    def ready(self) -> bool:
+        return bool(self._keys)
+
+    def start(self) -> None:
+        """Load the keys now (blocking, startup only) and start the refresher."""
+        self.load("startup")
+        if self._refresher is None:
+            self._refresher = threading.Thread(target=self._refresh_loop, name="jwks-refresher", daemon=True)
+            self._refresher.start()
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wakeup.set()
+
+    def has_key(self, kid: Optional[str]) -> bool:
+        """Whether kid is in the current key set (no refresh scheduled)."""
+        return bool(kid) and kid in self._keys
+
+    def get_key(self, kid: Optional[str]) -> Optional[Any]:
+        """Public key for kid from memory; an unknown kid schedules a refresh."""
+        key = self._keys.get(kid) if kid else None
+        if key is None and kid:
+            self._wakeup.set()
+        return key
+
+    def load(self, reason: str) -> bool:
+        """Fetch the JWKS and swap the key map; the previous keys stay on failure."""
+        import urllib.request
+
+        import jwt
+
+        self._last_attempt = time.monotonic()
+        try:
+            if self._jwks_uri is None:
+                self._jwks_uri = _resolve_jwks_uri(self._discovery_url)
+            with urllib.request.urlopen(self._jwks_uri, timeout=10) as resp:
+                jwks = json.loads(resp.read().decode())
+            keys = {}
+            for jwk in jwks.get("keys", []):
+                if jwk.get("use", "sig") != "sig" or not jwk.get("kid"):
+                    continue
+                try:
+                    keys[jwk["kid"]] = jwt.PyJWK(jwk).key
+                except jwt.PyJWKError as e:
+                    logger.warning(f"Skipping JWKS key {jwk.get('kid')}: {e}")
+            if not keys:
+                raise ValueError("JWKS has no usable signing keys")
+        except Exception as e:
+            JWKS_REFRESHES.inc(reason=reason, result="failure")
+            logger.error(f"Failed to load JWKS ({reason}): {e}")
+            return False
+
+        added = set(keys) - set(self._keys)
+        self._keys = keys
+        self._loaded_at = time.monotonic()
+        JWKS_REFRESHES.inc(reason=reason, result="success")
+        logger.info(f"JWKS loaded ({reason}): {len(keys)} key(s), {len(added)} new")
+        return True
+
+    def _refresh_loop(self) -> None:
+        while not self._stopped:
+            # Without keys retry soon; otherwise wait for the interval or an unknown kid
+            timeout = self._min_refresh_interval if not self._keys else self._refresh_interval
+            woken = self._wakeup.wait(timeout)
+            self._wakeup.clear()
+            if self._stopped:
+                return
+            if woken:
+                # Unknown kid: throttled so bogus tokens cannot cause a fetch storm
+                wait = self._last_attempt + self._min_refresh_interval - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                self.load("unknown_kid")
+            else:
+                self.load("interval" if self._keys else "retry")
+
+
+@dataclass(frozen=True)
+class TokenRejection:
+    """Why a token was refused; cacheable rejections are final for that token."""
+
+    status: int
+    error: str
+    cacheable: bool = True
+
+    def response(self) -> JSONResponse:
+        headers = {"WWW-Authenticate": "Bearer"} if self.status == 401 else None
+        return JSONResponse(status_code=self.status, content={"error": self.error}, headers=headers)
+
+
+@dataclass
+class _VerifiedToken:
+    outcome: Union[dict, TokenRejection]
+    kid: Optional[str]
+    expires_at: float
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of verification outcomes keyed by SHA-256 of the token.
+
+    Valid tokens keep their decoded claims until `exp`; rejected tokens
+    (bad signature, expired, malformed) are remembered for negative_ttl
+    seconds. Hits on valid tokens are dropped if their signing key left the
+    JWKS. Raw tokens are never stored.
+    """
+
+    def __init__(self, max_entries: int = 10000, negative_ttl: float = 30.0):
+        self._max_entries = max(1, max_entries)
+        self._negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        # Least recently used first
+        self._entries: "OrderedDict[bytes, _VerifiedToken]" = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "VerifiedTokenCache":
+        """Build a cache configured from JWT_CACHE_* environment variables."""
+        return cls(
+            max_entries=env_int("JWT_CACHE_MAX_ENTRIES", 10000),
+            negative_ttl=env_float("JWT_NEGATIVE_CACHE_TTL", 30.0),
+        )
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, digest: bytes, key_store: Optional[JWKSKeyStore] = None) -> Optional[Union[dict, TokenRejection]]:
+        """Cached claims or rejection for a token digest, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                if entry.expires_at <= time.time():
+                    del self._entries[digest]
+                    JWT_CACHE_EVICTIONS.inc(reason="expired")
+                    entry = None
+                elif isinstance(entry.outcome, dict) and key_store is not None and not key_store.has_key(entry.kid):
+                    del self._entries[digest]
+                    JWT_CACHE_EVICTIONS.inc(reason="key_rotated")
+                    entry = None
+                else:
+                    self._entries.move_to_end(digest)
+
+        if entry is None:
+            JWT_CACHE_LOOKUPS.inc(result="miss")
+            return None
+        JWT_CACHE_LOOKUPS.inc(result="hit" if isinstance(entry.outcome, dict) else "negative_hit")
+        return entry.outcome
+
+    def put(self, digest: bytes, outcome: Union[dict, TokenRejection], kid: Optional[str] = None) -> None:
+        """Store claims until their exp, or a rejection for negative_ttl seconds."""
+        if isinstance(outcome, TokenRejection):
+            if not outcome.cacheable or self._negative_ttl <= 0:
+                return
+            expires_at = time.time() + self._negative_ttl
+        else:
+            exp = outcome.get("exp")
+            if not isinstance(exp, (int, float)):
+                return
+            expires_at = float(exp)
+
+        with self._lock:
+            self._entries.pop(digest, None)
+            self._entries[digest] = _VerifiedToken(outcome, kid, expires_at)
+            while len(self._entries) > self._max_entries:
+                _, victim = self._entries.popitem(last=False)
+                JWT_CACHE_EVICTIONS.inc(reason="expired" if victim.expires_at <= time.time() else "lru")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Snapshot of cache occupancy by kind."""
+        with self._lock:
+            valid = sum(1 for entry in self._entries.values() if isinstance(entry.outcome, dict))
+            return {"valid": valid, "rejected": len(self._entries) - valid, "max_entries": self._max_entries}
+
+
+class LocalJWTAuthMiddleware:
+    """Valida JWT inbound solo en despliegue local (middleware ASGI puro)."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        key_store: JWKSKeyStore,
+        allowed_clients: Optional[list[str]] = None,
+        token_cache: Optional[VerifiedTokenCache] = None,
+    ):
+        self.app = app
+        self._key_store = key_store
         self._allowed_clients = allowed_clients
-        self._jwks_client = None
-
-    def _get_jwks_client(self):
-        if self._jwks_client is None:
-            try:
-                from jwt import PyJWKClient
-
-                jwks_uri = _resolve_jwks_uri(self._discovery_url)
-                self._jwks_client = PyJWKClient(jwks_uri, cache_keys=True)
-                logger.info("JWKS client initialized for JWT validation")
-            except Exception as e:
-                logger.error(f"Failed to create JWKS client: {e}")
-                raise
-        return self._jwks_client
-
-    async def dispatch(self, request: Request, call_next) -> Response:
-        # /ping no requiere auth
-        if request.url.path.rstrip("/") in ("/ping", ""):
-            return await call_next(request)
-
-        auth_header = request.headers.get("Authorization")
+        self._token_cache = token_cache
+        self._public_paths = public_paths()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # /ping no requiere auth (/metrics tampoco con METRICS_PUBLIC=true)
+        if scope["type"] != "http" or scope["path"].rstrip("/") in self._public_paths:
+            await self.app(scope, receive, send)
+            return
+
+        with start_span("auth.jwt"):
+            outcome = self.check(_authorization_header(scope))
+            annotate(**{"auth.result": outcome.status if isinstance(outcome, TokenRejection) else "ok"})
+        if isinstance(outcome, TokenRejection):
+            await outcome.response()(scope, receive, send)
+            return
+
+        # Token válido: guardar para MCP y continuar; receive/send pasan intactos
+        context_token = inbound_token.set(outcome)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            inbound_token.reset(context_token)
+
+    def check(self, auth_header: Optional[str]) -> Union[str, TokenRejection]:
+        """Bearer token of an authorized request, or why it is rejected."""
         if not auth_header or not auth_header.startswith("Bearer "):
-            return JSONResponse(
-                status_code=401,
-                content={"error": "Missing or invalid Authorization header"},
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+            return TokenRejection(401, "Missing or invalid Authorization header")
 
         token = auth_header[7:].strip()
         if not token:
-            return JSONResponse(
-                status_code=401,
-                content={"error": "Empty Bearer token"},
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+            return TokenRejection(401, "Empty Bearer token")
+
+        outcome = self.authenticate(token)
+        if isinstance(outcome, TokenRejection):
+            return outcome
+
+        # Validar client_id (None: clientId del RuntimeConfig vigente)
+        allowed_clients = self._allowed_clients
+        if allowed_clients is None:
+            allowed_clients = get_runtime_config().allowed_clients
+        client_id = outcome.get("client_id")
+        if allowed_clients and (not client_id or client_id not in allowed_clients):
+            logger.warning(f"Token client_id {client_id!r} not in allowed list")
+            return TokenRejection(403, "Token client_id not allowed")
+        return token
+
+    def authenticate(self, token: str) -> Union[dict, TokenRejection]:
+        """Claims of a valid token or the rejection, from the cache when possible."""
+        if self._token_cache is None:
+            return self._verify(token)[0]
+
+        digest = self._token_cache.digest(token)
+        outcome = self._token_cache.get(digest, self._key_store)
+        annotate(**{"auth.cache": "miss" if outcome is None else "hit"})
+        if outcome is None:
+            outcome, kid = self._verify(token)
+            self._token_cache.put(digest, outcome, kid)
+        return outcome
 
+    def _verify(self, token: str) -> tuple[Union[dict, TokenRejection], Optional[str]]:
+        """Full signature check: (claims or rejection, kid)."""
+        kid = None
         try:
             import jwt
 
-            jwks = self._get_jwks_client()
-            signing_key = jwks.get_signing_key_from_jwt(token)
+            if not self._key_store.ready:
+                return TokenRejection(503, "Authentication keys not loaded yet", cacheable=False), kid
+
+            kid = jwt.get_unverified_header(token).get("kid")
+            signing_key = self._key_store.get_key(kid)
+            if signing_key is None:
+                # Clave rotada: el refresher la carga en segundo plano (no se cachea)
+                logger.warning(f"JWT signed with unknown kid {kid!r}")
+                return TokenRejection(401, "Invalid token", cacheable=False), kid
 
             payload = jwt.decode(
                 token,
-                signing_key.key,
+                signing_key,
                 algorithms=["RS256"],
                 options={"verify_exp": True, "verify_aud": False},
             )
-
-            # Validar client_id
-            client_id = payload.get("client_id")
-            if self._allowed_clients and (
-                not client_id or client_id not in self._allowed_clients
-            ):
-                logger.warning(f"Token client_id {client_id!r} not in allowed list")
-                return JSONResponse(
-                    status_code=403,
-                    content={"error": "Token client_id not allowed"},
-                )
-
-            # Token válido: guardar para MCP y continuar
-            inbound_token.set(token)
-            try:
-                return await call_next(request)
-            finally:
-                inbound_token.set(None)
+            return payload, kid
 
         except jwt.ExpiredSignatureError:
             logger.warning("JWT token expired")
-            return JSONResponse(
-                status_code=401,
-                content={"error": "Token expired"},
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+            return TokenRejection(401, "Token expired"), kid
         except jwt.InvalidTokenError as e:
             logger.warning(f"Invalid JWT: {e}")
-            return JSONResponse(
-                status_code=401,
-                content={"error": "Invalid token"},
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+            return TokenRejection(401, "Invalid token"), kid
         except Exception as e:
             logger.exception(f"JWT validation error: {e}")
-            return JSONResponse(
-                status_code=500,
-                content={"error": "Authentication error"},
-            )
+            return TokenRejection(500, "Authentication error", cacheable=False), kid
+
+
+def _authorization_header(scope: Scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            return value.decode("latin-1")
+    return None
 
 
 def setup_local_auth_middleware() -> Optional[Middleware]:
     """Devuelve Middleware para JWT si estamos en modo local."""
-    if not os.getenv("JWT_LOCAL_VALIDATION", "").lower() in ("true", "1", "yes"):
+    config = get_runtime_config()
+    if not config.jwt_local_validation:
         return None
 
-    discovery_url, allowed_clients = _load_auth_config()
-    if not discovery_url or not allowed_clients:
+    discovery_url = config.discovery_url
+    if not discovery_url or not config.allowed_clients:
         logger.warning(
             "JWT_LOCAL_VALIDATION=true but no discoveryUrl/allowedClients in .cognito-info.json"
         )
         return None
 
     logger.info("Auth: Local mode - JWT validation via middleware")
+    # Claves cargadas antes del primer request
+    key_store = JWKSKeyStore.from_env(discovery_url)
+    key_store.start()
+    token_cache = None
+    if env_bool("JWT_CACHE", True):
+        token_cache = VerifiedTokenCache.from_env()
+        JWT_CACHE_SIZE.set_function(lambda: {(kind,): token_cache.stats()[kind] for kind in ("valid", "rejected")})
     return Middleware(
         LocalJWTAuthMiddleware,
-        discovery_url=discovery_url,
-        allowed_clients=allowed_clients,
+        key_store=key_store,
+        token_cache=token_cache,
     )
@@ -1,29 +1,242 @@
 """
-Runtime configuration: AWS session, environment detection.
+Runtime configuration: AWS session, environment detection and RuntimeConfig.
+
+RuntimeConfig is an immutable snapshot of the environment settings and the
+JSON files written by the setup scripts (.gateway-info.json,
+.cognito-info.json, .cognito-token.json). It is loaded once; a daemon thread
+stats the files every CONFIG_RELOAD_INTERVAL seconds and swaps in a new
+snapshot only when one of them changed (mtime or size). Request-path code
+reads get_runtime_config() and never touches the filesystem.
 """
 
+import json
 import os
 import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Mapping, Optional
+
+from runtime_metrics import CONFIG_RELOADS
 
-import boto3
+if TYPE_CHECKING:
+    import boto3
 
 logger = logging.getLogger(__name__)
 
-_boto_session: boto3.Session | None = None
+_boto_session: "boto3.Session | None" = None
+_boto_session_lock = threading.Lock()
 
 
-def get_aws_session() -> boto3.Session:
+def get_aws_session() -> "boto3.Session":
     """Get or create AWS boto3 session."""
     global _boto_session
 
     if _boto_session is None:
-        region = os.getenv("AWS_REGION", "us-east-1")
-        _boto_session = boto3.Session(region_name=region)
-        logger.info(f"AWS session created for region: {region}")
+        with _boto_session_lock:
+            if _boto_session is None:
+                # boto3 se importa en el primer uso (o en el warm-up), no al arrancar
+                import boto3
+
+                region = get_runtime_config().region
+                _boto_session = boto3.Session(region_name=region)
+                logger.info(f"AWS session created for region: {region}")
 
     return _boto_session
 
 
 def is_local_deployment() -> bool:
     """True when running locally; JWT validation happens via middleware."""
-    return os.getenv("JWT_LOCAL_VALIDATION", "false").lower() in ("true", "1", "yes")
+    return get_runtime_config().jwt_local_validation
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an int from the environment, falling back to default on bad values."""
+    raw = os.getenv(name)
+    if raw is None or raw.strip() == "":
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        logger.warning(f"Invalid value for {name}={raw!r}, using {default}")
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a float from the environment, falling back to default on bad values."""
+    raw = os.getenv(name)
+    if raw is None or raw.strip() == "":
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        logger.warning(f"Invalid value for {name}={raw!r}, using {default}")
+        return default
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    """Read a boolean flag (true/1/yes) from the environment."""
+    raw = os.getenv(name)
+    if raw is None or raw.strip() == "":
+        return default
+    return raw.strip().lower() in ("true", "1", "yes")
+
+
+GATEWAY_INFO_FILE = ".gateway-info.json"
+COGNITO_INFO_FILE = ".cognito-info.json"
+TOKEN_FILE = ".cognito-token.json"
+CONFIG_FILES = (GATEWAY_INFO_FILE, COGNITO_INFO_FILE, TOKEN_FILE)
+
+DEFAULT_MODEL_ID = "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
+
+# (mtime_ns, size) of a file, or None when it does not exist
+FileStamp = Optional[tuple[int, int]]
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+
+@dataclass(frozen=True)
+class RuntimeConfig:
+    """Environment settings plus the setup-script JSON files, read once."""
+
+    # AWS_REGION, else region of .gateway-info.json, else us-east-1
+    region: str
+    model_id: str
+    model_backend: str
+    jwt_local_validation: bool
+    # AGENTCORE_GATEWAY_URL, else gatewayUrl of .gateway-info.json
+    gateway_url: Optional[str]
+    gateway_info: Mapping[str, Any] = field(default_factory=lambda: _EMPTY)
+    cognito_info: Mapping[str, Any] = field(default_factory=lambda: _EMPTY)
+    token_file: Mapping[str, Any] = field(default_factory=lambda: _EMPTY)
+    # mtime of .cognito-token.json (tokens without exp expire relative to it)
+    token_file_mtime: Optional[float] = None
+    stamps: Mapping[str, FileStamp] = field(default_factory=lambda: _EMPTY)
+    loaded_at: float = field(default_factory=time.time)
+
+    @property
+    def discovery_url(self) -> Optional[str]:
+        return self.cognito_info.get("discoveryUrl")
+
+    @property
+    def allowed_clients(self) -> list[str]:
+        """Clients accepted by local JWT validation (clientId of .cognito-info.json)."""
+        client_id = self.cognito_info.get("clientId")
+        return [client_id] if client_id else []
+
+    def has_file(self, path: str) -> bool:
+        return self.stamps.get(path) is not None
+
+
+def _file_stamp(path: str) -> FileStamp:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_json(path: str, stamp: FileStamp) -> Optional[Mapping[str, Any]]:
+    """File contents (empty when missing), or None when it cannot be parsed."""
+    if stamp is None:
+        return _EMPTY
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read {path}: {e}")
+        return None
+    return MappingProxyType(data if isinstance(data, dict) else {})
+
+
+def load_runtime_config(previous: Optional[RuntimeConfig] = None) -> RuntimeConfig:
+    """Build a snapshot; files that fail to parse keep their previous contents."""
+    stamps = {path: _file_stamp(path) for path in CONFIG_FILES}
+    contents = {}
+    for path in CONFIG_FILES:
+        data = _read_json(path, stamps[path])
+        if data is None:
+            # Se conserva el contenido anterior; la siguiente escritura cambia el stamp y se relee
+            data = _previous_contents(previous, path)
+        contents[path] = data
+
+    gateway_info = contents[GATEWAY_INFO_FILE]
+    return RuntimeConfig(
+        region=os.getenv("AWS_REGION") or gateway_info.get("region") or "us-east-1",
+        model_id=os.getenv("BEDROCK_MODEL_ID", DEFAULT_MODEL_ID),
+        model_backend=os.getenv("MODEL_BACKEND", "bedrock").lower(),
+        jwt_local_validation=env_bool("JWT_LOCAL_VALIDATION"),
+        gateway_url=os.getenv("AGENTCORE_GATEWAY_URL") or gateway_info.get("gatewayUrl"),
+        gateway_info=gateway_info,
+        cognito_info=contents[COGNITO_INFO_FILE],
+        token_file=contents[TOKEN_FILE],
+        token_file_mtime=stamps[TOKEN_FILE][0] / 1e9 if stamps[TOKEN_FILE] else None,
+        stamps=MappingProxyType(stamps),
+    )
+
+
+def _previous_contents(previous: Optional[RuntimeConfig], path: str) -> Mapping[str, Any]:
+    if previous is None:
+        return _EMPTY
+    return {
+        GATEWAY_INFO_FILE: previous.gateway_info,
+        COGNITO_INFO_FILE: previous.cognito_info,
+        TOKEN_FILE: previous.token_file,
+    }[path]
+
+
+_runtime_config: Optional[RuntimeConfig] = None
+_runtime_config_lock = threading.Lock()
+_config_watcher: Optional[threading.Thread] = None
+
+
+def get_runtime_config() -> RuntimeConfig:
+    """Current configuration snapshot (loaded on first use, then watched)."""
+    global _runtime_config, _config_watcher
+
+    if _runtime_config is None:
+        with _runtime_config_lock:
+            if _runtime_config is None:
+                _runtime_config = load_runtime_config()
+                interval = env_float("CONFIG_RELOAD_INTERVAL", 5.0)
+                if interval > 0:
+                    _config_watcher = threading.Thread(
+                        target=_watch_config, args=(interval,), name="config-watcher", daemon=True
+                    )
+                    _config_watcher.start()
+
+    return _runtime_config
+
+
+def reload_runtime_config_if_changed() -> bool:
+    """Swap in a new snapshot when a config file changed; returns whether it did."""
+    global _runtime_config
+
+    current = get_runtime_config()
+    changed = [path for path in CONFIG_FILES if _file_stamp(path) != current.stamps.get(path)]
+    if not changed:
+        return False
+
+    # Import local: runtime_tracing depende de este módulo
+    from runtime_tracing import start_span
+
+    with _runtime_config_lock:
+        if all(_file_stamp(path) == _runtime_config.stamps.get(path) for path in changed):
+            return False
+        with start_span("config.reload", **{"config.changed": changed}):
+            fresh = load_runtime_config(previous=_runtime_config)
+        # Una sola asignación: los lectores ven el snapshot viejo o el nuevo
+        _runtime_config = fresh
+    CONFIG_RELOADS.inc()
+    logger.info(f"Runtime config reloaded (changed: {', '.join(changed)})")
+    return True
+
+
+def _watch_config(interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            reload_runtime_config_if_changed()
+        except Exception as e:
+            logger.warning(f"Config reload failed: {e}")
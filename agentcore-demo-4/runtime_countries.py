@@ -0,0 +1,75 @@
+"""
+Local countries engine for the Gateway GraphQL tool (COUNTRIES_LOCAL_ENGINE=true).
+
+The Gateway target only proxies GraphQL POSTs to countries.trevorblades.com,
+whose data is small and almost static. With the local engine enabled the
+agent keeps the Gateway tool spec (same name, schema and description, so the
+model sees no difference) but executes `executeGraphQLQuery` in-process
+against countries_graphql.CountriesEngine instead of calling the Gateway.
+"""
+
+import json
+import logging
+import time
+from typing import Any
+
+from strands.tools.mcp import MCPAgentTool
+from strands.types._events import ToolResultEvent
+from strands.types.tools import ToolGenerator, ToolUse
+
+from countries_graphql import get_countries_engine
+from runtime_config import env_bool
+
+logger = logging.getLogger(__name__)
+
+GRAPHQL_OPERATION = "executeGraphQLQuery"
+
+
+def local_engine_enabled() -> bool:
+    return env_bool("COUNTRIES_LOCAL_ENGINE")
+
+
+def is_graphql_tool(name: str) -> bool:
+    """Gateway tools are named <target>___<operationId>."""
+    return name == GRAPHQL_OPERATION or name.endswith(f"___{GRAPHQL_OPERATION}")
+
+
+class LocalGraphQLTool(MCPAgentTool):
+    """Gateway GraphQL tool answered by the in-process countries engine."""
+
+    async def stream(self, tool_use: ToolUse, invocation_state: dict[str, Any], **kwargs: Any) -> ToolGenerator:
+        arguments = tool_use.get("input") or {}
+        start = time.perf_counter()
+        # La primera llamada carga el dataset (fetch a la API): fuera del event loop
+        body = await get_countries_engine().execute_async(
+            arguments.get("query", ""),
+            arguments.get("variables"),
+            arguments.get("operationName"),
+        )
+        # Mismo formato que el Gateway: body HTTP del target como texto
+        text = json.dumps(body, ensure_ascii=False)
+        logger.info(
+            f"{self.tool_name} answered locally: {len(text)} bytes "
+            f"in {(time.perf_counter() - start) * 1000:.2f}ms"
+        )
+        yield ToolResultEvent(
+            {
+                "toolUseId": tool_use["toolUseId"],
+                "status": "error" if "errors" in body and not body.get("data") else "success",
+                "content": [{"text": text}],
+            }
+        )
+
+
+def with_local_engine(tools: list) -> list:
+    """Swap the Gateway GraphQL tool for LocalGraphQLTool when the engine is enabled."""
+    if not local_engine_enabled():
+        return tools
+    return [
+        LocalGraphQLTool(tool.mcp_tool, tool.mcp_client)
+        if isinstance(tool, MCPAgentTool)
+        and not isinstance(tool, LocalGraphQLTool)
+        and is_graphql_tool(tool.tool_name)
+        else tool
+        for tool in tools
+    ]
@@ -5,10 +5,20 @@ Agent handler: entrypoint logic for invocations.
 import logging
 import time
 from datetime import datetime
+from typing import AsyncIterator
 
-from runtime_agent import create_agent
-from runtime_metrics import find_graphql_queries, log_metrics, metrics
-from runtime_mcp import initialize_mcp_tools
+from runtime_config import env_float, get_runtime_config
+from runtime_logging import detail_level, log_event, log_scope, log_stage, structured_logging
+from runtime_metrics import (
+    ERRORS,
+    INVOCATIONS,
+    STAGE_LATENCY,
+    find_graphql_queries,
+    log_metrics,
+)
+from runtime_sessions import checkout_agent, checkout_agent_async
+from runtime_tool_calls import SESSION_ID_KEY, TOOL_CALLS_KEY, ToolCallRecord
+from runtime_tracing import add_span_event, annotate, record_error, start_span, trace_log_fields
 
 logger = logging.getLogger(__name__)
 
@@ -22,175 +32,433 @@ def agent_handler_impl(payload: dict) -> dict:
     request_id = payload.get("requestId", "unknown")
     session_id = payload.get("sessionId", "unknown")
 
-    metrics["invocations"] += 1
+    INVOCATIONS.inc(mode="sync")
 
-    try:
-        user_input = payload.get("prompt", "")
+    with _invocation_span(request_id, session_id, "sync"):
+        with log_scope(request_id=request_id, session_id=session_id, mode="sync", **trace_log_fields()):
+            return _run_sync(payload, request_id, session_id, invocation_start_time)
 
-        logger.info("=" * 80)
-        logger.info("AGENT INVOCATION START")
-        logger.info(f"Request ID: {request_id}")
-        logger.info(f"Session ID: {session_id}")
-        logger.info(f"User Input: {user_input}")
-        logger.info(f"Timestamp: {datetime.utcnow().isoformat()}Z")
-        logger.info("=" * 80)
 
+def _run_sync(payload: dict, request_id: str, session_id: str, invocation_start_time: float) -> dict:
+    try:
+        user_input = _start_invocation(payload, request_id, session_id)
         if not user_input:
-            metrics["errors"] += 1
-            logger.warning("Empty prompt received")
             return {"response": ["Error: No prompt provided"]}
 
-        agent_init_time = 0.0
-        agent_call_time = 0.0
-        response = None
-        messages_before: list = []
-        tools_used_list: list[str] = []
-
         agent_init_start = time.time()
-        with initialize_mcp_tools() as tools:
-            agent = create_agent(tools)
+        with checkout_agent(session_id) as agent:
             agent_init_time = time.time() - agent_init_start
-            logger.info(f"Agent initialization time: {agent_init_time:.3f}s")
+            _log_stage("agent_init", agent_init_time, "Agent initialization time: %.3fs")
+
+            tool_calls: list[ToolCallRecord] = []
+            agent_call_start = time.time()
+            logger.log(detail_level(), "Calling agent with user input...")
+            response = agent(
+                user_input, invocation_state={TOOL_CALLS_KEY: tool_calls, SESSION_ID_KEY: session_id}
+            )
+            agent_call_time = time.time() - agent_call_start
+            _log_stage("agent_call", agent_call_time, "Agent call completed in %.3fs")
+
+        return _finish_invocation(
+            response,
+            tool_calls,
+            request_id,
+            invocation_start_time,
+            agent_init_time,
+            agent_call_time,
+        )
+
+    except Exception as e:
+        return _error_response(e, request_id, invocation_start_time)
+    finally:
+        _maybe_log_metrics()
+
+
+async def agent_handler_async_impl(payload: dict) -> dict:
+    """
+    Async variant of agent_handler_impl.
+
+    The agent loop runs with invoke_async and MCP tool calls are awaited on
+    the session's event loop, so no worker thread is held while waiting.
+    """
+    invocation_start_time = time.time()
+    request_id = payload.get("requestId", "unknown")
+    session_id = payload.get("sessionId", "unknown")
 
-            try:
-                if hasattr(agent, "messages"):
-                    messages_before = list(agent.messages) if agent.messages else []
-                    logger.debug(f"Messages before agent call: {len(messages_before)}")
-            except Exception as e:
-                logger.debug(f"Could not access messages before: {e}")
+    INVOCATIONS.inc(mode="async")
 
+    with _invocation_span(request_id, session_id, "async"):
+        with log_scope(request_id=request_id, session_id=session_id, mode="async", **trace_log_fields()):
+            return await _run_async(payload, request_id, session_id, invocation_start_time)
+
+
+async def _run_async(payload: dict, request_id: str, session_id: str, invocation_start_time: float) -> dict:
+    try:
+        user_input = _start_invocation(payload, request_id, session_id)
+        if not user_input:
+            return {"response": ["Error: No prompt provided"]}
+
+        agent_init_start = time.time()
+        async with checkout_agent_async(session_id) as agent:
+            agent_init_time = time.time() - agent_init_start
+            _log_stage("agent_init", agent_init_time, "Agent initialization time: %.3fs")
+
+            tool_calls: list[ToolCallRecord] = []
             agent_call_start = time.time()
-            logger.info("Calling agent with user input...")
-            response = agent(user_input)
+            logger.log(detail_level(), "Calling agent with user input (async)...")
+            response = await agent.invoke_async(
+                user_input, invocation_state={TOOL_CALLS_KEY: tool_calls, SESSION_ID_KEY: session_id}
+            )
             agent_call_time = time.time() - agent_call_start
-            logger.info(f"Agent call completed in {agent_call_time:.3f}s")
-
-        if isinstance(response, str):
-            response_text = response
-        else:
-            response_text = str(response)
-
-        tools_used = False
-        tool_call_count = 0
-        graphql_queries: list[str] = []
-        try:
-            if hasattr(agent, "messages") and agent.messages:
-                messages_after = list(agent.messages) if agent.messages else []
-                message_count_diff = len(messages_after) - len(messages_before)
-
-                if message_count_diff > 0:
-                    tools_used = True
-                    tool_call_count = message_count_diff
-                    logger.info(
-                        f"Detected {tool_call_count} tool call(s) based on message count"
-                    )
-
-                for i, msg in enumerate(messages_after[len(messages_before) :], 1):
-                    msg_str = str(msg).lower()
-                    if any(
-                        indicator in msg_str
-                        for indicator in [
-                            "tool",
-                            "function_call",
-                            "tool_call",
-                            "mcp",
-                        ]
-                    ):
-                        tools_used = True
-                        if "executeGraphQLQuery" in str(msg):
-                            tools_used_list.append(
-                                "countries-graphql-target___executeGraphQLQuery"
-                            )
-                        logger.debug(
-                            f"Tool usage detected in message {i}: {msg_str[:100]}"
-                        )
-
-                for msg in messages_after[len(messages_before) :]:
-                    graphql_queries.extend(find_graphql_queries(msg))
-        except Exception as e:
-            logger.debug(f"Could not analyze messages for tool usage: {e}")
-            response_lower = response_text.lower()
-            if any(
-                indicator in response_lower
-                for indicator in [
-                    '{"code"',
-                    '"name"',
-                    '"capital"',
-                    '"currency"',
-                    "graphql",
-                ]
+            _log_stage("agent_call", agent_call_time, "Agent call completed in %.3fs")
+
+        return _finish_invocation(
+            response,
+            tool_calls,
+            request_id,
+            invocation_start_time,
+            agent_init_time,
+            agent_call_time,
+        )
+
+    except Exception as e:
+        return _error_response(e, request_id, invocation_start_time)
+    finally:
+        _maybe_log_metrics()
+
+
+async def agent_handler_stream_impl(payload: dict) -> AsyncIterator[dict]:
+    """
+    Streaming variant: yields events while the agent loop runs.
+
+    Events (serialized as SSE `data:` lines by the runtime):
+    - {"event": "text", "data": ...}: model text deltas, coalesced every
+      STREAM_FLUSH_MS milliseconds (0 = one event per delta)
+    - {"event": "tool_start" | "tool_end", "toolUseId": ..., "name": ...}
+    - {"event": "done", "response": ...} or {"event": "error", "error": ...}
+    """
+    invocation_start_time = time.time()
+    request_id = payload.get("requestId", "unknown")
+    session_id = payload.get("sessionId", "unknown")
+    flush_interval = env_float("STREAM_FLUSH_MS", 0.0) / 1000.0
+
+    INVOCATIONS.inc(mode="stream")
+
+    with _invocation_span(request_id, session_id, "stream"):
+        with log_scope(request_id=request_id, session_id=session_id, mode="stream", **trace_log_fields()):
+            async for event in _run_stream(payload, request_id, session_id, invocation_start_time, flush_interval):
+                yield event
+
+
+async def _run_stream(
+    payload: dict, request_id: str, session_id: str, invocation_start_time: float, flush_interval: float
+) -> AsyncIterator[dict]:
+    try:
+        user_input = _start_invocation(payload, request_id, session_id)
+        if not user_input:
+            yield {"event": "error", "error": "Error: No prompt provided"}
+            return
+
+        agent_init_start = time.time()
+        async with checkout_agent_async(session_id) as agent:
+            agent_init_time = time.time() - agent_init_start
+            _log_stage("agent_init", agent_init_time, "Agent initialization time: %.3fs")
+
+            tool_calls: list[ToolCallRecord] = []
+            agent_call_start = time.time()
+            logger.log(detail_level(), "Streaming agent response...")
+            response = None
+            first_token = True
+            pending: list[str] = []
+            last_flush = time.monotonic()
+            tool_starts: dict[str, tuple[str, float]] = {}
+
+            async for event in agent.stream_async(
+                user_input, invocation_state={TOOL_CALLS_KEY: tool_calls, SESSION_ID_KEY: session_id}
             ):
-                tools_used = True
-                tools_used_list.append("countries-graphql-target (detected from response)")
-                logger.info("Tool usage detected from response content")
+                text = event.get("data")
+                if isinstance(text, str):
+                    if first_token:
+                        first_token = False
+                        ttft = time.time() - invocation_start_time
+                        STAGE_LATENCY.observe(ttft, stage="time_to_first_token")
+                        _log_stage("time_to_first_token", ttft, "Time to first token: %.3fs")
+                        add_span_event("first_token", ttft_ms=round(ttft * 1000, 1))
+                    pending.append(text)
+                    now = time.monotonic()
+                    if now - last_flush >= flush_interval:
+                        yield {"event": "text", "data": "".join(pending)}
+                        pending.clear()
+                        last_flush = now
+                elif "message" in event:
+                    tool_events = _tool_events(event["message"], tool_starts)
+                    if tool_events and pending:
+                        yield {"event": "text", "data": "".join(pending)}
+                        pending.clear()
+                    for tool_event in tool_events:
+                        yield tool_event
+                elif "result" in event:
+                    response = event["result"]
+
+            if pending:
+                yield {"event": "text", "data": "".join(pending)}
+
+            agent_call_time = time.time() - agent_call_start
+            _log_stage("agent_call", agent_call_time, "Agent stream completed in %.3fs")
+
+        result = _finish_invocation(
+            response,
+            tool_calls,
+            request_id,
+            invocation_start_time,
+            agent_init_time,
+            agent_call_time,
+        )
+        yield {"event": "done", "response": result["response"][0]}
+
+    except Exception as e:
+        result = _error_response(e, request_id, invocation_start_time)
+        yield {"event": "error", "error": result["response"][0]}
+    finally:
+        _maybe_log_metrics()
+
+
+def _invocation_span(request_id: str, session_id: str, mode: str):
+    """Span of one invocation, tagged with the config snapshot that serves it."""
+    config = get_runtime_config()
+    return start_span(
+        "agent.invocation",
+        **{
+            "agentcore.request_id": request_id,
+            "agentcore.session_id": session_id,
+            "agentcore.mode": mode,
+            "config.model_id": config.model_id,
+            "config.model_backend": config.model_backend,
+            "config.snapshot_age_s": round(time.time() - config.loaded_at, 1),
+        },
+    )
+
+
+def _tool_events(message: dict, tool_starts: dict[str, tuple[str, float]]) -> list[dict]:
+    """tool_start events for toolUse blocks, tool_end events for toolResult blocks."""
+    events: list[dict] = []
+    for block in message.get("content", []):
+        if "toolUse" in block:
+            tool_use = block["toolUse"]
+            tool_starts[tool_use["toolUseId"]] = (tool_use["name"], time.time())
+            events.append(
+                {
+                    "event": "tool_start",
+                    "toolUseId": tool_use["toolUseId"],
+                    "name": tool_use["name"],
+                }
+            )
+        elif "toolResult" in block:
+            tool_result = block["toolResult"]
+            name, started = tool_starts.pop(
+                tool_result["toolUseId"], ("unknown", time.time())
+            )
+            events.append(
+                {
+                    "event": "tool_end",
+                    "toolUseId": tool_result["toolUseId"],
+                    "name": name,
+                    "status": tool_result.get("status", "success"),
+                    "durationMs": round((time.time() - started) * 1000),
+                }
+            )
+    return events
+
+
+def _log_stage(stage: str, seconds: float, message: str) -> None:
+    """Stage event in JSON mode, the classic text line otherwise."""
+    if structured_logging():
+        log_stage(logger, stage, seconds)
+    else:
+        logger.info(message, seconds, stacklevel=2)
+
+
+def _maybe_log_metrics() -> None:
+    # Resumen en el log cada 10 invocaciones; /metrics expone el detalle
+    if INVOCATIONS.total() % 10 == 0:
+        log_metrics()
+
+
+def _start_invocation(payload: dict, request_id: str, session_id: str) -> str:
+    """Log the invocation start and return the prompt ("" when missing)."""
+    user_input = payload.get("prompt", "")
 
+    if structured_logging():
+        # Sin el prompt: el registro JSON solo lleva su tamaño
+        log_event(logger, "invocation_start", logging.DEBUG, prompt_chars=len(user_input))
+    else:
+        logger.info("=" * 80)
+        logger.info("AGENT INVOCATION START")
+        logger.info("Request ID: %s", request_id)
+        logger.info("Session ID: %s", session_id)
+        logger.info("User Input: %s", user_input)
+        logger.info("Timestamp: %sZ", datetime.utcnow().isoformat())
+        logger.info("=" * 80)
+
+    if not user_input:
+        ERRORS.inc(kind="validation", type="EmptyPrompt")
+        logger.warning("Empty prompt received")
+
+    return user_input
+
+
+def _finish_invocation(
+    response,
+    tool_calls: list[ToolCallRecord],
+    request_id: str,
+    invocation_start_time: float,
+    agent_init_time: float,
+    agent_call_time: float,
+) -> dict:
+    """Build the entrypoint response inside the `response` span."""
+    with start_span("response", **{"response.tool_calls": len(tool_calls)}):
+        return _build_response(
+            response, tool_calls, request_id, invocation_start_time, agent_init_time, agent_call_time
+        )
+
+
+def _build_response(
+    response,
+    tool_calls: list[ToolCallRecord],
+    request_id: str,
+    invocation_start_time: float,
+    agent_init_time: float,
+    agent_call_time: float,
+) -> dict:
+    """Log tool usage, record metrics and build the entrypoint response."""
+    if isinstance(response, str):
+        response_text = response
+    else:
+        response_text = str(response)
+
+    tools_used = bool(tool_calls)
+    graphql_queries: list[str] = []
+    for call in tool_calls:
+        graphql_queries.extend(find_graphql_queries(call.arguments))
+
+    total_time = time.time() - invocation_start_time
+    STAGE_LATENCY.observe(agent_init_time, stage="agent_init")
+    STAGE_LATENCY.observe(total_time, stage="total")
+
+    if structured_logging():
         if graphql_queries:
-            seen = set()
-            unique_queries = []
-            for q in graphql_queries:
-                if q not in seen:
-                    seen.add(q)
-                    unique_queries.append(q)
-            logger.info("=" * 80)
-            logger.info("GRAPHQL QUERIES USED")
-            logger.info("=" * 80)
-            for q in unique_queries[:5]:
-                logger.info(q)
-            logger.info("=" * 80)
-
-        if tools_used:
-            metrics["tool_calls"] += tool_call_count if tool_call_count > 0 else 1
-
-        total_time = time.time() - invocation_start_time
-        metrics["total_response_time"] += total_time
+            log_event(logger, "graphql_queries", logging.DEBUG, queries=list(dict.fromkeys(graphql_queries))[:5])
+        log_event(
+            logger,
+            "invocation",
+            status="ok",
+            total_ms=round(total_time * 1000, 1),
+            agent_init_ms=round(agent_init_time * 1000, 1),
+            agent_call_ms=round(agent_call_time * 1000, 1),
+            tool_calls=len(tool_calls),
+            tool_errors=sum(1 for call in tool_calls if call.status != "success"),
+            graphql_queries=len(graphql_queries),
+            response_chars=len(response_text),
+        )
+    else:
+        _log_invocation_text(
+            response_text, tool_calls, graphql_queries, request_id, total_time, agent_init_time, agent_call_time
+        )
 
+    annotate(**{"response.chars": len(response_text)})
+    if tools_used:
+        final_response = f"[Model response using tool data] {response_text}"
+    else:
+        final_response = f"[Model response] {response_text}"
+
+    return {"response": [final_response]}
+
+
+def _log_invocation_text(
+    response_text: str,
+    tool_calls: list[ToolCallRecord],
+    graphql_queries: list[str],
+    request_id: str,
+    total_time: float,
+    agent_init_time: float,
+    agent_call_time: float,
+) -> None:
+    if graphql_queries:
+        unique_queries = list(dict.fromkeys(graphql_queries))
         logger.info("=" * 80)
-        logger.info("AGENT INVOCATION COMPLETE")
-        logger.info(f"Request ID: {request_id}")
-        logger.info(f"Total Time: {total_time:.3f}s")
-        logger.info(f"Agent Init Time: {agent_init_time:.3f}s")
-        logger.info(f"Agent Call Time: {agent_call_time:.3f}s")
-        logger.info(f"Tools Used: {tools_used}")
-        if tools_used_list:
-            logger.info(f"Tools Called: {', '.join(tools_used_list)}")
-        logger.info(f"Response Length: {len(response_text)} chars")
-        logger.info(f"Response Preview: {response_text[:200]}...")
+        logger.info("GRAPHQL QUERIES USED")
         logger.info("=" * 80)
+        for q in unique_queries[:5]:
+            logger.info(q)
+        logger.info("=" * 80)
+
+    logger.info("=" * 80)
+    logger.info("AGENT INVOCATION COMPLETE")
+    logger.info("Request ID: %s", request_id)
+    logger.info("Total Time: %.3fs", total_time)
+    logger.info("Agent Init Time: %.3fs", agent_init_time)
+    logger.info("Agent Call Time: %.3fs", agent_call_time)
+    logger.info("Tools Used: %s", bool(tool_calls))
+    for call in tool_calls:
+        logger.info(
+            "Tool Call: %s (%.3fs, %d bytes, status=%s)%s",
+            call.name,
+            call.duration,
+            call.result_bytes,
+            call.status,
+            f" error={call.error}" if call.error else "",
+        )
+        logger.debug("Tool Arguments: %s", call.arguments)
+    logger.info("Response Length: %d chars", len(response_text))
+    logger.info("Response Preview: %.200s...", response_text)
+    logger.info("=" * 80)
+
 
-        if tools_used:
-            final_response = f"[Model response using tool data] {response_text}"
-        else:
-            final_response = f"[Model response] {response_text}"
+def _error_response(e: Exception, request_id: str, invocation_start_time: float) -> dict:
+    """Log an invocation failure and build the error response."""
+    total_time = time.time() - invocation_start_time
+    record_error(e)
+    ERRORS.inc(
+        kind="runtime" if isinstance(e, RuntimeError) else "unexpected",
+        type=type(e.__cause__ or e).__name__,
+    )
 
-        return {"response": [final_response]}
+    if structured_logging():
+        log_event(
+            logger,
+            "invocation",
+            logging.ERROR,
+            exc_info=e,
+            status="error",
+            error_kind="runtime" if isinstance(e, RuntimeError) else "unexpected",
+            error_type=type(e).__name__,
+            error=str(e),
+            total_ms=round(total_time * 1000, 1),
+        )
+        if isinstance(e, RuntimeError):
+            return {"response": [f"Error: {e}"]}
+        return {"response": [f"Unexpected error: {e}"]}
 
-    except RuntimeError as e:
+    if isinstance(e, RuntimeError):
         error_msg = str(e)
-        metrics["errors"] += 1
-        total_time = time.time() - invocation_start_time
 
         logger.error("=" * 80)
         logger.error("RUNTIME ERROR")
-        logger.error(f"Request ID: {request_id}")
-        logger.error(f"Error: {error_msg}")
-        logger.error(f"Time to Error: {total_time:.3f}s")
-        logger.error("=" * 80, exc_info=True)
+        logger.error("Request ID: %s", request_id)
+        logger.error("Error: %s", error_msg)
+        logger.error("Time to Error: %.3fs", total_time)
+        logger.error("=" * 80, exc_info=e)
 
         return {"response": [f"Error: {error_msg}"]}
-    except Exception as e:
-        error_msg = f"Unexpected error: {str(e)}"
-        metrics["errors"] += 1
-        total_time = time.time() - invocation_start_time
 
-        logger.error("=" * 80)
-        logger.error("UNEXPECTED ERROR")
-        logger.error(f"Request ID: {request_id}")
-        logger.error(f"Error Type: {type(e).__name__}")
-        logger.error(f"Error: {error_msg}")
-        logger.error(f"Time to Error: {total_time:.3f}s")
-        logger.error("=" * 80, exc_info=True)
-
-        return {"response": [error_msg]}
-    finally:
-        if metrics["invocations"] % 10 == 0:
-            log_metrics()
+    error_msg = f"Unexpected error: {str(e)}"
+
+    logger.error("=" * 80)
+    logger.error("UNEXPECTED ERROR")
+    logger.error("Request ID: %s", request_id)
+    logger.error("Error Type: %s", type(e).__name__)
+    logger.error("Error: %s", error_msg)
+    logger.error("Time to Error: %.3fs", total_time)
+    logger.error("=" * 80, exc_info=e)
+
+    return {"response": [error_msg]}
@@ -0,0 +1,229 @@
+"""
+Shared HTTP layer for Gateway traffic: one keep-alive connection pool per process.
+
+MCP opens an httpx.AsyncClient per transport, each on the background event loop
+of its MCPClient. httpx connections are bound to the loop that created them, so
+instead of one pool per client every request is forwarded to a dedicated I/O
+loop that owns a single HTTP/2-capable connection pool. Clients stay cheap
+(headers, timeout, auth) and TCP/TLS handshakes are amortized across sessions.
+"""
+
+import asyncio
+import atexit
+import importlib.util
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+
+from runtime_config import env_bool, env_float, env_int
+from runtime_metrics import (
+    GATEWAY_HTTP2_REQUESTS,
+    GATEWAY_HTTP_CONNECTIONS,
+    GATEWAY_HTTP_REQUESTS,
+    GATEWAY_HTTP_TLS_HANDSHAKES,
+)
+
+logger = logging.getLogger(__name__)
+
+_EOF = object()
+
+
+class GatewayBearerAuth(httpx.Auth):
+    """Sets the Authorization header per request from a token provider.
+
+    Runs on the MCP client's event loop, so token_provider must be a
+    non-blocking cache read. On a 401, on_unauthorized receives the rejected
+    token; it must not block either (e.g. ServiceTokenManager.invalidate).
+    """
+
+    def __init__(
+        self,
+        token_provider: Callable[[], Optional[str]],
+        on_unauthorized: Optional[Callable[[str], None]] = None,
+    ):
+        self._token_provider = token_provider
+        self._on_unauthorized = on_unauthorized
+
+    def auth_flow(self, request: httpx.Request):
+        token = self._token_provider()
+        if token:
+            request.headers["Authorization"] = f"Bearer {token}"
+        response = yield request
+        if response.status_code == 401 and token and self._on_unauthorized is not None:
+            self._on_unauthorized(token)
+
+
+class _LoopBoundStream(httpx.AsyncByteStream):
+    """Response body whose reads run on the I/O loop that owns the connection."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, transport: "SharedGatewayTransport"):
+        self._stream = stream
+        self._transport = transport
+
+    async def __aiter__(self):
+        iterator = self._stream.__aiter__()
+        while True:
+            chunk = await self._transport._call(_next_chunk(iterator))
+            if chunk is _EOF:
+                break
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self._transport._call(self._stream.aclose())
+
+
+async def _next_chunk(iterator) -> Any:
+    try:
+        return await iterator.__anext__()
+    except StopAsyncIteration:
+        return _EOF
+
+
+class SharedGatewayTransport(httpx.AsyncBaseTransport):
+    """Process-wide transport; closing a client does not close the pool."""
+
+    def __init__(
+        self,
+        http2: bool = True,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 120.0,
+    ):
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requested but 'h2' is not installed; using HTTP/1.1")
+            http2 = False
+
+        self.http2 = http2
+        self._inner = httpx.AsyncHTTPTransport(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @classmethod
+    def from_env(cls) -> "SharedGatewayTransport":
+        """Build a transport configured from GATEWAY_HTTP_* environment variables."""
+        return cls(
+            http2=env_bool("GATEWAY_HTTP2", True),
+            max_connections=env_int("GATEWAY_HTTP_MAX_CONNECTIONS", 100),
+            max_keepalive_connections=env_int("GATEWAY_HTTP_MAX_KEEPALIVE", 20),
+            keepalive_expiry=env_float("GATEWAY_HTTP_KEEPALIVE_EXPIRY", 120.0),
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        loop = self._ensure_loop()
+        try:
+            on_io_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            on_io_loop = False
+        if on_io_loop:
+            return await self._send(request)
+
+        response = await self._call(self._send(request))
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_LoopBoundStream(response.stream, self),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        # Shared by every client; closed once at process exit
+        pass
+
+    def shutdown(self) -> None:
+        """Close pooled connections and stop the I/O loop."""
+        self._closed = True
+        loop = self._loop
+        if loop is None or not loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._inner.aclose(), loop).result(timeout=5)
+        except Exception as e:
+            logger.debug(f"Error while closing Gateway connection pool: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+
+    async def _send(self, request: httpx.Request) -> httpx.Response:
+        request.extensions = {**request.extensions, "trace": self._trace}
+        GATEWAY_HTTP_REQUESTS.inc()
+        return await self._inner.handle_async_request(request)
+
+    async def _call(self, coro: Awaitable) -> Any:
+        if self._closed:
+            coro.close()
+            raise httpx.TransportError("Gateway connection pool is shut down")
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        return await asyncio.wrap_future(future)
+
+    @staticmethod
+    async def _trace(event: str, info: dict) -> None:
+        # httpcore trace events, e.g. "connection.connect_tcp.complete"
+        if event == "connection.connect_tcp.complete":
+            GATEWAY_HTTP_CONNECTIONS.inc()
+        elif event == "connection.start_tls.complete":
+            GATEWAY_HTTP_TLS_HANDSHAKES.inc()
+        elif event == "http2.send_request_headers.started":
+            GATEWAY_HTTP2_REQUESTS.inc()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is not None:
+            return self._loop
+
+        with self._lock:
+            if self._loop is None:
+                ready = threading.Event()
+                loop = asyncio.new_event_loop()
+
+                def run() -> None:
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=run, name="gateway-http-io", daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+                logger.info(f"Gateway HTTP pool started (http2={self.http2})")
+
+        return self._loop
+
+
+_transport: Optional[SharedGatewayTransport] = None
+_transport_lock = threading.Lock()
+
+
+def get_gateway_transport() -> SharedGatewayTransport:
+    """Get or create the process-wide Gateway transport."""
+    global _transport
+
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = SharedGatewayTransport.from_env()
+                atexit.register(_transport.shutdown)
+
+    return _transport
+
+
+def create_gateway_httpx_client(
+    token_provider: Callable[[], Optional[str]],
+    headers: Optional[dict] = None,
+    timeout: Optional[httpx.Timeout] = None,
+    on_unauthorized: Optional[Callable[[str], None]] = None,
+) -> httpx.AsyncClient:
+    """AsyncClient for Gateway calls backed by the shared connection pool."""
+    return httpx.AsyncClient(
+        transport=get_gateway_transport(),
+        headers=headers,
+        timeout=timeout if timeout is not None else httpx.Timeout(60.0),
+        auth=GatewayBearerAuth(token_provider, on_unauthorized),
+    )
@@ -0,0 +1,242 @@
+"""
+Logging setup: text or JSON lines, formatted and written by a background thread.
+
+configure_logging() installs a queue handler on the root logger. The calling
+thread only builds the LogRecord and enqueues it; a QueueListener thread
+formats it and writes it to stderr. Unlike logging.handlers.QueueHandler, the
+message is not formatted before enqueueing, so %-style arguments are rendered
+only for records that are actually written.
+
+LOG_FORMAT=json writes one JSON object per line. The handler then replaces its
+banners with one compact `invocation` record per request and per-stage events
+(log_event), tagged with the request and session ids of the current
+invocation (log_context). LOG_SAMPLE_<LEVEL> keeps a fraction of the records
+of that level; records of one invocation are kept or dropped together.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Iterator, Mapping, Optional
+
+from runtime_config import env_bool, env_float, env_int
+from runtime_metrics import LOG_RECORDS_DROPPED
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(funcName)s:%(lineno)d] - %(message)s"
+TEXT_DATEFMT = "%Y-%m-%d %H:%M:%S"
+
+# request_id / session_id of the invocation running in this context
+log_context: contextvars.ContextVar[Optional[Mapping[str, Any]]] = contextvars.ContextVar(
+    "log_context", default=None
+)
+
+_SRCFILE = logging._srcfile
+
+_structured = False
+_listener: Optional["QueueWriter"] = None
+
+
+def structured_logging() -> bool:
+    """True when LOG_FORMAT=json is configured."""
+    return _structured
+
+
+def detail_level() -> int:
+    """Level for per-request detail lines: INFO in text mode, DEBUG in JSON mode.
+
+    In JSON mode the invocation record and stage events carry the same data.
+    """
+    return logging.DEBUG if _structured else logging.INFO
+
+
+def log_event(
+    logger: logging.Logger, event: str, level: int = logging.INFO, exc_info: Any = None, **fields: Any
+) -> None:
+    """Emit a structured event; the fields are serialized by the writer thread."""
+    if logger.isEnabledFor(level):
+        logger.log(level, event, exc_info=exc_info, extra={"event": event, "fields": fields})
+
+
+def log_stage(logger: logging.Logger, stage: str, seconds: float, **fields: Any) -> None:
+    """Per-stage event (INFO in JSON mode, DEBUG in text mode)."""
+    level = logging.INFO if _structured else logging.DEBUG
+    log_event(logger, "stage", level, stage=stage, ms=round(seconds * 1000, 1), **fields)
+
+
+@contextmanager
+def log_scope(**fields: Any) -> Iterator[None]:
+    """Tag the records logged inside the block (and its tasks) with fields."""
+    token = log_context.set(fields)
+    try:
+        yield
+    finally:
+        try:
+            log_context.reset(token)
+        except ValueError:
+            # Generador async reanudado en otro contexto: el contexto se descarta igual
+            pass
+
+
+class JsonFormatter(logging.Formatter):
+    """One compact JSON object per record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        event = getattr(record, "event", None)
+        if event is not None:
+            data["event"] = event
+        else:
+            data["msg"] = record.getMessage()
+        context = getattr(record, "context", None)
+        if context:
+            data.update(context)
+        fields = getattr(record, "fields", None)
+        if fields:
+            data.update(fields)
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str, separators=(",", ":"))
+
+
+class TextFormatter(logging.Formatter):
+    """The classic text line; structured events render as `event key=value ...`."""
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", None)
+        if fields:
+            record.message = f"{record.message} " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return super().formatMessage(record)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of the records of each level (LOG_SAMPLE_<LEVEL>)."""
+
+    def __init__(self, rates: Mapping[int, float]):
+        super().__init__()
+        self._rates = dict(rates)
+
+    @classmethod
+    def from_env(cls) -> "SamplingFilter":
+        rates = {}
+        for name in ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"):
+            rate = env_float(f"LOG_SAMPLE_{name}", 1.0)
+            if rate < 1.0:
+                rates[logging.getLevelName(name)] = max(0.0, rate)
+        return cls(rates)
+
+    @property
+    def active(self) -> bool:
+        return bool(self._rates)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self._rates.get(record.levelno)
+        if rate is None:
+            return True
+        context = log_context.get()
+        request_id = context.get("request_id") if context else None
+        if request_id:
+            # Mismo resultado para todos los registros de una invocación
+            sample = zlib.crc32(str(request_id).encode("utf-8")) / 0xFFFFFFFF
+        else:
+            sample = random.random()
+        if sample < rate:
+            return True
+        LOG_RECORDS_DROPPED.inc(level=record.levelname, reason="sampled")
+        return False
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # In-process queue: the record is not pickled, msg/args stay unformatted
+        context = log_context.get()
+        if context:
+            record.context = context
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc(level=record.levelname, reason="queue_full")
+
+
+class QueueWriter(logging.handlers.QueueListener):
+    """QueueListener whose stop() waits for room in a full queue."""
+
+    def enqueue_sentinel(self) -> None:
+        # put_nowait (stdlib) fallaría con la cola llena y no se vaciaría al salir
+        self.queue.put(self._sentinel)
+
+
+def configure_logging(
+    log_format: Optional[str] = None,
+    level: Optional[str] = None,
+    use_queue: Optional[bool] = None,
+    stream=None,
+) -> None:
+    """Configure the root logger from LOG_FORMAT, LOG_LEVEL and LOG_QUEUE (replaces basicConfig)."""
+    global _structured, _listener
+
+    log_format = (log_format or os.getenv("LOG_FORMAT", "text")).lower()
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    use_queue = env_bool("LOG_QUEUE", True) if use_queue is None else use_queue
+    _structured = log_format == "json"
+
+    if _structured:
+        # Los campos de origen (función, línea, proceso) no se escriben en JSON:
+        # evitar recorrer el stack al crear cada registro
+        logging._srcfile = None
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        logging._srcfile = _SRCFILE
+        formatter = TextFormatter(TEXT_FORMAT, datefmt=TEXT_DATEFMT)
+
+    writer = logging.StreamHandler(stream or sys.stderr)
+    writer.setFormatter(formatter)
+
+    root = logging.getLogger()
+    shutdown_logging()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+        existing.close()
+    root.setLevel(level)
+
+    if use_queue:
+        handler: logging.Handler = DeferredQueueHandler(queue.Queue(env_int("LOG_QUEUE_SIZE", 10000)))
+        _listener = QueueWriter(handler.queue, writer, respect_handler_level=True)
+        _listener.start()
+    else:
+        handler = writer
+    sampling = SamplingFilter.from_env()
+    if sampling.active:
+        handler.addFilter(sampling)
+    root.addHandler(handler)
+
+
+def shutdown_logging() -> None:
+    """Stop the writer thread after flushing the queued records."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -2,188 +2,107 @@
 MCP Gateway client: connection to AgentCore Gateway with JWT auth.
 """
 
-import base64
-import json
+import asyncio
+import atexit
+import hashlib
 import logging
 import os
 import time
-from contextlib import contextmanager
-from typing import Iterator, Optional
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
 
-import httpx
-import requests
 from mcp.client.streamable_http import streamablehttp_client
-from strands.tools.mcp import MCPClient
+from strands.tools.mcp import MCPAgentTool, MCPClient
+from strands.types._events import ToolResultEvent
+from strands.types.tools import ToolGenerator, ToolUse
 
 from runtime_auth import inbound_token
-from runtime_config import get_aws_session
-from runtime_metrics import metrics
+from runtime_config import env_bool, get_runtime_config
+from runtime_http import create_gateway_httpx_client
+from runtime_logging import detail_level
+from runtime_mcp_pool import McpSessionPool, PooledSession
+from runtime_metrics import (
+    MCP_POOL_SESSIONS,
+    TOOL_CACHE_SIZE,
+    TOOL_COALESCING,
+    TOOL_IN_FLIGHT,
+)
+from runtime_single_flight import SingleFlight, canonical_tool_key
+from runtime_token import get_token_manager
+from runtime_tool_cache import ToolResultCache, is_cacheable_result
+from runtime_tool_calls import SESSION_ID_KEY
+from runtime_tool_catalog import ToolCatalog
+from runtime_tracing import annotate, start_span
 
 logger = logging.getLogger(__name__)
 
-_mcp_client: Optional[MCPClient] = None
+TokenProvider = Callable[[], Optional[str]]
+UnauthorizedHandler = Optional[Callable[[str], None]]
 
+FALLBACK_GATEWAY_URL = "https://countries-gateway-fdvmwzb8ln.gateway.bedrock-agentcore.us-east-1.amazonaws.com/mcp"
 
-def create_gateway_mcp_client() -> MCPClient:
-    """Create MCP client connected to AgentCore Gateway via HTTP with JWT token auth."""
-    global _mcp_client
+_fallback_logged = False
+_session_pool: Optional[McpSessionPool] = None
+_tool_catalog: Optional[ToolCatalog] = None
+_tool_cache: Optional[ToolResultCache] = None
+_tool_calls_in_flight = SingleFlight()
+TOOL_IN_FLIGHT.set_function(lambda: {(): _tool_calls_in_flight.in_flight()})
 
-    if _mcp_client is not None:
-        return _mcp_client
 
-    try:
-        gateway_url = os.getenv("AGENTCORE_GATEWAY_URL")
-
-        if not gateway_url:
-            gateway_info_path = ".gateway-info.json"
-            if os.path.exists(gateway_info_path):
-                try:
-                    with open(gateway_info_path, "r") as f:
-                        gateway_info = json.load(f)
-                        gateway_url = gateway_info.get("gatewayUrl")
-                except Exception as e:
-                    logger.warning(f"No se pudo leer .gateway-info.json: {e}")
-
-        if not gateway_url:
-            gateway_url = "https://countries-gateway-fdvmwzb8ln.gateway.bedrock-agentcore.us-east-1.amazonaws.com/mcp"
-            logger.info("Usando URL del Gateway hardcodeada (fallback)")
-
-        if not gateway_url:
-            raise RuntimeError(
-                "No se pudo obtener la URL del Gateway. "
-                "Configura AGENTCORE_GATEWAY_URL o ejecuta './setup-gateway.sh'"
-            )
+def get_gateway_url() -> str:
+    """Gateway MCP URL from the runtime config (env, .gateway-info.json) or the fallback."""
+    global _fallback_logged
+
+    gateway_url = get_runtime_config().gateway_url
+    if gateway_url:
+        return gateway_url
+
+    if not _fallback_logged:
+        _fallback_logged = True
+        logger.info("Usando URL del Gateway hardcodeada (fallback)")
+    return FALLBACK_GATEWAY_URL
+
+
+def resolve_gateway_credentials() -> tuple[str, TokenProvider, str, UnauthorizedHandler]:
+    """Pool key, per-request token provider, token source and 401 handler for Gateway calls."""
+    # Inbound token (request): local middleware o AWS context (Authorization header)
+    req_token = inbound_token.get()
+    if req_token:
+        return _pool_key(req_token), lambda: req_token, "request (inbound)", None
+
+    # Fallback: token de servicio (archivo o Cognito). Lectura del caché sin bloquear;
+    # un 401 lo descarta y el hilo de fondo del manager obtiene otro
+    manager = get_token_manager()
+    return "service", lambda: manager.get_token()[0], "service (file/cognito)", manager.invalidate
 
-        session = get_aws_session()
-        region = session.region_name or "us-east-1"
+
+def create_gateway_mcp_client(
+    token_provider: TokenProvider, token_source: str, on_unauthorized: UnauthorizedHandler = None
+) -> MCPClient:
+    """Create MCP client connected to AgentCore Gateway via HTTP with JWT token auth."""
+    try:
+        gateway_url = get_gateway_url()
+        region = get_runtime_config().region
 
         def create_client():
             try:
                 logger.info(f"Creating streamablehttp_client for URL: {gateway_url}")
 
-                token = None
-                token_source = "none"
-
-                # Inbound token (request): local middleware o AWS context (Authorization header)
-                req_token = inbound_token.get()
-                if req_token:
-                    token = req_token
-                    token_source = "request (inbound)"
-
-                # Fallback: archivo o Cognito
-                token_file = ".cognito-token.json"
-                if not token and os.path.exists(token_file):
-                    try:
-                        with open(token_file, "r") as f:
-                            token_data = json.load(f)
-                            token = token_data.get("access_token")
-                            if token:
-                                token_length = len(token)
-                                token_preview = (
-                                    f"{token[:20]}...{token[-10:]}"
-                                    if token_length > 30
-                                    else token[:30]
-                                )
-                                logger.info(
-                                    f"JWT token loaded from .cognito-token.json (length: {token_length}, preview: {token_preview})"
-                                )
-                                token_source = "file"
-                    except Exception as e:
-                        logger.warning(f"Failed to read token from {token_file}: {e}")
-
-                if not token:
-                    try:
-                        cognito_info_file = ".cognito-info.json"
-                        if os.path.exists(cognito_info_file):
-                            with open(cognito_info_file, "r") as f:
-                                cognito_info = json.load(f)
-
-                            user_pool_id = cognito_info.get("userPoolId")
-                            client_id = cognito_info.get("clientId")
-                            client_secret = cognito_info.get("clientSecret")
-                            scope_string = cognito_info.get("scopeString", "")
-
-                            if user_pool_id and client_id:
-                                cognito_domain = cognito_info.get("cognitoDomain")
-                                if not cognito_domain:
-                                    domain_prefix = user_pool_id.replace("_", "-").lower()
-                                    cognito_domain = (
-                                        f"{domain_prefix}.auth.{region}.amazoncognito.com"
-                                    )
-
-                                token_url = f"https://{cognito_domain}/oauth2/token"
-
-                                auth_string = (
-                                    f"{client_id}:{client_secret}"
-                                    if client_secret
-                                    else client_id
-                                )
-                                auth_bytes = auth_string.encode("utf-8")
-                                auth_b64 = base64.b64encode(auth_bytes).decode("utf-8")
-
-                                headers = {
-                                    "Content-Type": "application/x-www-form-urlencoded",
-                                    "Authorization": f"Basic {auth_b64}",
-                                }
-
-                                data = {"grant_type": "client_credentials"}
-                                response = requests.post(
-                                    token_url, headers=headers, data=data, timeout=30
-                                )
-
-                                if response.status_code != 200 and scope_string:
-                                    data["scope"] = scope_string
-                                    response = requests.post(
-                                        token_url, headers=headers, data=data, timeout=30
-                                    )
-
-                                response.raise_for_status()
-                                token_data = response.json()
-                                token = token_data.get("access_token")
-
-                                if token:
-                                    metrics["token_refresh_count"] += 1
-                                    token_length = len(token)
-                                    token_preview = (
-                                        f"{token[:20]}...{token[-10:]}"
-                                        if token_length > 30
-                                        else token[:30]
-                                    )
-                                    logger.info(
-                                        f"JWT token obtained from Cognito (length: {token_length}, preview: {token_preview})"
-                                    )
-                                    logger.info(
-                                        f"Token refresh count: {metrics['token_refresh_count']}"
-                                    )
-                                    token_source = "cognito"
-                    except Exception as e:
-                        logger.warning(
-                            f"Failed to get token from Cognito: {str(e)}",
-                            exc_info=True,
-                        )
-
-                def create_httpx_client(*args, **kwargs):
-                    client_headers = kwargs.get("headers") or {}
-                    client_headers = dict(client_headers)
-                    timeout = kwargs.get("timeout", httpx.Timeout(60.0))
-
-                    if token:
-                        client_headers["Authorization"] = f"Bearer {token}"
-                        logger.info("✓ JWT token added to Authorization header")
-                        logger.debug(
-                            f"Authorization header: Bearer {token[:20]}...{token[-10:]}"
-                        )
-                    else:
-                        logger.warning(
-                            "⚠ No JWT token available - Gateway may reject the request"
-                        )
-                        logger.warning(
-                            "Run ./setup-gateway-jwt.sh to configure Gateway with CUSTOM_JWT"
-                        )
-
-                    return httpx.AsyncClient(
-                        headers=client_headers,
-                        timeout=timeout,
+                if token_provider():
+                    logger.info("✓ JWT token set per request in Authorization header")
+                else:
+                    logger.warning(
+                        "⚠ No JWT token available - Gateway may reject the request"
+                    )
+                    logger.warning(
+                        "Run ./setup-gateway-jwt.sh to configure Gateway with CUSTOM_JWT"
+                    )
+
+                def create_httpx_client(headers=None, timeout=None, auth=None):
+                    # Cheap client over the shared keep-alive pool; the token is
+                    # resolved per request so long-lived sessions follow refreshes
+                    return create_gateway_httpx_client(
+                        token_provider, headers=headers, timeout=timeout, on_unauthorized=on_unauthorized
                     )
 
                 client = streamablehttp_client(
@@ -211,7 +130,7 @@ def create_gateway_mcp_client() -> MCPClient:
                 raise
 
         try:
-            _mcp_client = MCPClient(create_client)
+            mcp_client = MCPClient(create_client)
             logger.info(f"MCP client created for AgentCore Gateway: {gateway_url}")
             logger.info(
                 "Note: Gateway should be configured with CUSTOM_JWT authentication for JWT token to work"
@@ -228,44 +147,276 @@ def create_gateway_mcp_client() -> MCPClient:
         logger.error(f"Failed to create Gateway MCP client: {str(e)}")
         raise RuntimeError(f"Gateway MCP connection failed - {str(e)}")
 
-    return _mcp_client
+    return mcp_client
+
+
+def get_session_pool() -> McpSessionPool:
+    """Get or create the process-wide MCP session pool."""
+    global _session_pool
+
+    if _session_pool is None:
+        _session_pool = McpSessionPool.from_env()
+        atexit.register(_session_pool.close)
+        MCP_POOL_SESSIONS.set_function(_pool_gauge_values)
+        logger.info(f"MCP session pool created: {_session_pool.stats()}")
+
+    return _session_pool
+
+
+def _pool_gauge_values() -> dict:
+    stats = _session_pool.stats() if _session_pool is not None else {}
+    return {(state,): stats.get(state, 0) for state in ("idle", "borrowed")}
+
+
+def get_tool_catalog() -> ToolCatalog:
+    """Get or create the process-wide MCP tool catalog cache."""
+    global _tool_catalog
+
+    if _tool_catalog is None:
+        _tool_catalog = ToolCatalog.from_env()
+
+    return _tool_catalog
+
+
+def get_tool_cache() -> ToolResultCache:
+    """Get or create the process-wide tool-result cache."""
+    global _tool_cache
+
+    if _tool_cache is None:
+        _tool_cache = ToolResultCache.from_env()
+        TOOL_CACHE_SIZE.set_function(_cache_gauge_values)
+
+    return _tool_cache
+
+
+def _cache_gauge_values() -> dict:
+    stats = _tool_cache.stats() if _tool_cache is not None else {}
+    return {("entries",): stats.get("entries", 0), ("bytes",): stats.get("bytes", 0)}
+
+
+def _pool_key(token: Optional[str]) -> str:
+    """Sessions for inbound tokens are only shared between requests with that token."""
+    if not token:
+        return "anonymous"
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+
+
+def gateway_credential_key() -> str:
+    """Credential key of the current request (pool partition / session owner)."""
+    return resolve_gateway_credentials()[0]
+
+
+def get_gateway_tools(client) -> list:
+    """Cached Gateway tool catalog bound to client."""
+    # Las credenciales se resuelven aquí: el refresco en segundo plano no ve el contexto del request
+    credentials = resolve_gateway_credentials()
+    return get_tool_catalog().get_tools(
+        get_gateway_url(), client, lease=lambda: _lease_pooled_client(credentials)
+    )
 
 
 @contextmanager
-def initialize_mcp_tools() -> Iterator[list]:
-    """Initialize MCP client and get tools per invocation."""
-    global _mcp_client
+def _lease_pooled_client(credentials: tuple) -> Iterator[MCPClient]:
+    """Borrow a pooled session with the given credentials (background catalog refresh)."""
+    session = _acquire_session(credentials)
+    failed = True
+    try:
+        yield session.client
+        failed = False
+    finally:
+        get_session_pool().release(session, failed=failed)
+
 
-    if _mcp_client is None:
-        _mcp_client = create_gateway_mcp_client()
+def _acquire_session(credentials: Optional[tuple] = None) -> PooledSession:
+    """Borrow a pooled session for the given credentials (default: the current request's)."""
+    pool_key, token_provider, token_source, on_unauthorized = credentials or resolve_gateway_credentials()
+
+    mcp_start_time = time.time()
+    # La URL forma parte de la clave: tras recargar .gateway-info.json no se
+    # reutilizan sesiones abiertas contra el Gateway anterior
+    with start_span("mcp.session.acquire", **{"mcp.token_source": token_source}):
+        session = get_session_pool().acquire(
+            f"{pool_key}@{get_gateway_url()}",
+            lambda: create_gateway_mcp_client(token_provider, token_source, on_unauthorized),
+        )
+    logger.log(detail_level(), "✓ MCP session acquired from pool (%.3fs)", time.time() - mcp_start_time)
+    return session
+
+
+def _acquire_tools() -> tuple[PooledSession, list]:
+    """Borrow a pooled session and bind the cached tool catalog to it."""
+    session = _acquire_session()
 
     try:
-        mcp_start_time = time.time()
-        logger.info("Entering MCP client context (per-invocation)...")
-        with _mcp_client:
-            mcp_connection_time = time.time() - mcp_start_time
-            metrics["mcp_connection_time"] = mcp_connection_time
-            logger.info(
-                f"✓ MCP client context entered successfully ({mcp_connection_time:.3f}s)"
-            )
+        tools = get_gateway_tools(session.client)
+    except Exception:
+        get_session_pool().release(session, failed=True)
+        raise
+
+    logger.log(detail_level(), "MCP tools available: %d tool(s)", len(tools))
+    return session, tools
+
+
+def _log_mcp_failure(e: Exception) -> RuntimeError:
+    logger.error(f"Failed to get tools from MCP: {e}")
+    logger.error(f"Exception type: {type(e).__name__}")
+    import traceback
 
-            logger.info("Listing tools from MCP server...")
-            tools = _mcp_client.list_tools_sync()
+    logger.error(traceback.format_exc())
+    return RuntimeError(f"MCP connection failed - {str(e)}")
 
-            logger.info("=" * 80)
-            logger.info(f"MCP TOOLS DISCOVERED: {len(tools)} tool(s)")
-            for i, tool in enumerate(tools, 1):
-                tool_name = getattr(tool, "name", "unknown")
-                tool_desc = getattr(tool, "description", "No description")
-                logger.info(f"  {i}. {tool_name}")
-                logger.info(f"     Description: {tool_desc[:100]}...")
-            logger.info("=" * 80)
 
-            yield tools
+@contextmanager
+def initialize_mcp_tools() -> Iterator[list]:
+    """Borrow a warm MCP session from the pool and yield its cached tools."""
+    session = None
+    failed = False
+    try:
+        session, tools = _acquire_tools()
+        yield tools
+    except Exception as e:
+        failed = True
+        raise _log_mcp_failure(e) from e
+    finally:
+        if session is not None:
+            get_session_pool().release(session, failed=failed)
+
+
+@asynccontextmanager
+async def initialize_mcp_tools_async() -> AsyncIterator[list]:
+    """Async variant: pool bookkeeping runs off the event loop, tool calls stay async."""
+    session = None
+    failed = False
+    try:
+        session, tools = await asyncio.to_thread(_acquire_tools)
+        yield tools
     except Exception as e:
-        logger.error(f"Failed to get tools from MCP: {e}")
-        logger.error(f"Exception type: {type(e).__name__}")
-        import traceback
+        failed = True
+        raise _log_mcp_failure(e) from e
+    finally:
+        if session is not None:
+            await asyncio.to_thread(get_session_pool().release, session, failed)
+
 
-        logger.error(traceback.format_exc())
-        raise RuntimeError(f"MCP connection failed - {str(e)}")
+@contextmanager
+def lease_mcp_session() -> Iterator[PooledSession]:
+    """Borrow a warm MCP session from the pool for the duration of the block."""
+    session = None
+    failed = False
+    try:
+        session = _acquire_session()
+        yield session
+    except Exception as e:
+        failed = True
+        raise _log_mcp_failure(e) from e
+    finally:
+        if session is not None:
+            get_session_pool().release(session, failed=failed)
+
+
+@asynccontextmanager
+async def lease_mcp_session_async() -> AsyncIterator[PooledSession]:
+    """Async variant of lease_mcp_session."""
+    session = None
+    failed = False
+    try:
+        session = await asyncio.to_thread(_acquire_session)
+        yield session
+    except Exception as e:
+        failed = True
+        raise _log_mcp_failure(e) from e
+    finally:
+        if session is not None:
+            await asyncio.to_thread(get_session_pool().release, session, failed)
+
+
+def _scope_key(scope: str, invocation_state: dict) -> Optional[str]:
+    """credentials: Gateway credential key; session: runtime session id; global: None."""
+    if scope == "session":
+        return f"session:{invocation_state.get(SESSION_ID_KEY) or 'unknown'}"
+    if scope == "credentials":
+        return gateway_credential_key()
+    return None
+
+
+class GatewayAgentTool(MCPAgentTool):
+    """Gateway tool with a result cache and single-flight in front of the MCP call.
+
+    Cached results (TOOL_CACHE) skip the Gateway entirely; on a miss,
+    concurrent identical calls share one MCP request (TOOL_COALESCING).
+    Scopes (`credentials`, `session` or `global`) decide who may share a result.
+    """
+
+    def __init__(
+        self,
+        tool: MCPAgentTool,
+        coalescing_scope: Optional[str] = "credentials",
+        cache_scope: Optional[str] = "credentials",
+    ):
+        super().__init__(tool.mcp_tool, tool.mcp_client, name_override=tool.tool_name, timeout=tool.timeout)
+        self._coalescing_scope = coalescing_scope
+        self._cache_scope = cache_scope
+
+    async def stream(self, tool_use: ToolUse, invocation_state: dict[str, Any], **kwargs: Any) -> ToolGenerator:
+        tool_use_id = tool_use["toolUseId"]
+        arguments = tool_use["input"]
+
+        cache_key = None
+        policy = None
+        if self._cache_scope is not None:
+            policy = get_tool_cache().policy_for(self.mcp_tool.name)
+            if policy.allows(arguments):
+                cache_key = canonical_tool_key(
+                    self.mcp_tool.name, arguments, _scope_key(self._cache_scope, invocation_state)
+                )
+                cached = get_tool_cache().get(cache_key, self.tool_name)
+                annotate(**{"tool.cache": "miss" if cached is None else "hit"})
+                if cached is not None:
+                    logger.log(detail_level(), "%s: result served from the tool cache", self.tool_name)
+                    yield ToolResultEvent({**cached, "toolUseId": tool_use_id})
+                    return
+
+        def call_gateway():
+            return self.mcp_client.call_tool_async(
+                tool_use_id=tool_use_id,
+                name=self.mcp_tool.name,
+                arguments=arguments,
+                read_timeout_seconds=self.timeout,
+            )
+
+        # Dentro del span execute_tool de Strands: solo la espera al Gateway
+        with start_span("gateway.call_tool", **{"tool.name": self.mcp_tool.name}):
+            if self._coalescing_scope is None:
+                result, shared = await call_gateway(), False
+            else:
+                key = canonical_tool_key(
+                    self.mcp_tool.name, arguments, _scope_key(self._coalescing_scope, invocation_state)
+                )
+                result, shared = await _tool_calls_in_flight.do(key, call_gateway)
+                TOOL_COALESCING.inc(tool=self.tool_name, role="follower" if shared else "leader")
+                annotate(**{"tool.coalescing": "follower" if shared else "leader"})
+
+        if shared:
+            logger.log(detail_level(), "%s: shared result of an identical in-flight call", self.tool_name)
+            result = {**result, "toolUseId": tool_use_id}
+        elif cache_key is not None and is_cacheable_result(result):
+            get_tool_cache().put(cache_key, result, policy.ttl)
+        yield ToolResultEvent(result)
+
+
+def _scope_setting(flag: str, scope_var: str) -> Optional[str]:
+    if not env_bool(flag, True):
+        return None
+    return os.getenv(scope_var, "credentials").strip().lower()
+
+
+def wrap_gateway_tools(tools: list) -> list:
+    """Wrap plain Gateway MCP tools with the result cache and request coalescing."""
+    coalescing_scope = _scope_setting("TOOL_COALESCING", "TOOL_COALESCING_SCOPE")
+    cache_scope = _scope_setting("TOOL_CACHE", "TOOL_CACHE_SCOPE")
+    if coalescing_scope is None and cache_scope is None:
+        return tools
+    return [
+        GatewayAgentTool(tool, coalescing_scope, cache_scope) if type(tool) is MCPAgentTool else tool
+        for tool in tools
+    ]
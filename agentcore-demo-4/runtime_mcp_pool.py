@@ -0,0 +1,272 @@
+"""
+MCP session pool: warm Gateway sessions borrowed per invocation.
+
+Each pooled session is a started MCPClient (background thread + streamable-HTTP
+session already initialized). Invocations borrow a session, use its tools and
+return it, so the connect/initialize cost is paid once per session instead of
+once per request. Tool definitions come from runtime_tool_catalog.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Optional
+
+from strands.tools.mcp import MCPClient
+
+from runtime_config import env_float, env_int
+from runtime_metrics import MCP_POOL_ACQUIRES, MCP_POOL_DISCARDS, MCP_POOL_WAITS, STAGE_LATENCY
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PooledSession:
+    """A started MCP client and its bookkeeping."""
+
+    key: str
+    client: MCPClient
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    last_checked: float = field(default_factory=time.monotonic)
+    # Set when the borrowing invocation failed; forces a probe before reuse
+    suspect: bool = False
+
+
+class McpSessionPool:
+    """Bounded pool of warm MCP sessions, partitioned by credential key."""
+
+    def __init__(
+        self,
+        max_size: int = 8,
+        max_idle: int = 4,
+        idle_ttl: float = 300.0,
+        acquire_timeout: float = 30.0,
+        health_check_interval: float = 60.0,
+    ):
+        self._max_size = max(1, max_size)
+        self._max_idle = max(0, max_idle)
+        self._idle_ttl = idle_ttl
+        self._acquire_timeout = acquire_timeout
+        self._health_check_interval = health_check_interval
+        self._cond = threading.Condition()
+        self._idle: Dict[str, Deque[PooledSession]] = {}
+        # Sessions that exist (idle + borrowed + being created)
+        self._total = 0
+        self._closed = False
+
+    @classmethod
+    def from_env(cls) -> "McpSessionPool":
+        """Build a pool configured from MCP_POOL_* environment variables."""
+        return cls(
+            max_size=env_int("MCP_POOL_MAX_SIZE", 8),
+            max_idle=env_int("MCP_POOL_MAX_IDLE", 4),
+            idle_ttl=env_float("MCP_POOL_IDLE_TTL", 300.0),
+            acquire_timeout=env_float("MCP_POOL_ACQUIRE_TIMEOUT", 30.0),
+            health_check_interval=env_float("MCP_POOL_HEALTH_CHECK_INTERVAL", 60.0),
+        )
+
+    def acquire(self, key: str, factory: Callable[[], MCPClient]) -> PooledSession:
+        """Borrow a healthy session for key, creating one if the pool has room."""
+        deadline = time.monotonic() + self._acquire_timeout
+
+        while True:
+            session, create = self._reserve(key, deadline)
+
+            if create:
+                return self._open(key, factory)
+
+            assert session is not None
+            if self._check(session):
+                MCP_POOL_ACQUIRES.inc(result="hit")
+                return session
+
+            logger.info(f"Discarding unhealthy MCP session (key={key})")
+            MCP_POOL_DISCARDS.inc(reason="replaced")
+            self._discard(session)
+
+    def release(self, session: PooledSession, failed: bool = False) -> None:
+        """Return a borrowed session; broken sessions are closed and replaced."""
+        session.last_used = time.monotonic()
+        if failed:
+            session.suspect = True
+
+        if not self._is_alive(session):
+            MCP_POOL_DISCARDS.inc(reason="replaced")
+            self._discard(session)
+            return
+
+        with self._cond:
+            if self._closed:
+                evict = True
+            else:
+                evict = self._idle_count_locked() >= self._max_idle
+                if not evict:
+                    self._idle.setdefault(session.key, deque()).append(session)
+            self._cond.notify()
+
+        if evict:
+            MCP_POOL_DISCARDS.inc(reason="evicted")
+            self._discard(session)
+
+    def close(self) -> None:
+        """Close every idle session and refuse to keep returned ones."""
+        with self._cond:
+            self._closed = True
+            sessions = [s for idle in self._idle.values() for s in idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        for session in sessions:
+            self._discard(session)
+
+    def stats(self) -> dict:
+        """Snapshot of pool occupancy."""
+        with self._cond:
+            idle = self._idle_count_locked()
+            return {
+                "total": self._total,
+                "idle": idle,
+                "borrowed": self._total - idle,
+                "max_size": self._max_size,
+            }
+
+    def _reserve(self, key: str, deadline: float) -> tuple[Optional[PooledSession], bool]:
+        """Pick an idle session or a creation slot, waiting while the pool is full."""
+        wait_start: Optional[float] = None
+        stale: list[PooledSession] = []
+        try:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("MCP session pool is closed")
+
+                    stale.extend(self._pop_expired_locked())
+
+                    idle = self._idle.get(key)
+                    if idle:
+                        session = idle.pop()
+                        if not idle:
+                            del self._idle[key]
+                        return session, False
+
+                    if self._total < self._max_size:
+                        self._total += 1
+                        MCP_POOL_ACQUIRES.inc(result="miss")
+                        return None, True
+
+                    # Pool full: make room by closing an idle session of another key
+                    victim = self._pop_any_idle_locked()
+                    if victim is not None:
+                        MCP_POOL_DISCARDS.inc(reason="evicted")
+                        self._total -= 1
+                        stale.append(victim)
+                        continue
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise RuntimeError(
+                            f"Timed out waiting for an MCP session "
+                            f"({self._acquire_timeout:.1f}s, pool size {self._max_size})"
+                        )
+                    if wait_start is None:
+                        wait_start = time.monotonic()
+                        MCP_POOL_WAITS.inc()
+                    self._cond.wait(remaining)
+        finally:
+            if wait_start is not None:
+                STAGE_LATENCY.observe(time.monotonic() - wait_start, stage="mcp_pool_wait")
+            for session in stale:
+                self._stop_client(session.client)
+
+    def _open(self, key: str, factory: Callable[[], MCPClient]) -> PooledSession:
+        """Start a new MCP session in a reserved slot."""
+        start = time.monotonic()
+        client = None
+        try:
+            client = factory()
+            client.start()
+        except Exception:
+            if client is not None:
+                self._stop_client(client)
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+        elapsed = time.monotonic() - start
+        STAGE_LATENCY.observe(elapsed, stage="mcp_connect")
+        logger.info(
+            f"✓ New MCP session opened ({elapsed:.3f}s, key={key})"
+        )
+        return PooledSession(key=key, client=client)
+
+    def _check(self, session: PooledSession) -> bool:
+        """Cheap liveness check, plus an active probe when due or suspect."""
+        if not self._is_alive(session):
+            return False
+
+        now = time.monotonic()
+        if not session.suspect and now - session.last_checked < self._health_check_interval:
+            return True
+
+        try:
+            session.client.list_tools_sync()
+        except Exception as e:
+            logger.warning(f"MCP session health check failed: {e}")
+            return False
+
+        session.last_checked = now
+        session.suspect = False
+        return True
+
+    @staticmethod
+    def _is_alive(session: PooledSession) -> bool:
+        # MCPClient.stop() deja el thread en None: una sesión cerrada o nunca arrancada no sirve
+        thread = getattr(session.client, "_background_thread", None)
+        return thread is not None and thread.is_alive()
+
+    def _discard(self, session: PooledSession) -> None:
+        self._stop_client(session.client)
+        with self._cond:
+            self._total -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _stop_client(client: MCPClient) -> None:
+        try:
+            client.stop(None, None, None)
+        except Exception as e:
+            logger.debug(f"Error while stopping MCP client: {e}")
+
+    def _idle_count_locked(self) -> int:
+        return sum(len(idle) for idle in self._idle.values())
+
+    def _pop_expired_locked(self) -> list[PooledSession]:
+        now = time.monotonic()
+        expired: list[PooledSession] = []
+        # Las claves incluyen el hash de tokens que rotan: una deque vacía se borra
+        for key, idle in list(self._idle.items()):
+            # Oldest sessions sit at the left end
+            while idle and now - idle[0].last_used > self._idle_ttl:
+                expired.append(idle.popleft())
+            if not idle:
+                del self._idle[key]
+        if expired:
+            MCP_POOL_DISCARDS.inc(len(expired), reason="expired")
+            self._total -= len(expired)
+        return expired
+
+    def _pop_any_idle_locked(self) -> Optional[PooledSession]:
+        oldest_key: Optional[str] = None
+        for key, idle in self._idle.items():
+            if oldest_key is None or idle[0].last_used < self._idle[oldest_key][0].last_used:
+                oldest_key = key
+        if oldest_key is None:
+            return None
+        oldest = self._idle[oldest_key]
+        session = oldest.popleft()
+        if not oldest:
+            del self._idle[oldest_key]
+        return session
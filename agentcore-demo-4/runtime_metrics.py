@@ -1,85 +1,564 @@
 """
-Runtime observability: metrics and logging utilities.
+Runtime observability: metrics registry and logging utilities.
+
+Counters, gauges and latency histograms live in one process-wide registry.
+It is logged as a summary every few invocations and served in Prometheus
+text format on /metrics.
 """
 
+import bisect
 import logging
-from typing import Any, Dict
+import re
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
-_metrics: Dict[str, Any] = {
-    "invocations": 0,
-    "tool_calls": 0,
-    "errors": 0,
-    "total_response_time": 0.0,
-    "mcp_connection_time": 0.0,
-    "token_refresh_count": 0,
-}
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+class _Metric:
+    """Base for labeled metrics: one value slot per label combination."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames: Tuple[str, ...] = tuple(labelnames)
+        # One lock per metric: updates are a dict write, contention stays low
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[Tuple[str, LabelValues, float]]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic counter."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def total(self, **labels: Any) -> float:
+        """Sum over label combinations, optionally only those matching labels."""
+        match = [(self.labelnames.index(name), str(value)) for name, value in labels.items()]
+        with self._lock:
+            return sum(
+                value
+                for key, value in self._values.items()
+                if all(key[i] == expected for i, expected in match)
+            )
+
+    def samples(self) -> Iterator[Tuple[str, LabelValues, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, key, value
+
+
+class Gauge(_Metric):
+    """Point-in-time value, set directly or read from a callback at collection."""
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Iterable[str] = (),
+        function: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._function = function
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function: Callable[[], Dict[LabelValues, float]]) -> None:
+        """Read values from function ({label values: value}) on every collection."""
+        self._function = function
+
+    def samples(self) -> Iterator[Tuple[str, LabelValues, float]]:
+        if self._function is not None:
+            try:
+                items = list(self._function().items())
+            except Exception as e:
+                logger.debug(f"Gauge {self.name} callback failed: {e}")
+                items = []
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        for key, value in items:
+            yield self.name, key, value
+
+
+class _HistogramData:
+    __slots__ = ("buckets", "count", "sum")
+
+    def __init__(self, size: int):
+        # Per-bucket (non-cumulative) counts; the last slot is +Inf
+        self.buckets = [0] * size
+        self.count = 0
+        self.sum = 0.0
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram; quantiles are estimated by interpolating buckets."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.bounds: Tuple[float, ...] = tuple(sorted(buckets))
+        self._data: Dict[LabelValues, _HistogramData] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            data = self._data.get(key)
+            if data is None:
+                data = self._data[key] = _HistogramData(len(self.bounds) + 1)
+            data.buckets[index] += 1
+            data.count += 1
+            data.sum += value
+
+    def count(self, **labels: Any) -> int:
+        data = self._data.get(self._key(labels))
+        return data.count if data else 0
+
+    def quantile(self, q: float, **labels: Any) -> Optional[float]:
+        """Estimated q-quantile (0..1), None without observations."""
+        with self._lock:
+            data = self._data.get(self._key(labels))
+            if not data or data.count == 0:
+                return None
+            buckets = list(data.buckets)
+            count = data.count
+
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(buckets):
+            if bucket_count and seen + bucket_count >= rank:
+                if index >= len(self.bounds):
+                    # +Inf bucket: the best estimate is the largest finite bound
+                    return self.bounds[-1]
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                upper = self.bounds[index]
+                return lower + (upper - lower) * ((rank - seen) / bucket_count)
+            seen += bucket_count
+        return self.bounds[-1]
+
+    def samples(self) -> Iterator[Tuple[str, LabelValues, float]]:
+        with self._lock:
+            items = [(key, list(d.buckets), d.count, d.sum) for key, d in self._data.items()]
+        for key, buckets, count, total in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.bounds + (float("inf"),), buckets):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", key + (_format_value(bound),), cumulative
+            yield f"{self.name}_count", key, count
+            yield f"{self.name}_sum", key, total
+
+
+class MetricsRegistry:
+    """Named metrics of the runtime, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
 
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
 
-def get_metrics() -> Dict[str, Any]:
-    """Return the metrics dict (for use by other modules)."""
-    return _metrics
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            registered = list(self._metrics.values())
 
+        lines: list[str] = []
+        for metric in registered:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            labelnames = metric.labelnames
+            if isinstance(metric, Histogram):
+                labelnames = labelnames + ("le",)
+            for sample_name, key, value in metric.samples():
+                lines.append(
+                    f"{sample_name}{_format_labels(labelnames, key)} {_format_value(value)}"
+                )
+        return "\n".join(lines) + "\n"
 
-# Alias for direct mutation access
-metrics = _metrics
+    def _register(self, metric: _Metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: LabelValues) -> str:
+    if not labelnames:
+        return ""
+    escaped = (
+        v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for v in values
+    )
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(labelnames, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+metrics = MetricsRegistry()
+
+# --- Invocations -------------------------------------------------------------
+INVOCATIONS = metrics.counter(
+    "agentcore_invocations_total", "Agent invocations by entrypoint mode.", ("mode",)
+)
+ERRORS = metrics.counter(
+    "agentcore_errors_total", "Failed invocations by kind and exception type.", ("kind", "type")
+)
+WARMUP_DURATION = metrics.gauge(
+    "agentcore_warmup_duration_seconds", "Startup warm-up duration per step (and total).", ("step",)
+)
+STAGE_LATENCY = metrics.histogram(
+    "agentcore_stage_duration_seconds",
+    "Latency per stage: mcp_connect, mcp_pool_wait, tool_listing, agent_init, "
+    "model_call, tool_call, time_to_first_token, admission_wait, total.",
+    ("stage",),
+)
+
+# --- Tools ---------------------------------------------------------------------
+TOOL_CALLS = metrics.counter(
+    "agentcore_tool_calls_total", "Executed tool calls by tool and status.", ("tool", "status")
+)
+TOOL_RESULT_BYTES = metrics.counter(
+    "agentcore_tool_result_bytes_total", "Bytes returned by tool calls.", ("tool",)
+)
+TOOL_COALESCING = metrics.counter(
+    "agentcore_tool_coalescing_total",
+    "Gateway tool calls by single-flight role (leader executed it, follower shared a running call).",
+    ("tool", "role"),
+)
+TOOL_IN_FLIGHT = metrics.gauge(
+    "agentcore_tool_calls_in_flight", "Distinct Gateway tool calls currently executing."
+)
+TOOL_CACHE_LOOKUPS = metrics.counter(
+    "agentcore_tool_cache_lookups_total", "Tool-result cache lookups by tool and result.", ("tool", "result")
+)
+TOOL_CACHE_BYTES = metrics.counter(
+    "agentcore_tool_cache_hit_bytes_total", "Bytes of tool results served from the cache.", ("tool",)
+)
+TOOL_CACHE_EVICTIONS = metrics.counter(
+    "agentcore_tool_cache_evictions_total", "Tool-result cache entries dropped by reason.", ("reason",)
+)
+TOOL_CACHE_SIZE = metrics.gauge(
+    "agentcore_tool_cache_size", "Cached tool results and their estimated size.", ("unit",)
+)
+TOOL_CATALOG_LOOKUPS = metrics.counter(
+    "agentcore_tool_catalog_lookups_total", "Tool catalog lookups by result.", ("result",)
+)
+TOOL_CATALOG_REFRESHES = metrics.counter(
+    "agentcore_tool_catalog_refreshes_total", "Background tool catalog refreshes."
+)
+
+# --- Admission control ---------------------------------------------------------
+ADMISSIONS = metrics.counter(
+    "agentcore_admission_total",
+    "Invocation admission decisions (admitted, queue_full, session_queue_full, timeout).",
+    ("result",),
+)
+ADMISSION_QUEUE = metrics.gauge(
+    "agentcore_admission_requests",
+    "Invocations holding a slot (running), waiting (queued) and sessions with turns (sessions).",
+    ("state",),
+)
+
+# --- MCP session pool ----------------------------------------------------------
+MCP_POOL_ACQUIRES = metrics.counter(
+    "agentcore_mcp_pool_acquires_total", "MCP pool acquisitions by result.", ("result",)
+)
+MCP_POOL_DISCARDS = metrics.counter(
+    "agentcore_mcp_pool_discards_total", "MCP sessions closed by the pool by reason.", ("reason",)
+)
+MCP_POOL_WAITS = metrics.counter(
+    "agentcore_mcp_pool_waits_total", "Acquisitions that waited for a free MCP session."
+)
+MCP_POOL_SESSIONS = metrics.gauge(
+    "agentcore_mcp_pool_sessions", "MCP sessions in the pool by state.", ("state",)
+)
+
+# --- Agent sessions ------------------------------------------------------------
+AGENT_SESSION_LOOKUPS = metrics.counter(
+    "agentcore_agent_session_lookups_total", "Agent session lookups by result.", ("result",)
+)
+AGENT_SESSION_EVICTIONS = metrics.counter(
+    "agentcore_agent_session_evictions_total", "Agent sessions dropped by reason.", ("reason",)
+)
+AGENT_SESSIONS = metrics.gauge(
+    "agentcore_agent_sessions", "Cached agent sessions and their estimated size.", ("unit",)
+)
+
+# --- Gateway HTTP and auth -----------------------------------------------------
+GATEWAY_HTTP_REQUESTS = metrics.counter(
+    "agentcore_gateway_http_requests_total", "HTTP requests sent to the Gateway."
+)
+GATEWAY_HTTP_CONNECTIONS = metrics.counter(
+    "agentcore_gateway_http_connections_opened_total", "TCP connections opened to the Gateway."
+)
+GATEWAY_HTTP_TLS_HANDSHAKES = metrics.counter(
+    "agentcore_gateway_http_tls_handshakes_total", "TLS handshakes with the Gateway."
+)
+GATEWAY_HTTP2_REQUESTS = metrics.counter(
+    "agentcore_gateway_http2_requests_total", "Gateway requests sent over HTTP/2."
+)
+CONFIG_RELOADS = metrics.counter(
+    "agentcore_config_reloads_total", "Runtime config snapshots reloaded after a file changed."
+)
+TOKEN_REFRESHES = metrics.counter(
+    "agentcore_token_refreshes_total", "Service tokens obtained from Cognito."
+)
+JWKS_REFRESHES = metrics.counter(
+    "agentcore_jwks_refreshes_total",
+    "JWKS loads by reason (startup, interval, unknown_kid, retry) and result.",
+    ("reason", "result"),
+)
+JWT_CACHE_LOOKUPS = metrics.counter(
+    "agentcore_jwt_cache_lookups_total",
+    "Inbound JWT verification cache lookups by result (hit, negative_hit, miss).",
+    ("result",),
+)
+JWT_CACHE_EVICTIONS = metrics.counter(
+    "agentcore_jwt_cache_evictions_total", "Verified-token cache entries dropped by reason.", ("reason",)
+)
+JWT_CACHE_SIZE = metrics.gauge(
+    "agentcore_jwt_cache_size", "Cached inbound tokens by kind (valid, rejected).", ("kind",)
+)
+
+# --- Logging -------------------------------------------------------------------
+LOG_RECORDS_DROPPED = metrics.counter(
+    "agentcore_log_records_dropped_total",
+    "Log records not written, by level and reason (sampled, queue_full).",
+    ("level", "reason"),
+)
+
+
+# --- Tracing -------------------------------------------------------------------
+TRACE_SPANS_EXPORTED = metrics.counter(
+    "agentcore_trace_spans_exported_total",
+    "Spans handed to the OTLP/JSON exporters, by exporter (file, otlp_http) and result.",
+    ("exporter", "result"),
+)
+
+def get_metrics() -> MetricsRegistry:
+    """Return the metrics registry (for use by other modules)."""
+    return metrics
+
+
+def _latency_summary(stage: str) -> str:
+    count = STAGE_LATENCY.count(stage=stage)
+    if count == 0:
+        return "n/a"
+    p50, p95, p99 = (STAGE_LATENCY.quantile(q, stage=stage) for q in (0.5, 0.95, 0.99))
+    return f"p50={p50:.3f}s p95={p95:.3f}s p99={p99:.3f}s (n={count})"
+
+
+def _ratio(part: float, whole: float) -> float:
+    return (part / whole) * 100 if whole > 0 else 0.0
 
 
 def log_metrics() -> None:
-    """Log current observability metrics."""
-    if _metrics["invocations"] <= 0:
+    """Log a summary of the metrics registry."""
+    invocations = INVOCATIONS.total()
+    if invocations <= 0:
         return
-    avg_response_time = _metrics["total_response_time"] / _metrics["invocations"]
-    tool_usage_rate = (
-        (_metrics["tool_calls"] / _metrics["invocations"]) * 100
-        if _metrics["invocations"] > 0
-        else 0
-    )
-    error_rate = (
-        (_metrics["errors"] / _metrics["invocations"]) * 100
-        if _metrics["invocations"] > 0
-        else 0
-    )
+    tool_calls = TOOL_CALLS.total()
+    errors = ERRORS.total()
+    pool_hits = MCP_POOL_ACQUIRES.value(result="hit")
+    pool_misses = MCP_POOL_ACQUIRES.value(result="miss")
+    http_requests = GATEWAY_HTTP_REQUESTS.total()
 
     logger.info("=" * 80)
     logger.info("OBSERVABILITY METRICS")
     logger.info("=" * 80)
-    logger.info(f"Total Invocations: {_metrics['invocations']}")
+    logger.info(f"Total Invocations: {invocations:.0f}")
+    logger.info(f"Tool Calls: {tool_calls:.0f} ({_ratio(tool_calls, invocations):.1f}% usage rate)")
+    logger.info(f"Errors: {errors:.0f} ({_ratio(errors, invocations):.1f}% error rate)")
+    for stage in (
+        "total",
+        "time_to_first_token",
+        "model_call",
+        "tool_call",
+        "mcp_connect",
+        "mcp_pool_wait",
+        "tool_listing",
+        "admission_wait",
+    ):
+        logger.info(f"Latency {stage}: {_latency_summary(stage)}")
+    logger.info(f"Token Refreshes: {TOKEN_REFRESHES.total():.0f}")
+    rejected = ADMISSIONS.total() - ADMISSIONS.value(result="admitted")
+    if rejected > 0:
+        logger.info(
+            f"Admission: {ADMISSIONS.value(result='admitted'):.0f} admitted / {rejected:.0f} rejected (429) "
+            f"({ADMISSIONS.value(result='queue_full'):.0f} queue full, "
+            f"{ADMISSIONS.value(result='session_queue_full'):.0f} session queue full, "
+            f"{ADMISSIONS.value(result='timeout'):.0f} timed out)"
+        )
+    logger.info(
+        f"MCP Pool: {pool_hits:.0f} hits / {pool_misses:.0f} misses "
+        f"({_ratio(pool_hits, pool_hits + pool_misses):.1f}% hit rate), "
+        f"{MCP_POOL_DISCARDS.value(reason='replaced'):.0f} replaced, "
+        f"{MCP_POOL_DISCARDS.value(reason='evicted'):.0f} evicted, "
+        f"{MCP_POOL_WAITS.total():.0f} waits"
+    )
+    logger.info(
+        f"Tool Catalog: {TOOL_CATALOG_LOOKUPS.value(result='hit'):.0f} hits / "
+        f"{TOOL_CATALOG_LOOKUPS.value(result='miss'):.0f} misses, "
+        f"{TOOL_CATALOG_REFRESHES.total():.0f} background refreshes"
+    )
+    leaders = TOOL_COALESCING.total(role="leader")
+    followers = TOOL_COALESCING.total(role="follower")
+    logger.info(
+        f"Tool Coalescing: {leaders:.0f} executed / {followers:.0f} shared "
+        f"({_ratio(followers, leaders + followers):.1f}% coalesced)"
+    )
+    cache_hits = TOOL_CACHE_LOOKUPS.total(result="hit")
+    cache_misses = TOOL_CACHE_LOOKUPS.total(result="miss")
+    logger.info(
+        f"Tool Cache: {cache_hits:.0f} hits / {cache_misses:.0f} misses "
+        f"({_ratio(cache_hits, cache_hits + cache_misses):.1f}% hit rate), "
+        f"{TOOL_CACHE_BYTES.total():.0f} bytes served, "
+        f"{TOOL_CACHE_EVICTIONS.total():.0f} evicted or expired"
+    )
+    jwt_hits = JWT_CACHE_LOOKUPS.value(result="hit") + JWT_CACHE_LOOKUPS.value(result="negative_hit")
+    jwt_misses = JWT_CACHE_LOOKUPS.value(result="miss")
+    if jwt_hits + jwt_misses > 0:
+        logger.info(
+            f"JWT Cache: {jwt_hits:.0f} hits / {jwt_misses:.0f} verified "
+            f"({_ratio(jwt_hits, jwt_hits + jwt_misses):.1f}% hit rate), "
+            f"{JWT_CACHE_EVICTIONS.total():.0f} evicted or expired"
+        )
+    logger.info(
+        f"Agent Sessions: {AGENT_SESSION_LOOKUPS.value(result='hit'):.0f} hits / "
+        f"{AGENT_SESSION_LOOKUPS.value(result='miss'):.0f} misses, "
+        f"{AGENT_SESSION_EVICTIONS.total():.0f} evicted or expired"
+    )
     logger.info(
-        f"Tool Calls: {_metrics['tool_calls']} ({tool_usage_rate:.1f}% usage rate)"
+        f"Gateway HTTP: {http_requests:.0f} requests, "
+        f"{GATEWAY_HTTP_CONNECTIONS.total():.0f} connections opened, "
+        f"{GATEWAY_HTTP_TLS_HANDSHAKES.total():.0f} TLS handshakes, "
+        f"{GATEWAY_HTTP2_REQUESTS.total():.0f} over HTTP/2 "
+        f"({_ratio(http_requests - GATEWAY_HTTP_CONNECTIONS.total(), http_requests):.1f}% connection reuse)"
     )
-    logger.info(f"Errors: {_metrics['errors']} ({error_rate:.1f}% error rate)")
-    logger.info(f"Average Response Time: {avg_response_time:.3f}s")
-    logger.info(f"MCP Connection Time: {_metrics['mcp_connection_time']:.3f}s")
-    logger.info(f"Token Refreshes: {_metrics['token_refresh_count']}")
     logger.info("=" * 80)
 
 
-def find_graphql_queries(value: Any) -> list[str]:
-    """Best-effort extraction of GraphQL query strings from nested data."""
+_GRAPHQL_KEYWORD = re.compile(r"\b(query|mutation)\b", re.IGNORECASE)
+_SCALARS = (int, float, bool, bytes, type(None))
+
+
+def find_graphql_queries(
+    value: Any,
+    max_depth: int = 16,
+    max_nodes: int = 5000,
+    max_queries: int = 10,
+    max_string_length: int = 16384,
+) -> list[str]:
+    """
+    Best-effort extraction of GraphQL query strings from nested data.
+
+    Iterative walk (no recursion limit) with a visited set for cycles, bounded
+    by depth, visited nodes and string length; stops after max_queries. Tool
+    use blocks are read through their `input` and tool results are skipped:
+    queries live in the arguments the model sent, not in what came back.
+    """
     queries: list[str] = []
+    visited: set[int] = set()
+    stack: list[tuple[Any, int]] = [(value, 0)]
+    nodes = 0
+
+    while stack and len(queries) < max_queries and nodes < max_nodes:
+        item, depth = stack.pop()
+        nodes += 1
+
+        if isinstance(item, str):
+            if (
+                len(item) <= max_string_length
+                and "{" in item
+                and "}" in item
+                and _GRAPHQL_KEYWORD.search(item)
+            ):
+                queries.append(item)
+            continue
+
+        if isinstance(item, _SCALARS) or depth >= max_depth or id(item) in visited:
+            continue
+        visited.add(id(item))
+
+        if isinstance(item, dict):
+            if "toolUse" in item:
+                stack.append((item["toolUse"].get("input"), depth + 1))
+                continue
+            query_value = item.get("query")
+            if isinstance(query_value, str):
+                queries.append(query_value)
+            children = [
+                v for k, v in item.items() if k not in ("query", "toolResult")
+            ]
+        elif isinstance(item, (list, tuple)):
+            children = list(item)
+        elif hasattr(item, "__dict__"):
+            children = [vars(item)]
+        else:
+            continue
 
-    if isinstance(value, str):
-        lower = value.lower()
-        if ("query" in lower or "mutation" in lower) and "{" in value and "}" in value:
-            queries.append(value)
-        return queries
-
-    if isinstance(value, dict):
-        query_value = value.get("query")
-        if isinstance(query_value, str):
-            queries.append(query_value)
-        for item in value.values():
-            queries.extend(find_graphql_queries(item))
-        return queries
-
-    if isinstance(value, (list, tuple)):
-        for item in value:
-            queries.extend(find_graphql_queries(item))
-        return queries
-
-    if hasattr(value, "__dict__"):
-        queries.extend(find_graphql_queries(value.__dict__))
+        # Reversed so items are visited in document order
+        stack.extend((child, depth + 1) for child in reversed(children))
 
     return queries
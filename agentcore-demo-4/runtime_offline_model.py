@@ -0,0 +1,239 @@
+"""
+Offline model backend: scripted Strands Model for profiling without AWS.
+
+Selected with MODEL_BACKEND=offline. Replays deterministic turns from a script
+(OFFLINE_MODEL_SCRIPT, JSON) or the built-in countries script: the first turn
+of a rule asks for the Gateway GraphQL tool, the next one answers with the tool
+result. Time-to-first-token, token rate and throttling errors are injected so
+the handler, tool loop, streaming and caches can be load-tested offline.
+
+Script format (list of rules, first match wins; a rule without "match" is the
+fallback). "output" is the JSON object returned by structured_output():
+
+    [{"match": ["capital", "país"],
+      "tool": {"name": "executeGraphQLQuery", "input": {"query": "..."}},
+      "answer": "Según el Gateway: {result}",
+      "output": {"country": "Brasil", "capital": "Brasília"}},
+     {"answer": "Respuesta sin herramientas"}]
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import uuid
+from typing import Any, AsyncGenerator, Optional
+
+from strands.models import Model
+from strands.types.exceptions import ModelThrottledException
+
+from runtime_config import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCRIPT: list[dict] = [
+    {
+        "match": ["continente", "continent", "sudamérica", "sudamerica", "south america"],
+        "tool": {
+            "name": "executeGraphQLQuery",
+            "input": {
+                "query": 'query { continent(code: "SA") { code name countries { code name capital currency } } }'
+            },
+        },
+        "answer": "Estos son los países del continente consultado: {result}",
+    },
+    {
+        "match": ["euro", "moneda", "currency"],
+        "tool": {
+            "name": "executeGraphQLQuery",
+            "input": {
+                "query": 'query { countries(filter: { currency: { regex: "EUR" } }) { code name currency } }'
+            },
+        },
+        "answer": "Países que usan esa moneda: {result}",
+    },
+    {
+        "match": ["capital", "país", "pais", "country"],
+        "tool": {
+            "name": "executeGraphQLQuery",
+            "input": {
+                "query": "query GetCountry($code: ID!) { country(code: $code) { code name native capital currency continent { code name } languages { code name } } }",
+                "variables": {"code": "BR"},
+            },
+        },
+        "answer": "Información del país consultado: {result}",
+    },
+    {
+        "answer": (
+            "Soy un agente de demostración. Puedo consultar información de países, "
+            "capitales, monedas, idiomas y continentes a través del Gateway."
+        ),
+    },
+]
+
+_TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+class OfflineModel(Model):
+    """Scripted model with injectable latency and throttling."""
+
+    def __init__(
+        self,
+        script: Optional[list[dict]] = None,
+        tokens_per_second: float = 50.0,
+        time_to_first_token: float = 0.3,
+        throttle_rate: float = 0.0,
+        max_result_chars: int = 400,
+        seed: int = 0,
+    ):
+        self.config: dict[str, Any] = {
+            "model_id": "offline-scripted",
+            "tokens_per_second": tokens_per_second,
+            "time_to_first_token": time_to_first_token,
+            "throttle_rate": throttle_rate,
+            "max_result_chars": max_result_chars,
+        }
+        self._script = script or DEFAULT_SCRIPT
+        self._random = random.Random(seed)
+
+    @classmethod
+    def from_env(cls) -> "OfflineModel":
+        """Build a model configured from OFFLINE_MODEL_* environment variables."""
+        script = None
+        path = os.getenv("OFFLINE_MODEL_SCRIPT")
+        if path:
+            with open(path, "r") as f:
+                script = json.load(f)
+        return cls(
+            script=script,
+            tokens_per_second=env_float("OFFLINE_MODEL_TOKENS_PER_SECOND", 50.0),
+            time_to_first_token=env_float("OFFLINE_MODEL_TTFT", 0.3),
+            throttle_rate=env_float("OFFLINE_MODEL_THROTTLE_RATE", 0.0),
+            max_result_chars=env_int("OFFLINE_MODEL_MAX_RESULT_CHARS", 400),
+            seed=env_int("OFFLINE_MODEL_SEED", 0),
+        )
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> dict[str, Any]:
+        return self.config
+
+    async def structured_output(
+        self,
+        output_model: type,
+        prompt: list,
+        system_prompt: Optional[str] = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[dict, None]:
+        """Validate the matching rule's "output" against output_model (same latency and throttling)."""
+        await asyncio.sleep(self.config["time_to_first_token"])
+        if self._random.random() < self.config["throttle_rate"]:
+            raise ModelThrottledException("Offline model: injected throttling")
+
+        rule = self._match(prompt)
+        if "output" not in rule:
+            raise ValueError(f"Offline model: the script rule has no \"output\" for {output_model.__name__}")
+        # pydantic.ValidationError si el script no encaja con el modelo, como con Bedrock
+        yield {"output": output_model.model_validate(rule["output"])}
+
+    async def stream(
+        self,
+        messages: list,
+        tool_specs: Optional[list] = None,
+        system_prompt: Optional[str] = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[dict, None]:
+        await asyncio.sleep(self.config["time_to_first_token"])
+        if self._random.random() < self.config["throttle_rate"]:
+            raise ModelThrottledException("Offline model: injected throttling")
+
+        rule = self._match(messages)
+        tool_result = _last_tool_result(messages)
+        tool_name = self._tool_name(rule, tool_specs)
+
+        yield {"messageStart": {"role": "assistant"}}
+
+        if tool_name and tool_result is None:
+            tool_input = json.dumps(rule["tool"].get("input", {}))
+            yield {
+                "contentBlockStart": {
+                    "start": {"toolUse": {"toolUseId": f"tooluse_{uuid.uuid4().hex[:12]}", "name": tool_name}}
+                }
+            }
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": tool_input}}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "tool_use"}}
+            output_tokens = len(tool_input) // 4
+        else:
+            result = (tool_result or "")[: self.config["max_result_chars"]]
+            text = rule.get("answer", "").replace("{result}", result)
+            output_tokens = 0
+            delay = 1.0 / self.config["tokens_per_second"] if self.config["tokens_per_second"] > 0 else 0.0
+            for token in _TOKEN_PATTERN.findall(text):
+                if output_tokens and delay:
+                    await asyncio.sleep(delay)
+                output_tokens += 1
+                yield {"contentBlockDelta": {"delta": {"text": token}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+
+        input_tokens = sum(len(json.dumps(m.get("content", []), default=str)) for m in messages) // 4
+        yield {
+            "metadata": {
+                "usage": {
+                    "inputTokens": input_tokens,
+                    "outputTokens": output_tokens,
+                    "totalTokens": input_tokens + output_tokens,
+                },
+                "metrics": {"latencyMs": int(self.config["time_to_first_token"] * 1000)},
+            }
+        }
+
+    def _match(self, messages: list) -> dict:
+        prompt = _last_user_text(messages).lower()
+        for rule in self._script:
+            keywords = rule.get("match")
+            if not keywords or any(k.lower() in prompt for k in keywords):
+                return rule
+        return {"answer": ""}
+
+    @staticmethod
+    def _tool_name(rule: dict, tool_specs: Optional[list]) -> Optional[str]:
+        """Resolve the rule's tool against the agent's tools (Gateway names are prefixed)."""
+        wanted = rule.get("tool", {}).get("name")
+        if not wanted or not tool_specs:
+            return None
+        for spec in tool_specs:
+            if spec["name"] == wanted or spec["name"].endswith(f"___{wanted}"):
+                return spec["name"]
+        return None
+
+
+def _last_user_text(messages: list) -> str:
+    for message in reversed(messages):
+        if message.get("role") != "user":
+            continue
+        texts = [block["text"] for block in message.get("content", []) if "text" in block]
+        if texts:
+            return " ".join(texts)
+    return ""
+
+
+def _last_tool_result(messages: list) -> Optional[str]:
+    """Text of the tool results in the latest message, None if it has none."""
+    if not messages:
+        return None
+    results = [block["toolResult"] for block in messages[-1].get("content", []) if "toolResult" in block]
+    if not results:
+        return None
+    parts = []
+    for result in results:
+        for block in result.get("content", []):
+            if "text" in block:
+                parts.append(block["text"])
+            elif "json" in block:
+                parts.append(json.dumps(block["json"], ensure_ascii=False))
+    return " ".join(parts)
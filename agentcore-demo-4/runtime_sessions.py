@@ -0,0 +1,385 @@
+"""
+Agent session store: warm Agents per runtime session for multi-turn context.
+
+Entries are keyed by the AgentCore session id (the
+X-Amzn-Bedrock-AgentCore-Runtime-Session-Id header, or `sessionId` in the
+payload) and keep the Agent with its conversation history between turns. MCP
+sessions are still borrowed from the pool on every turn: the agent's tools are
+bound to a LeasedMCPClient that points at the session leased for that turn.
+The store is bounded by entry count and estimated history size, and idle
+entries expire after a TTL (least recently used first). The size estimate is
+kept incrementally: only the messages added during a turn are measured.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterator, Optional, Union
+
+from strands import Agent
+from strands.hooks import HookProvider, HookRegistry, MessageAddedEvent
+from strands.tools.mcp import MCPAgentTool, MCPClient
+
+from runtime_agent import create_agent
+from runtime_config import env_float, env_int
+from runtime_logging import detail_level
+from runtime_mcp import (
+    gateway_credential_key,
+    get_gateway_tools,
+    initialize_mcp_tools,
+    initialize_mcp_tools_async,
+    lease_mcp_session,
+    lease_mcp_session_async,
+)
+from runtime_metrics import AGENT_SESSION_EVICTIONS, AGENT_SESSION_LOOKUPS, AGENT_SESSIONS
+from runtime_tracing import annotate
+
+logger = logging.getLogger(__name__)
+
+
+class LeasedMCPClient:
+    """MCPClient stand-in for cached agents; forwards to the session leased for the turn."""
+
+    def __init__(self):
+        self._client: Optional[MCPClient] = None
+
+    def bind(self, client: MCPClient) -> None:
+        self._client = client
+
+    def unbind(self) -> None:
+        self._client = None
+
+    def __getattr__(self, name: str):
+        client = self.__dict__.get("_client")
+        if client is None:
+            raise RuntimeError("No MCP session leased for this agent turn")
+        return getattr(client, name)
+
+
+class TurnLock:
+    """FIFO lock shared by handler threads and event-loop coroutines.
+
+    Waiters are queued in arrival order and the lock is handed directly to the
+    next one on release: threads block on an Event, coroutines await a future
+    without polling. A coroutine cancelled while waiting leaves the queue (or
+    passes the lock on if it had already been handed to it).
+    """
+
+    def __init__(self):
+        self._mutex = threading.Lock()
+        self._locked = False
+        self._waiters: "deque[Union[threading.Event, asyncio.Future]]" = deque()
+
+    def acquire(self) -> None:
+        with self._mutex:
+            if not self._locked:
+                self._locked = True
+                return
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+        waiter.wait()
+
+    async def acquire_async(self) -> None:
+        with self._mutex:
+            if not self._locked:
+                self._locked = True
+                return
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._mutex:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            # El lock ya se había entregado a este waiter: pasarlo al siguiente
+            self.release()
+            raise
+
+    def release(self) -> None:
+        with self._mutex:
+            if not self._waiters:
+                self._locked = False
+                return
+            # Entrega directa: el lock sigue tomado y pasa a ser del waiter
+            waiter = self._waiters.popleft()
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+        else:
+            waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+
+    def __enter__(self) -> "TurnLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.release()
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class HistorySizeTracker(HookProvider):
+    """Measures each message as Strands adds it, for the history size estimate."""
+
+    def __init__(self):
+        self.added_bytes = 0
+        self.added_messages = 0
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(MessageAddedEvent, self._message_added)
+
+    def _message_added(self, event: MessageAddedEvent) -> None:
+        try:
+            self.added_bytes += len(json.dumps(event.message, default=str))
+        except Exception:
+            pass
+        self.added_messages += 1
+
+    def estimate(self, message_count: int) -> int:
+        """Bytes of a history of message_count messages (the window drops old ones)."""
+        if not self.added_messages:
+            return 0
+        return self.added_bytes * message_count // self.added_messages
+
+
+@dataclass
+class AgentSession:
+    """A cached Agent and its bookkeeping."""
+
+    session_id: str
+    # Credential key of the caller that created the session
+    owner: str
+    mcp_client: LeasedMCPClient = field(default_factory=LeasedMCPClient)
+    agent: Optional[Agent] = None
+    # Serializes turns of the same session (FIFO, also for async waiters)
+    lock: TurnLock = field(default_factory=TurnLock)
+    history: HistorySizeTracker = field(default_factory=HistorySizeTracker)
+    last_used: float = field(default_factory=time.monotonic)
+    size_bytes: int = 0
+    turns: int = 0
+
+
+class AgentSessionStore:
+    """Thread-safe LRU of agent sessions with idle TTL, entry and memory caps."""
+
+    def __init__(
+        self,
+        max_entries: int = 100,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 1800.0,
+    ):
+        self._max_entries = max(1, max_entries)
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        # Least recently used first
+        self._entries: "OrderedDict[str, AgentSession]" = OrderedDict()
+        self._bytes = 0
+
+    @classmethod
+    def from_env(cls) -> "AgentSessionStore":
+        """Build a store configured from AGENT_SESSION_* environment variables."""
+        return cls(
+            max_entries=env_int("AGENT_SESSION_MAX_ENTRIES", 100),
+            max_bytes=env_int("AGENT_SESSION_MAX_BYTES", 64 * 1024 * 1024),
+            ttl=env_float("AGENT_SESSION_TTL", 1800.0),
+        )
+
+    def get_or_create(self, session_id: str, owner: str) -> AgentSession:
+        """Return the session entry, creating an empty one on a miss."""
+        with self._lock:
+            self._expire_locked()
+            entry = self._entries.get(session_id)
+
+            if entry is not None and entry.owner != owner:
+                # Never hand a conversation to a different caller
+                logger.warning(f"Session {session_id} reused with other credentials; resetting it")
+                self._remove_locked(session_id)
+                entry = None
+
+            if entry is not None:
+                AGENT_SESSION_LOOKUPS.inc(result="hit")
+                self._entries.move_to_end(session_id)
+                return entry
+
+            AGENT_SESSION_LOOKUPS.inc(result="miss")
+            entry = AgentSession(session_id=session_id, owner=owner)
+            self._entries[session_id] = entry
+            self._evict_locked(keep=session_id)
+            return entry
+
+    def put(self, entry: AgentSession) -> None:
+        """Record a finished turn: refresh recency and the history size estimate."""
+        size = _estimate_size(entry)
+        entry.last_used = time.monotonic()
+        entry.turns += 1
+
+        with self._lock:
+            current = self._entries.get(entry.session_id)
+            if current is not None and current is not entry:
+                # Replaced while this turn ran; keep the newer entry
+                return
+            if current is not None:
+                self._remove_locked(entry.session_id)
+
+            if size > self._max_bytes:
+                AGENT_SESSION_EVICTIONS.inc(reason="memory")
+                logger.warning(
+                    f"Session {entry.session_id} history ({size} bytes) exceeds "
+                    f"AGENT_SESSION_MAX_BYTES; not caching it"
+                )
+                return
+
+            entry.size_bytes = size
+            self._entries[entry.session_id] = entry
+            self._bytes += size
+            self._evict_locked(keep=entry.session_id)
+
+    def discard(self, entry: AgentSession) -> None:
+        """Drop an entry (e.g. after a failed turn left its history inconsistent)."""
+        with self._lock:
+            if self._entries.get(entry.session_id) is entry:
+                self._remove_locked(entry.session_id)
+
+    def stats(self) -> dict:
+        """Snapshot of store occupancy."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self._max_entries,
+                "max_bytes": self._max_bytes,
+            }
+
+    def _remove_locked(self, session_id: str) -> None:
+        entry = self._entries.pop(session_id)
+        self._bytes -= entry.size_bytes
+
+    def _expire_locked(self) -> None:
+        now = time.monotonic()
+        while self._entries:
+            session_id, entry = next(iter(self._entries.items()))
+            if now - entry.last_used <= self._ttl:
+                break
+            self._remove_locked(session_id)
+            AGENT_SESSION_EVICTIONS.inc(reason="ttl")
+
+    def _evict_locked(self, keep: str) -> None:
+        while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+            victim = next((sid for sid in self._entries if sid != keep), None)
+            if victim is None:
+                break
+            reason = "lru" if len(self._entries) > self._max_entries else "memory"
+            self._remove_locked(victim)
+            AGENT_SESSION_EVICTIONS.inc(reason=reason)
+
+
+def _estimate_size(entry: AgentSession) -> int:
+    # Tamaño medio de los mensajes medidos al añadirse por los que quedan en la ventana
+    if entry.agent is None:
+        return 0
+    return entry.history.estimate(len(entry.agent.messages))
+
+
+_session_store: Optional[AgentSessionStore] = None
+_session_store_lock = threading.Lock()
+
+
+def get_session_store() -> AgentSessionStore:
+    """Get or create the process-wide agent session store."""
+    global _session_store
+
+    if _session_store is None:
+        with _session_store_lock:
+            if _session_store is None:
+                _session_store = AgentSessionStore.from_env()
+                AGENT_SESSIONS.set_function(_store_gauge_values)
+
+    return _session_store
+
+
+def _store_gauge_values() -> dict:
+    stats = _session_store.stats() if _session_store is not None else {}
+    return {("entries",): stats.get("entries", 0), ("bytes",): stats.get("bytes", 0)}
+
+
+def _bind_agent(entry: AgentSession, client: MCPClient) -> Agent:
+    entry.mcp_client.bind(client)
+    annotate(**{"agent.reused": entry.agent is not None, "agent.session_turn": entry.turns + 1})
+    if entry.agent is None:
+        # Catalog fetches use the real session; the agent's tools use the facade
+        tools = [
+            MCPAgentTool(tool.mcp_tool, entry.mcp_client)
+            for tool in get_gateway_tools(client)
+        ]
+        entry.agent = create_agent(tools)
+        entry.agent.hooks.add_hook(entry.history)
+    else:
+        logger.log(
+            detail_level(),
+            "Reusing agent for session %s (turn %d, %d message(s))",
+            entry.session_id,
+            entry.turns + 1,
+            len(entry.agent.messages),
+        )
+    return entry.agent
+
+
+def _finish_turn(entry: AgentSession, failed: bool) -> None:
+    entry.mcp_client.unbind()
+    store = get_session_store()
+    if failed or entry.agent is None:
+        store.discard(entry)
+    else:
+        store.put(entry)
+
+
+@contextmanager
+def checkout_agent(session_id: Optional[str]) -> Iterator[Agent]:
+    """Yield the session's warm Agent (one-off Agent when there is no session id)."""
+    if not session_id or session_id == "unknown":
+        with initialize_mcp_tools() as tools:
+            yield create_agent(tools)
+        return
+
+    entry = get_session_store().get_or_create(session_id, gateway_credential_key())
+    with entry.lock:
+        failed = True
+        try:
+            with lease_mcp_session() as mcp_session:
+                yield _bind_agent(entry, mcp_session.client)
+            failed = False
+        finally:
+            _finish_turn(entry, failed)
+
+
+@asynccontextmanager
+async def checkout_agent_async(session_id: Optional[str]) -> AsyncIterator[Agent]:
+    """Async variant of checkout_agent; agent construction runs off the event loop."""
+    if not session_id or session_id == "unknown":
+        async with initialize_mcp_tools_async() as tools:
+            yield await asyncio.to_thread(create_agent, tools)
+        return
+
+    entry = get_session_store().get_or_create(session_id, gateway_credential_key())
+    await entry.lock.acquire_async()
+    try:
+        failed = True
+        try:
+            async with lease_mcp_session_async() as mcp_session:
+                # Puede listar tools (list_tools_sync) y crear el agente: ambos bloquean
+                yield await asyncio.to_thread(_bind_agent, entry, mcp_session.client)
+            failed = False
+        finally:
+            _finish_turn(entry, failed)
+    finally:
+        entry.lock.release()
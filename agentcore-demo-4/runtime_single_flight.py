@@ -0,0 +1,86 @@
+"""
+Single-flight: concurrent identical calls share one in-flight execution.
+
+Gateway tool calls are keyed by normalized tool name and canonical arguments
+(GraphQL whitespace collapsed, JSON keys sorted); while a call with that key
+is running, identical calls wait for its result instead of issuing their own
+request. Callers may run on different event loops (sync invocations run each
+agent on its own loop), so the shared slot is a concurrent.futures.Future.
+"""
+
+import asyncio
+import json
+import re
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Strings are kept verbatim; whitespace around punctuators is dropped, other runs become one space
+_GRAPHQL_WHITESPACE = re.compile(r'("(?:\\.|[^"\\])*")|\s*([{}()\[\]:,!=@$|])\s*|\s+')
+
+
+def normalize_graphql(query: str) -> str:
+    """Whitespace-insensitive form of a GraphQL document."""
+    return _GRAPHQL_WHITESPACE.sub(
+        lambda m: m.group(1) or m.group(2) or " ", query
+    ).strip()
+
+
+def canonical_tool_key(name: str, arguments: Any, scope: Optional[str] = None) -> str:
+    """Key of a tool call: normalized name, canonical arguments and optional scope."""
+    if isinstance(arguments, dict) and isinstance(arguments.get("query"), str):
+        arguments = {**arguments, "query": normalize_graphql(arguments["query"])}
+    canonical = json.dumps(arguments, sort_keys=True, separators=(",", ":"), default=str)
+    return f"{scope or ''}|{name.strip().lower()}|{canonical}"
+
+
+class SingleFlight:
+    """Coalesces concurrent async calls with the same key."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Run fn once per key at a time; returns (result, shared with a running call)."""
+        while True:
+            with self._lock:
+                slot = self._calls.get(key)
+                leader = slot is None
+                if leader:
+                    slot = Future()
+                    self._calls[key] = slot
+
+            if leader:
+                return await self._lead(key, slot, fn), False
+
+            try:
+                # Shielded: a cancelled follower must not cancel the shared slot
+                return await asyncio.shield(asyncio.wrap_future(slot)), True
+            except asyncio.CancelledError:
+                if not slot.cancelled():
+                    raise
+                # The leader was cancelled; retry (possibly as the new leader)
+
+    async def _lead(self, key: Hashable, slot: Future, fn: Callable[[], Awaitable[T]]) -> T:
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            slot.cancel()
+            raise
+        except BaseException as e:
+            slot.set_exception(e)
+            raise
+        else:
+            slot.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                if self._calls.get(key) is slot:
+                    del self._calls[key]
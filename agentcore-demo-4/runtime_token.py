@@ -0,0 +1,286 @@
+"""
+Service token manager: cached Cognito access token for Gateway calls.
+
+Used when the request carries no inbound token. A background thread reads the
+token from .cognito-token.json or obtains it with a client_credentials grant,
+and renews it TOKEN_REFRESH_AHEAD seconds before its `exp`. Failed refreshes
+back off exponentially. Requests only read the cached token, so they never
+wait on Cognito.
+"""
+
+import base64
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import requests
+
+from runtime_config import TOKEN_FILE, env_float, get_aws_session, get_runtime_config
+from runtime_metrics import TOKEN_REFRESHES
+from runtime_tracing import annotate, start_span
+
+logger = logging.getLogger(__name__)
+
+# Lifetime assumed for tokens that carry neither `exp` nor `expires_in`
+DEFAULT_TOKEN_LIFETIME = 3600.0
+
+
+@dataclass(frozen=True)
+class CachedToken:
+    """An access token and the wall-clock time it expires."""
+
+    value: str
+    expires_at: float
+    source: str
+
+
+def decode_jwt_exp(token: str) -> Optional[float]:
+    """Read the `exp` claim without verifying the signature."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        exp = claims.get("exp")
+        return float(exp) if exp is not None else None
+    except Exception:
+        return None
+
+
+def _preview(token: str) -> str:
+    return f"{token[:20]}...{token[-10:]}" if len(token) > 30 else token[:30]
+
+
+class ServiceTokenManager:
+    """Process-wide token cache; only the background refresher talks to Cognito."""
+
+    def __init__(
+        self,
+        refresh_ahead: float = 300.0,
+        retry_min: float = 5.0,
+        retry_max: float = 300.0,
+    ):
+        # The background thread refreshes this long before expiry
+        self._refresh_ahead = refresh_ahead
+        # Backoff between failed refreshes (negative cache)
+        self._retry_min = max(0.1, retry_min)
+        self._retry_max = max(self._retry_min, retry_max)
+        self._token: Optional[CachedToken] = None
+        # Token the Gateway answered 401 to; not reloaded from the file again
+        self._rejected: Optional[str] = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self._first_attempt = threading.Event()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        self._stopped = False
+
+    @classmethod
+    def from_env(cls) -> "ServiceTokenManager":
+        """Build a manager configured from TOKEN_REFRESH_* environment variables."""
+        return cls(
+            refresh_ahead=env_float("TOKEN_REFRESH_AHEAD", 300.0),
+            retry_min=env_float("TOKEN_REFRESH_RETRY_MIN", 5.0),
+            retry_max=env_float("TOKEN_REFRESH_RETRY_MAX", 300.0),
+        )
+
+    def get_token(self) -> tuple[Optional[str], str]:
+        """Return (token, source) from the cache; never blocks.
+
+        The token is handed out until its `exp`; renewing it ahead of time is
+        the refresher's job.
+        """
+        self._ensure_refresher()
+        cached = self._token
+        if cached is None or time.time() >= cached.expires_at:
+            return None, "none"
+        return cached.value, cached.source
+
+    def wait_for_token(self, timeout: float) -> tuple[Optional[str], str]:
+        """Cold start: wait (bounded) for the refresher's first attempt, then get_token()."""
+        self._ensure_refresher()
+        self._first_attempt.wait(timeout)
+        return self.get_token()
+
+    def invalidate(self, token: Optional[str] = None) -> None:
+        """Forget the cached token after the Gateway rejected it; the refresher fetches a new one.
+
+        With `token`, only if it is still the cached one (a late 401 for an old
+        token does not discard a fresh one). Never blocks.
+        """
+        cached = self._token
+        if cached is None or (token is not None and token != cached.value):
+            return
+        self._rejected = cached.value
+        self._token = None
+        logger.warning(f"Service token rejected by the Gateway (source: {cached.source}), refreshing")
+        self._wakeup.set()
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wakeup.set()
+
+    def _ensure_refresher(self) -> None:
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        with self._start_lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._refresher = threading.Thread(
+                target=self._refresh_loop, name="token-refresher", daemon=True
+            )
+            self._refresher.start()
+
+    def _refresh_loop(self) -> None:
+        while not self._stopped:
+            now = time.time()
+            cached = self._token
+            if now < self._retry_at:
+                # Backoff tras un fallo; invalidate() no lo acorta
+                self._sleep(self._retry_at - now)
+                continue
+            if cached is not None and cached.expires_at - self._refresh_ahead > now:
+                self._sleep(cached.expires_at - self._refresh_ahead - now)
+                continue
+
+            try:
+                fresh = self._refresh(cached)
+            except Exception as e:
+                logger.warning(f"Background token refresh failed: {e}")
+                fresh = None
+            finally:
+                self._first_attempt.set()
+
+            if fresh is not None:
+                self._token = fresh
+                self._failures = 0
+                self._retry_at = 0.0
+            else:
+                self._failures += 1
+                delay = min(self._retry_max, self._retry_min * 2 ** (self._failures - 1))
+                self._retry_at = time.time() + delay
+                logger.warning(
+                    f"No newer service token available (attempt {self._failures}); retrying in {delay:.1f}s"
+                )
+
+    def _refresh(self, cached: Optional[CachedToken]) -> Optional[CachedToken]:
+        # Solo desde el hilo de fondo: el archivo primero, Cognito si no trae uno vigente
+        from_file = self._load_from_file()
+        if self._newer(from_file, cached) and from_file.expires_at - self._refresh_ahead > time.time():
+            return from_file
+        from_cognito = self._fetch_from_cognito()
+        if self._newer(from_cognito, cached):
+            return from_cognito
+        # Cognito no disponible: mejor un token del archivo a punto de renovar que ninguno
+        return from_file if self._newer(from_file, cached) else None
+
+    def _newer(self, candidate: Optional[CachedToken], cached: Optional[CachedToken]) -> bool:
+        if candidate is None or candidate.value == self._rejected or time.time() >= candidate.expires_at:
+            return False
+        return cached is None or candidate.expires_at > cached.expires_at
+
+    def _sleep(self, seconds: float) -> None:
+        self._wakeup.wait(seconds)
+        self._wakeup.clear()
+
+    def _load_from_file(self) -> Optional[CachedToken]:
+        # Contenido ya leído por el RuntimeConfig (se recarga cuando cambia el archivo)
+        config = get_runtime_config()
+        token_data = config.token_file
+        token = token_data.get("access_token")
+        if not token:
+            return None
+
+        expires_at = decode_jwt_exp(token)
+        if expires_at is None:
+            expires_at = (config.token_file_mtime or time.time()) + float(
+                token_data.get("expires_in", DEFAULT_TOKEN_LIFETIME)
+            )
+        if time.time() >= expires_at:
+            logger.info(f"Token in {TOKEN_FILE} is expired, ignoring it")
+            return None
+
+        logger.info(
+            f"JWT token loaded from {TOKEN_FILE} (length: {len(token)}, preview: {_preview(token)})"
+        )
+        return CachedToken(value=token, expires_at=expires_at, source="file")
+
+    def _fetch_from_cognito(self) -> Optional[CachedToken]:
+        cognito_info = get_runtime_config().cognito_info
+        if not cognito_info:
+            return None
+        try:
+            user_pool_id = cognito_info.get("userPoolId")
+            client_id = cognito_info.get("clientId")
+            client_secret = cognito_info.get("clientSecret")
+            scope_string = cognito_info.get("scopeString", "")
+
+            if not (user_pool_id and client_id):
+                return None
+
+            cognito_domain = cognito_info.get("cognitoDomain")
+            if not cognito_domain:
+                region = get_aws_session().region_name or "us-east-1"
+                domain_prefix = user_pool_id.replace("_", "-").lower()
+                cognito_domain = f"{domain_prefix}.auth.{region}.amazoncognito.com"
+
+            token_url = f"https://{cognito_domain}/oauth2/token"
+
+            auth_string = f"{client_id}:{client_secret}" if client_secret else client_id
+            auth_b64 = base64.b64encode(auth_string.encode("utf-8")).decode("utf-8")
+
+            headers = {
+                "Content-Type": "application/x-www-form-urlencoded",
+                "Authorization": f"Basic {auth_b64}",
+            }
+
+            data = {"grant_type": "client_credentials"}
+            with start_span("auth.service_token", **{"url.full": token_url}):
+                response = requests.post(token_url, headers=headers, data=data, timeout=30)
+
+                if response.status_code != 200 and scope_string:
+                    data["scope"] = scope_string
+                    response = requests.post(token_url, headers=headers, data=data, timeout=30)
+                annotate(**{"http.response.status_code": response.status_code})
+
+            response.raise_for_status()
+            token_data = response.json()
+            token = token_data.get("access_token")
+            if not token:
+                return None
+
+            expires_at = decode_jwt_exp(token) or time.time() + float(
+                token_data.get("expires_in", DEFAULT_TOKEN_LIFETIME)
+            )
+            TOKEN_REFRESHES.inc()
+            logger.info(
+                f"JWT token obtained from Cognito (length: {len(token)}, preview: {_preview(token)}, "
+                f"expires in {expires_at - time.time():.0f}s)"
+            )
+            logger.info(f"Token refresh count: {TOKEN_REFRESHES.total():.0f}")
+            return CachedToken(value=token, expires_at=expires_at, source="cognito")
+
+        except Exception as e:
+            # Sin traceback: el refresher reintenta con backoff y lo registraría en cada intento
+            logger.warning(f"Failed to get token from Cognito: {type(e).__name__}: {e}")
+            logger.debug("Cognito token request failed", exc_info=True)
+            return None
+
+
+_token_manager: Optional[ServiceTokenManager] = None
+_token_manager_lock = threading.Lock()
+
+
+def get_token_manager() -> ServiceTokenManager:
+    """Get or create the process-wide service token manager."""
+    global _token_manager
+
+    if _token_manager is None:
+        with _token_manager_lock:
+            if _token_manager is None:
+                _token_manager = ServiceTokenManager.from_env()
+
+    return _token_manager
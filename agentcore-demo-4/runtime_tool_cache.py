@@ -0,0 +1,183 @@
+"""
+MCP tool-result cache: reuse Gateway tool results across turns and users.
+
+Results are keyed by tool name and canonical arguments (see
+runtime_single_flight.canonical_tool_key), plus an optional scope: the
+Gateway credentials (default), the runtime session, or nothing (global).
+Each tool has a policy: a TTL (0 disables caching for it) and whether
+GraphQL mutations may be cached. Only successful results are stored, and
+GraphQL bodies carrying `errors` are never stored. The cache is an LRU bounded
+by entry count and estimated size.
+
+Policies come from TOOL_CACHE_POLICY (JSON, keyed by tool or operation name,
+"*" for the default), e.g.:
+
+    {"executeGraphQLQuery": {"ttl": 600}, "*": {"ttl": 0}}
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from runtime_config import env_float, env_int
+from runtime_metrics import TOOL_CACHE_BYTES, TOOL_CACHE_EVICTIONS, TOOL_CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ToolCachePolicy:
+    """Caching rules of one tool."""
+
+    # Seconds a result stays valid; 0 disables caching
+    ttl: float = 0.0
+    cache_mutations: bool = False
+
+    def allows(self, arguments: Any) -> bool:
+        if self.ttl <= 0:
+            return False
+        query = arguments.get("query") if isinstance(arguments, dict) else None
+        if isinstance(query, str) and not self.cache_mutations:
+            return not query.lstrip().lower().startswith("mutation")
+        return True
+
+
+@dataclass
+class _CachedResult:
+    result: dict
+    expires_at: float
+    size_bytes: int
+
+
+def is_cacheable_result(result: dict) -> bool:
+    """Successful tool results whose GraphQL body (if any) has no errors."""
+    if result.get("status") != "success":
+        return False
+    for block in result.get("content", []):
+        text = block.get("text")
+        if text and text.lstrip().startswith("{"):
+            try:
+                body = json.loads(text)
+            except ValueError:
+                continue
+            if isinstance(body, dict) and body.get("errors"):
+                return False
+    return True
+
+
+class ToolResultCache:
+    """Thread-safe LRU of tool results with per-tool TTL and a memory bound."""
+
+    def __init__(
+        self,
+        policies: Optional[dict[str, ToolCachePolicy]] = None,
+        max_entries: int = 1000,
+        max_bytes: int = 32 * 1024 * 1024,
+    ):
+        self._policies = policies if policies is not None else {"executeGraphQLQuery": ToolCachePolicy(ttl=300.0)}
+        self._max_entries = max(1, max_entries)
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Least recently used first
+        self._entries: "OrderedDict[str, _CachedResult]" = OrderedDict()
+        self._bytes = 0
+
+    @classmethod
+    def from_env(cls) -> "ToolResultCache":
+        """Build a cache configured from TOOL_CACHE_* environment variables."""
+        policies = {"executeGraphQLQuery": ToolCachePolicy(ttl=env_float("TOOL_CACHE_TTL", 300.0))}
+        raw = os.getenv("TOOL_CACHE_POLICY")
+        if raw:
+            try:
+                policies = {
+                    name: ToolCachePolicy(
+                        ttl=float(rule.get("ttl", 0)),
+                        cache_mutations=bool(rule.get("cache_mutations", False)),
+                    )
+                    for name, rule in json.loads(raw).items()
+                }
+            except (ValueError, AttributeError, TypeError) as e:
+                logger.warning(f"Invalid TOOL_CACHE_POLICY ({e}); using defaults")
+        return cls(
+            policies=policies,
+            max_entries=env_int("TOOL_CACHE_MAX_ENTRIES", 1000),
+            max_bytes=env_int("TOOL_CACHE_MAX_BYTES", 32 * 1024 * 1024),
+        )
+
+    def policy_for(self, tool_name: str) -> ToolCachePolicy:
+        """Policy by full tool name, then Gateway operation name (<target>___<op>), then "*"."""
+        operation = tool_name.split("___")[-1]
+        for name in (tool_name, operation, "*"):
+            if name in self._policies:
+                return self._policies[name]
+        return ToolCachePolicy()
+
+    def get(self, key: str, tool: str) -> Optional[dict]:
+        """Cached result for key, or None on a miss or an expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove_locked(key)
+                TOOL_CACHE_EVICTIONS.inc(reason="ttl")
+                entry = None
+            if entry is None:
+                TOOL_CACHE_LOOKUPS.inc(tool=tool, result="miss")
+                return None
+            self._entries.move_to_end(key)
+
+        TOOL_CACHE_LOOKUPS.inc(tool=tool, result="hit")
+        TOOL_CACHE_BYTES.inc(entry.size_bytes, tool=tool)
+        return entry.result
+
+    def put(self, key: str, result: dict, ttl: float) -> None:
+        """Store a result (without its toolUseId) for ttl seconds."""
+        stored = {k: v for k, v in result.items() if k != "toolUseId"}
+        size = len(json.dumps(stored, default=str))
+        if size > self._max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove_locked(key)
+            self._entries[key] = _CachedResult(stored, time.monotonic() + ttl, size)
+            self._bytes += size
+            self._evict_locked(keep=key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Snapshot of cache occupancy."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self._max_entries,
+                "max_bytes": self._max_bytes,
+            }
+
+    def _remove_locked(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size_bytes
+
+    def _evict_locked(self, keep: str) -> None:
+        now = time.monotonic()
+        while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+            victim = next((k for k in self._entries if k != keep), None)
+            if victim is None:
+                break
+            if self._entries[victim].expires_at <= now:
+                reason = "ttl"
+            elif len(self._entries) > self._max_entries:
+                reason = "lru"
+            else:
+                reason = "memory"
+            self._remove_locked(victim)
+            TOOL_CACHE_EVICTIONS.inc(reason=reason)
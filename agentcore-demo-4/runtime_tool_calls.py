@@ -0,0 +1,133 @@
+"""
+Agent hook accounting: tool calls and model call latency from Strands hooks.
+
+A ToolCallRecorder is registered on every agent. The handler passes a list in
+the invocation state (`invocation_state={"tool_calls": calls}`) and the
+recorder appends one ToolCallRecord per executed tool, so cached agents can be
+shared across turns without mixing their accounting. ModelCallTimer feeds the
+model_call latency histogram.
+"""
+
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from strands.hooks import (
+    AfterModelCallEvent,
+    AfterToolCallEvent,
+    BeforeModelCallEvent,
+    BeforeToolCallEvent,
+    HookProvider,
+    HookRegistry,
+)
+
+from runtime_logging import log_stage
+from runtime_metrics import STAGE_LATENCY, TOOL_CALLS, TOOL_RESULT_BYTES
+
+logger = logging.getLogger(__name__)
+
+TOOL_CALLS_KEY = "tool_calls"
+# Runtime session of the invocation (tool-result cache scoping)
+SESSION_ID_KEY = "session_id"
+
+
+@dataclass
+class ToolCallRecord:
+    """One executed tool call."""
+
+    tool_use_id: str
+    name: str
+    arguments: Any
+    duration: float
+    result_bytes: int
+    status: str
+    error: Optional[str] = None
+
+
+class ToolCallRecorder(HookProvider):
+    """Records tool calls into the invocation state's `tool_calls` list."""
+
+    def __init__(self):
+        self._started: dict[str, float] = {}
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(BeforeToolCallEvent, self._before_tool_call)
+        registry.add_callback(AfterToolCallEvent, self._after_tool_call)
+
+    def _before_tool_call(self, event: BeforeToolCallEvent) -> None:
+        self._started[event.tool_use["toolUseId"]] = time.perf_counter()
+
+    def _after_tool_call(self, event: AfterToolCallEvent) -> None:
+        tool_use_id = event.tool_use["toolUseId"]
+        started = self._started.pop(tool_use_id, None)
+        duration = time.perf_counter() - started if started is not None else 0.0
+        name = event.tool_use["name"]
+        result = event.result or {}
+        status = result.get("status", "error")
+        result_bytes = _result_bytes(result)
+
+        TOOL_CALLS.inc(tool=name, status=status)
+        TOOL_RESULT_BYTES.inc(result_bytes, tool=name)
+        STAGE_LATENCY.observe(duration, stage="tool_call")
+        log_stage(logger, "tool_call", duration, tool=name, status=status, bytes=result_bytes)
+
+        calls = event.invocation_state.get(TOOL_CALLS_KEY)
+        if calls is None:
+            return
+
+        error = None
+        if event.exception is not None:
+            error = f"{type(event.exception).__name__}: {event.exception}"
+        elif event.cancel_message:
+            error = event.cancel_message
+        elif status == "error":
+            error = _result_text(result)[:200]
+
+        calls.append(
+            ToolCallRecord(
+                tool_use_id=tool_use_id,
+                name=name,
+                arguments=event.tool_use.get("input"),
+                duration=duration,
+                result_bytes=result_bytes,
+                status=status,
+                error=error,
+            )
+        )
+
+
+class ModelCallTimer(HookProvider):
+    """Observes each model call of the agent (calls of one agent never overlap)."""
+
+    def __init__(self):
+        self._started: Optional[float] = None
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(BeforeModelCallEvent, self._before_model_call)
+        registry.add_callback(AfterModelCallEvent, self._after_model_call)
+
+    def _before_model_call(self, event: BeforeModelCallEvent) -> None:
+        self._started = time.perf_counter()
+
+    def _after_model_call(self, event: AfterModelCallEvent) -> None:
+        if self._started is not None:
+            elapsed = time.perf_counter() - self._started
+            STAGE_LATENCY.observe(elapsed, stage="model_call")
+            log_stage(logger, "model_call", elapsed)
+            self._started = None
+
+
+def _result_text(result: dict) -> str:
+    return "".join(block.get("text", "") for block in result.get("content", []))
+
+
+def _result_bytes(result: dict) -> int:
+    size = 0
+    for block in result.get("content", []):
+        if "text" in block:
+            size += len(block["text"].encode("utf-8"))
+        elif "json" in block:
+            size += len(json.dumps(block["json"], default=str))
+    return size
@@ -0,0 +1,242 @@
+"""
+MCP tool catalog cache: tool definitions per Gateway URL with TTL.
+
+The Gateway catalog rarely changes, so `tools/list` is only called when the
+catalog for a Gateway is missing. Stale entries are still served while a
+background thread refreshes them. Every fetch is persisted to a snapshot file
+off the request path; deploy.sh writes one before the image is built (see
+snapshot-tool-catalog.py) so a cold container can build its agent without the
+round trip.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, ContextManager, Dict, Optional
+
+from mcp.types import Tool as MCPTool
+from strands.tools.mcp import MCPAgentTool, MCPClient
+
+from runtime_config import env_bool, env_float
+from runtime_metrics import STAGE_LATENCY, TOOL_CATALOG_LOOKUPS, TOOL_CATALOG_REFRESHES
+from runtime_tracing import annotate, start_span
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+# Borrows an MCPClient of its own for a background refresh (e.g. from the session pool)
+ClientLease = Callable[[], ContextManager[MCPClient]]
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """Tool definitions fetched from one Gateway."""
+
+    tools: tuple[MCPTool, ...]
+    # Wall-clock time so snapshot ages survive restarts
+    fetched_at: float
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class ToolCatalog:
+    """Thread-safe cache of MCP tool definitions keyed by Gateway URL."""
+
+    def __init__(
+        self,
+        ttl: float = 3600.0,
+        snapshot_path: Optional[str] = None,
+        background_refresh: bool = True,
+    ):
+        self._ttl = ttl
+        self._snapshot_path = snapshot_path
+        self._background_refresh = background_refresh
+        self._lock = threading.Lock()
+        # Serializes snapshot writes (request misses and refreshes run in different threads)
+        self._save_lock = threading.Lock()
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._refreshing: set[str] = set()
+
+    @classmethod
+    def from_env(cls) -> "ToolCatalog":
+        """Build a catalog configured from MCP_TOOL_CATALOG_* environment variables."""
+        catalog = cls(
+            ttl=env_float("MCP_TOOL_CATALOG_TTL", 3600.0),
+            snapshot_path=os.getenv(
+                "MCP_TOOL_CATALOG_SNAPSHOT", ".mcp-tool-catalog.json"
+            )
+            or None,
+            background_refresh=env_bool("MCP_TOOL_CATALOG_BACKGROUND_REFRESH", True),
+        )
+        catalog.load_snapshot()
+        return catalog
+
+    def get_tools(self, gateway_url: str, client: MCPClient, lease: Optional[ClientLease] = None) -> list:
+        """Return agent tools for gateway_url bound to client, fetching only on a miss.
+
+        A stale entry is refreshed in the background through a client borrowed
+        with `lease`, never through `client`: the caller owns that one only for
+        the duration of its request. Without `lease` it is refreshed inline.
+        """
+        with self._lock:
+            entry = self._entries.get(gateway_url)
+
+        annotate(**{"tool_catalog.result": "miss" if entry is None else "hit"})
+        if entry is None:
+            TOOL_CATALOG_LOOKUPS.inc(result="miss")
+            entry = self._fetch(gateway_url, client)
+            self._publish_in_background(entry)
+        else:
+            TOOL_CATALOG_LOOKUPS.inc(result="hit")
+            if entry.age() > self._ttl:
+                if self._background_refresh and lease is not None:
+                    self._schedule_refresh(gateway_url, lease)
+                else:
+                    entry = self._fetch(gateway_url, client)
+                    self._publish_in_background(entry)
+
+        return [MCPAgentTool(tool, client) for tool in entry.tools]
+
+    def refresh(self, gateway_url: str, client: MCPClient) -> int:
+        """Fetch the catalog for gateway_url and write the snapshot before returning.
+
+        Used outside the request path (snapshot-tool-catalog.py at deploy time);
+        returns the number of tools.
+        """
+        entry = self._fetch(gateway_url, client)
+        self._publish(entry)
+        return len(entry.tools)
+
+    def invalidate(self, gateway_url: Optional[str] = None) -> None:
+        """Drop the cached catalog for gateway_url, or for every Gateway."""
+        with self._lock:
+            if gateway_url is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(gateway_url, None)
+        logger.info(f"Tool catalog invalidated: {gateway_url or 'all gateways'}")
+
+    def load_snapshot(self) -> int:
+        """Load cached catalogs from the snapshot file; returns the entry count."""
+        path = self._snapshot_path
+        if not path or not os.path.exists(path):
+            return 0
+
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            if data.get("version") != SNAPSHOT_VERSION:
+                logger.warning(f"Ignoring tool catalog snapshot {path}: unknown version")
+                return 0
+
+            entries = {
+                url: CatalogEntry(
+                    tools=tuple(MCPTool.model_validate(t) for t in item["tools"]),
+                    fetched_at=float(item["fetched_at"]),
+                )
+                for url, item in data.get("entries", {}).items()
+            }
+        except Exception as e:
+            logger.warning(f"Could not load tool catalog snapshot {path}: {e}")
+            return 0
+
+        with self._lock:
+            for url, entry in entries.items():
+                self._entries.setdefault(url, entry)
+
+        logger.info(f"Tool catalog warm-started from {path}: {len(entries)} gateway(s)")
+        return len(entries)
+
+    def save_snapshot(self) -> None:
+        """Atomically write the current catalogs to the snapshot file."""
+        path = self._snapshot_path
+        if not path:
+            return
+
+        with self._lock:
+            data = {
+                "version": SNAPSHOT_VERSION,
+                "entries": {
+                    url: {
+                        "fetched_at": entry.fetched_at,
+                        "tools": [
+                            t.model_dump(mode="json", by_alias=True, exclude_none=True)
+                            for t in entry.tools
+                        ],
+                    }
+                    for url, entry in self._entries.items()
+                },
+            }
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with self._save_lock:
+            try:
+                with open(tmp_path, "w") as f:
+                    json.dump(data, f, indent=2)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                # Read-only image filesystems are expected in AWS
+                logger.debug(f"Could not write tool catalog snapshot {path}: {e}")
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def _fetch(self, gateway_url: str, client: MCPClient) -> CatalogEntry:
+        start = time.time()
+        with start_span("mcp.list_tools", **{"mcp.gateway_url": gateway_url}):
+            tools = client.list_tools_sync()
+            annotate(**{"mcp.tools": len(tools)})
+        entry = CatalogEntry(
+            tools=tuple(tool.mcp_tool for tool in tools),
+            fetched_at=time.time(),
+        )
+
+        with self._lock:
+            self._entries[gateway_url] = entry
+        STAGE_LATENCY.observe(entry.fetched_at - start, stage="tool_listing")
+        return entry
+
+    def _publish(self, entry: CatalogEntry) -> None:
+        """Log the tool listing and persist the snapshot (file I/O, never on a request)."""
+        logger.info("=" * 80)
+        logger.info(f"MCP TOOL CATALOG LOADED: {len(entry.tools)} tool(s)")
+        for i, tool in enumerate(entry.tools, 1):
+            logger.info(f"  {i}. {tool.name}")
+            logger.info(f"     Description: {(tool.description or 'No description')[:100]}...")
+        logger.info("=" * 80)
+
+        self.save_snapshot()
+
+    def _publish_in_background(self, entry: CatalogEntry) -> None:
+        threading.Thread(
+            target=self._publish, args=(entry,), name="tool-catalog-snapshot", daemon=True
+        ).start()
+
+    def _schedule_refresh(self, gateway_url: str, lease: ClientLease) -> None:
+        with self._lock:
+            if gateway_url in self._refreshing:
+                return
+            self._refreshing.add(gateway_url)
+
+        def refresh() -> None:
+            try:
+                with lease() as client:
+                    entry = self._fetch(gateway_url, client)
+                TOOL_CATALOG_REFRESHES.inc()
+                self._publish(entry)
+            except Exception as e:
+                # Keep serving the stale catalog; the next request retries
+                logger.warning(f"Background tool catalog refresh failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(gateway_url)
+
+        threading.Thread(
+            target=refresh, name="tool-catalog-refresh", daemon=True
+        ).start()
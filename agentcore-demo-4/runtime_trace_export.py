@@ -0,0 +1,170 @@
+"""
+OTLP/JSON span exporters: a JSON-lines file and an OTLP/HTTP collector.
+
+Both write ExportTraceServiceRequest objects in the OTLP/JSON encoding (hex
+trace/span ids, int64 as strings), the format read by the OpenTelemetry
+Collector `otlpjsonfile` receiver and accepted by any OTLP/HTTP endpoint with
+Content-Type application/json. Imported by runtime_tracing only when tracing
+is enabled; export() runs on the BatchSpanProcessor thread.
+"""
+
+import json
+import logging
+import threading
+import urllib.parse
+import urllib.request
+from typing import Any, Optional, Sequence
+
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+from runtime_metrics import TRACE_SPANS_EXPORTED
+
+logger = logging.getLogger(__name__)
+
+# SpanKind de opentelemetry-api (INTERNAL=0...) -> enum de OTLP (INTERNAL=1...)
+_OTLP_SPAN_KIND_OFFSET = 1
+
+
+def _any_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # int64 va como string en OTLP/JSON
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_any_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+
+def _attributes(attributes: Any) -> list:
+    return [{"key": key, "value": _any_value(value)} for key, value in (attributes or {}).items()]
+
+
+def _encode_span(span: ReadableSpan, include_content: bool) -> dict:
+    context = span.context
+    data: dict = {
+        "traceId": format(context.trace_id, "032x"),
+        "spanId": format(context.span_id, "016x"),
+        "name": span.name,
+        "kind": span.kind.value + _OTLP_SPAN_KIND_OFFSET,
+        "startTimeUnixNano": str(span.start_time),
+        "endTimeUnixNano": str(span.end_time),
+        "attributes": _attributes(span.attributes),
+        "status": {"code": span.status.status_code.value},
+    }
+    if span.parent is not None:
+        data["parentSpanId"] = format(span.parent.span_id, "016x")
+    if context.trace_state:
+        data["traceState"] = context.trace_state.to_header()
+    if span.status.description:
+        data["status"]["message"] = span.status.description
+    events = [
+        {"timeUnixNano": str(event.timestamp), "name": event.name, "attributes": _attributes(event.attributes)}
+        for event in span.events
+        # Eventos gen_ai.* de Strands: prompts, respuestas y argumentos de tools
+        if include_content or not event.name.startswith("gen_ai.")
+    ]
+    if events:
+        data["events"] = events
+    if span.links:
+        data["links"] = [
+            {
+                "traceId": format(link.context.trace_id, "032x"),
+                "spanId": format(link.context.span_id, "016x"),
+                "attributes": _attributes(link.attributes),
+            }
+            for link in span.links
+        ]
+    return data
+
+
+def encode_spans(spans: Sequence[ReadableSpan], include_content: bool = False) -> dict:
+    """ExportTraceServiceRequest (OTLP/JSON), spans grouped by resource and scope."""
+    resources: dict = {}
+    for span in spans:
+        _, scopes = resources.setdefault(id(span.resource), (span.resource, {}))
+        scope = span.instrumentation_scope
+        scope_key = (scope.name, scope.version) if scope else ("", None)
+        scopes.setdefault(scope_key, []).append(_encode_span(span, include_content))
+
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": _attributes(resource.attributes)},
+                "scopeSpans": [
+                    {"scope": {"name": name, **({"version": version} if version else {})}, "spans": encoded}
+                    for (name, version), encoded in scopes.items()
+                ],
+            }
+            for resource, scopes in resources.values()
+        ]
+    }
+
+
+class OtlpJsonFileExporter(SpanExporter):
+    """Appends one ExportTraceServiceRequest per batch as a JSON line."""
+
+    def __init__(self, path: str, include_content: bool = False):
+        self.path = path
+        self._include_content = include_content
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        line = json.dumps(encode_spans(spans, self._include_content), ensure_ascii=False, separators=(",", ":"))
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            logger.warning(f"Could not write spans to {self.path}: {e}")
+            TRACE_SPANS_EXPORTED.inc(len(spans), exporter="file", result="failed")
+            return SpanExportResult.FAILURE
+        TRACE_SPANS_EXPORTED.inc(len(spans), exporter="file", result="ok")
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+
+class OtlpJsonHttpExporter(SpanExporter):
+    """POSTs each batch to an OTLP/HTTP traces endpoint (application/json)."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        headers: Optional[dict] = None,
+        timeout: float = 10.0,
+        include_content: bool = False,
+    ):
+        self.endpoint = endpoint
+        self._headers = {"Content-Type": "application/json", **(headers or {})}
+        self._timeout = timeout
+        self._include_content = include_content
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        body = json.dumps(encode_spans(spans, self._include_content), separators=(",", ":")).encode("utf-8")
+        request = urllib.request.Request(self.endpoint, data=body, headers=self._headers, method="POST")
+        try:
+            with urllib.request.urlopen(request, timeout=self._timeout) as response:
+                response.read()
+        except Exception as e:
+            logger.warning(f"Could not export {len(spans)} span(s) to {self.endpoint}: {e}")
+            TRACE_SPANS_EXPORTED.inc(len(spans), exporter="otlp_http", result="failed")
+            return SpanExportResult.FAILURE
+        TRACE_SPANS_EXPORTED.inc(len(spans), exporter="otlp_http", result="ok")
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+
+def parse_otlp_headers(raw: str) -> dict:
+    """OTEL_EXPORTER_OTLP_HEADERS format: key1=value1,key2=value2."""
+    headers = {}
+    for item in raw.split(","):
+        key, sep, value = item.partition("=")
+        if sep and key.strip():
+            headers[key.strip()] = urllib.parse.unquote(value.strip())
+    return headers
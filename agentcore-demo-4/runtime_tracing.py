@@ -0,0 +1,200 @@
+"""
+Tracing: OpenTelemetry spans per invocation, exported as OTLP/JSON.
+
+configure_tracing() installs an SDK TracerProvider when TRACE_FILE or an OTLP
+endpoint is configured (or TRACING=true). TracingMiddleware opens the server
+span of each /invocations request and continues the trace of the inbound
+`traceparent` header. Runtime code opens child spans with start_span(): auth,
+admission, MCP session acquire, tool listing, agent construction and the
+response. Strands adds its own spans to the same trace: `invoke_agent`, one
+`chat` per model turn and one `execute_tool` per tool call.
+
+A BatchSpanProcessor thread exports the spans (runtime_trace_export). With
+tracing disabled opentelemetry is not imported and start_span() is a no-op.
+"""
+
+import logging
+import os
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Any, ContextManager, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from runtime_config import env_bool, env_float, env_int
+
+if TYPE_CHECKING:
+    from opentelemetry.trace import Tracer
+
+logger = logging.getLogger(__name__)
+
+TRACER_NAME = "agentcore.runtime"
+TRACED_PATHS = ("/invocations",)
+DEFAULT_SERVICE_NAME = "agentcore-runtime"
+
+# Tracer del runtime y módulo opentelemetry.trace; None con el tracing desactivado
+_tracer: Optional["Tracer"] = None
+_trace_api: Any = None
+
+
+def tracing_enabled() -> bool:
+    return _tracer is not None
+
+
+def start_span(name: str, **attributes: Any) -> ContextManager:
+    """Child span of the current span for the duration of the block (no-op when disabled).
+
+    An exception raised inside the block is recorded and marks the span as an error.
+    """
+    if _tracer is None:
+        return nullcontext()
+    return _tracer.start_as_current_span(name, attributes=_clean(attributes))
+
+
+def annotate(**attributes: Any) -> None:
+    """Set attributes on the current span."""
+    if _tracer is not None:
+        _trace_api.get_current_span().set_attributes(_clean(attributes))
+
+
+def add_span_event(name: str, **attributes: Any) -> None:
+    """Add a timestamped event to the current span."""
+    if _tracer is not None:
+        _trace_api.get_current_span().add_event(name, _clean(attributes))
+
+
+def record_error(error: BaseException) -> None:
+    """Record a handled exception on the current span and mark it as failed."""
+    if _tracer is not None:
+        span = _trace_api.get_current_span()
+        span.record_exception(error)
+        span.set_status(_trace_api.Status(_trace_api.StatusCode.ERROR, f"{type(error).__name__}: {error}"))
+
+
+def trace_log_fields() -> dict:
+    """{"trace_id": ...} of the current span, for log_scope (empty when not tracing)."""
+    if _tracer is None:
+        return {}
+    context = _trace_api.get_current_span().get_span_context()
+    if not context.is_valid:
+        return {}
+    return {"trace_id": format(context.trace_id, "032x")}
+
+
+def _clean(attributes: dict) -> dict:
+    # OpenTelemetry rechaza atributos None
+    return {key: value for key, value in attributes.items() if value is not None}
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware: server span per traced request, parented by traceparent."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope.get("path", "").rstrip("/")
+        if _tracer is None or scope["type"] != "http" or path not in TRACED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        from opentelemetry import propagate
+        from opentelemetry.trace import SpanKind, Status, StatusCode
+
+        # traceparent / tracestate / baggage del request (headers ASGI en minúsculas)
+        carrier = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+        status_code: Optional[int] = None
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with _tracer.start_as_current_span(
+            f"{scope['method']} {path}",
+            context=propagate.extract(carrier),
+            kind=SpanKind.SERVER,
+            attributes={"http.request.method": scope["method"], "url.path": path},
+        ) as span:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                if status_code is not None:
+                    span.set_attribute("http.response.status_code", status_code)
+                    if status_code >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+
+
+def _otlp_traces_endpoint() -> Optional[str]:
+    endpoint = os.getenv("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT")
+    if endpoint:
+        return endpoint
+    base = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+    return f"{base.rstrip('/')}/v1/traces" if base else None
+
+
+def configure_tracing() -> bool:
+    """Enable tracing from TRACING, TRACE_FILE and OTEL_EXPORTER_OTLP_*; returns whether it is on."""
+    global _tracer, _trace_api
+
+    trace_file = os.getenv("TRACE_FILE")
+    endpoint = _otlp_traces_endpoint()
+    if not env_bool("TRACING", bool(trace_file or endpoint)):
+        return False
+
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    from runtime_trace_export import OtlpJsonFileExporter, OtlpJsonHttpExporter, parse_otlp_headers
+
+    provider = trace.get_tracer_provider()
+    if not isinstance(provider, TracerProvider):
+        # Provider propio salvo que ya haya uno (ADOT en AWS instala el suyo).
+        # Un traceparent entrante decide el muestreo; si no, TRACE_SAMPLE_RATIO
+        ratio = min(1.0, max(0.0, env_float("TRACE_SAMPLE_RATIO", 1.0)))
+        provider = TracerProvider(
+            resource=Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", DEFAULT_SERVICE_NAME)}),
+            sampler=ParentBased(TraceIdRatioBased(ratio)),
+        )
+        trace.set_tracer_provider(provider)
+
+    include_content = env_bool("TRACE_CONTENT")
+    exporters = []
+    if trace_file:
+        exporters.append(OtlpJsonFileExporter(trace_file, include_content))
+    if endpoint:
+        headers = parse_otlp_headers(os.getenv("OTEL_EXPORTER_OTLP_HEADERS", ""))
+        exporters.append(OtlpJsonHttpExporter(endpoint, headers, include_content=include_content))
+    for exporter in exporters:
+        provider.add_span_processor(
+            BatchSpanProcessor(
+                exporter,
+                max_queue_size=env_int("TRACE_QUEUE_SIZE", 2048),
+                schedule_delay_millis=env_float("TRACE_EXPORT_INTERVAL", 2.0) * 1000,
+            )
+        )
+
+    _trace_api = trace
+    _tracer = trace.get_tracer(TRACER_NAME)
+    targets = []
+    if trace_file:
+        targets.append(f"file {trace_file}")
+    if endpoint:
+        targets.append(f"OTLP {endpoint}")
+    logger.info(
+        f"Tracing: enabled, exporting to {', '.join(targets) or 'the existing provider only'}"
+        f"{' with message content' if include_content else ''}"
+    )
+    return True
+
+
+def setup_tracing_middleware():
+    """Starlette Middleware for the runtime, or None when tracing is disabled."""
+    from starlette.middleware import Middleware
+
+    if not tracing_enabled():
+        return None
+    return Middleware(TracingMiddleware)
@@ -0,0 +1,156 @@
+"""
+Startup warm-up: create the lazily initialized runtime pieces before traffic.
+
+Without it the first invocation after a deploy or scale-out pays for importing
+the agent stack (strands, mcp, httpx), the AWS session, the model client, the
+service token, the Gateway MCP session and the tool listing. run_warmup()
+creates them concurrently in a background thread
+while /ping reports HealthyBusy, and can send a canned prompt through a
+one-off agent (WARMUP_PROMPT) so the model and tool paths are exercised
+end to end. Failed steps are logged and left to lazy initialization; the
+runtime reports ready once warm-up finishes either way.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Optional
+
+from runtime_config import env_bool, env_float
+from runtime_metrics import WARMUP_DURATION
+
+logger = logging.getLogger(__name__)
+
+_started = threading.Event()
+_ready = threading.Event()
+_results: dict[str, dict] = {}
+
+
+def warmup_enabled() -> bool:
+    return env_bool("RUNTIME_WARMUP", True)
+
+
+def is_ready() -> bool:
+    """False only while a warm-up is running."""
+    return _ready.is_set() or not _started.is_set()
+
+
+def warmup_results() -> dict[str, dict]:
+    """Per-step outcome of the last warm-up: {"ok", "seconds", "error"?}."""
+    return dict(_results)
+
+
+def _warm_imports() -> None:
+    # Handler path: strands, mcp, httpx (agent_runtime.py no los importa al arrancar)
+    import runtime_handler  # noqa: F401
+
+
+def _warm_aws_session() -> None:
+    from runtime_config import get_aws_session
+
+    get_aws_session()
+
+
+def _warm_model() -> None:
+    from runtime_agent import get_or_create_model
+
+    get_or_create_model()
+
+
+def _warm_service_token() -> None:
+    from runtime_token import get_token_manager
+
+    # Única espera por el token: los requests solo leen el caché del refresher
+    token, source = get_token_manager().wait_for_token(env_float("TOKEN_COLD_START_TIMEOUT", 30.0))
+    if token is None:
+        raise RuntimeError("no service token available (.cognito-token.json / Cognito)")
+
+
+def _warm_gateway_tools() -> None:
+    from runtime_mcp import initialize_mcp_tools
+    from runtime_token import get_token_manager
+
+    get_token_manager().wait_for_token(env_float("TOKEN_COLD_START_TIMEOUT", 30.0))
+
+    # Deja una sesión MCP idle en el pool y el catálogo de tools en caché
+    with initialize_mcp_tools() as tools:
+        logger.info(f"Warm-up: {len(tools)} Gateway tool(s) listed")
+
+
+def _warm_countries_engine() -> None:
+    from countries_graphql import get_countries_engine
+
+    get_countries_engine().dataset
+
+
+def _warm_prompt(prompt: str) -> None:
+    from runtime_sessions import checkout_agent
+    from runtime_tool_calls import TOOL_CALLS_KEY
+
+    with checkout_agent(None) as agent:
+        agent(prompt, invocation_state={TOOL_CALLS_KEY: []})
+
+
+def _run_step(name: str, step: Callable[[], None]) -> None:
+    start = time.perf_counter()
+    try:
+        step()
+    except Exception as e:
+        _results[name] = {"ok": False, "seconds": time.perf_counter() - start, "error": f"{type(e).__name__}: {e}"}
+        logger.warning(f"Warm-up step {name} failed: {e}")
+    else:
+        _results[name] = {"ok": True, "seconds": time.perf_counter() - start}
+    WARMUP_DURATION.set(_results[name]["seconds"], step=name)
+
+
+def run_warmup(prompt: Optional[str] = None, timeout: Optional[float] = None) -> dict[str, dict]:
+    """Run all warm-up steps concurrently, then the optional prompt; marks the runtime ready."""
+    _started.set()
+    steps: dict[str, Callable[[], None]] = {
+        "imports": _warm_imports,
+        "aws_session": _warm_aws_session,
+        "model": _warm_model,
+        "service_token": _warm_service_token,
+        "gateway_tools": _warm_gateway_tools,
+    }
+    if env_bool("COUNTRIES_LOCAL_ENGINE"):
+        steps["countries_engine"] = _warm_countries_engine
+    prompt = prompt if prompt is not None else os.getenv("WARMUP_PROMPT", "")
+    timeout = timeout if timeout is not None else env_float("WARMUP_TIMEOUT", 120.0)
+
+    start = time.perf_counter()
+    try:
+        # Sin context manager: un paso colgado no debe retrasar el ready más allá del timeout
+        executor = ThreadPoolExecutor(max_workers=len(steps), thread_name_prefix="warmup")
+        futures = [executor.submit(_run_step, name, step) for name, step in steps.items()]
+        _, pending = wait(futures, timeout=timeout)
+        executor.shutdown(wait=False)
+        if pending:
+            logger.warning(f"Warm-up timed out after {timeout:.0f}s; {len(pending)} step(s) still running")
+        elif prompt:
+            _run_step("prompt", lambda: _warm_prompt(prompt))
+    finally:
+        total = time.perf_counter() - start
+        WARMUP_DURATION.set(total, step="total")
+        _ready.set()
+
+    logger.info("=" * 80)
+    logger.info(f"WARM-UP COMPLETED in {total:.3f}s - runtime ready")
+    for name, result in _results.items():
+        status = "✓" if result["ok"] else "✗"
+        detail = f" ({result['error']})" if not result["ok"] else ""
+        logger.info(f"  {status} {name}: {result['seconds']:.3f}s{detail}")
+    logger.info("=" * 80)
+    return warmup_results()
+
+
+def start_warmup() -> Optional[threading.Thread]:
+    """Run warm-up in a daemon thread so the server can answer /ping meanwhile."""
+    if not warmup_enabled():
+        return None
+    _started.set()
+    thread = threading.Thread(target=run_warmup, name="runtime-warmup", daemon=True)
+    thread.start()
+    return thread
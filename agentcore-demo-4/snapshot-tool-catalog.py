@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Genera el snapshot del catálogo de tools del Gateway antes de construir la imagen.
+
+deploy.sh lo ejecuta antes de `agentcore launch`: el archivo resultante
+(.mcp-tool-catalog.json, o MCP_TOOL_CATALOG_SNAPSHOT) entra en la imagen y un
+contenedor nuevo construye el agente sin esperar el round trip de `tools/list`.
+Usa el token de servicio (.cognito-token.json o Cognito) y la URL del Gateway de
+.gateway-info.json o AGENTCORE_GATEWAY_URL, igual que el runtime.
+
+Uso:
+  python snapshot-tool-catalog.py
+"""
+
+import logging
+import sys
+
+from runtime_config import env_float
+from runtime_mcp import get_gateway_url, get_tool_catalog, lease_mcp_session
+from runtime_token import get_token_manager
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+
+def main() -> int:
+    token, source = get_token_manager().wait_for_token(env_float("TOKEN_COLD_START_TIMEOUT", 30.0))
+    if token is None:
+        print("✗ Error: no hay token de servicio (.cognito-token.json / Cognito)")
+        return 1
+
+    gateway_url = get_gateway_url()
+    catalog = get_tool_catalog()
+    # Solo el Gateway de este despliegue: descarta entradas de snapshots anteriores
+    catalog.invalidate()
+
+    try:
+        with lease_mcp_session() as session:
+            count = catalog.refresh(gateway_url, session.client)
+    except Exception as e:
+        print(f"✗ Error: no se pudo listar las tools de {gateway_url}: {e}")
+        return 1
+
+    print(f"✓ Snapshot del catálogo: {count} tool(s) de {gateway_url}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
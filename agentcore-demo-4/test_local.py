@@ -17,6 +17,7 @@ if os.path.exists(VENV_PYTHON) and not sys.executable.endswith(VENV_PYTHON):
 # Note: This will initialize the agent with Strands and MCP
 try:
     from agent_runtime import agent_handler
+    from runtime_config import get_runtime_config
 except ImportError as e:
     print(f"Error importing agent_runtime: {e}")
     print("\nMake sure you have installed all dependencies in the correct environment:")
@@ -37,36 +38,16 @@ if __name__ == "__main__":
     print("Note: This requires AWS credentials configured for Bedrock.")
     print("Type 'exit' to quit.\n")
 
-    if not os.getenv("AGENTCORE_GATEWAY_URL") or not os.getenv("AWS_REGION"):
-        gateway_info_path = ".gateway-info.json"
-        if os.path.exists(gateway_info_path):
-            try:
-                with open(gateway_info_path, "r") as f:
-                    gateway_info = json.load(f)
-                if not os.getenv("AGENTCORE_GATEWAY_URL"):
-                    gateway_url = gateway_info.get("gatewayUrl")
-                    if gateway_url:
-                        os.environ["AGENTCORE_GATEWAY_URL"] = gateway_url
-                if not os.getenv("AWS_REGION"):
-                    region = gateway_info.get("region")
-                    if region:
-                        os.environ["AWS_REGION"] = region
-            except Exception as e:
-                print(f"Warning: Failed to read {gateway_info_path}: {e}")
-
-    missing_env = []
-    if not os.getenv("AGENTCORE_GATEWAY_URL"):
-        missing_env.append("AGENTCORE_GATEWAY_URL")
-    if not os.getenv("AWS_REGION"):
-        missing_env.append("AWS_REGION")
-    if missing_env:
+    # Gateway URL y región: entorno primero, luego .gateway-info.json (mismo snapshot que el runtime)
+    config = get_runtime_config()
+    if not config.gateway_url:
         print("Warning: Missing environment variables:")
-        print(f"  {', '.join(missing_env)}")
-        print("Set them before running, for example:")
+        print("  AGENTCORE_GATEWAY_URL")
+        print("Set it (or run ./setup-gateway.sh to write .gateway-info.json), for example:")
         print("  export AGENTCORE_GATEWAY_URL=<gateway-url>")
-        print("  export AWS_REGION=us-east-1")
         print()
         sys.exit(1)
+    print(f"Gateway: {config.gateway_url} (region {config.region})\n")
     
     if len(sys.argv) > 1:
         # Test with command line argument
@@ -32,6 +32,28 @@ const persistSessionId = (sessionId: string) => {
   window.localStorage.setItem(SESSION_STORAGE_KEY, sessionId);
 };
 
+type StreamEvent = {
+  event: "text" | "tool_start" | "tool_end" | "done" | "error";
+  data?: string;
+  name?: string;
+  status?: string;
+  durationMs?: number;
+  response?: string;
+  error?: string;
+};
+
+// El runtime envía eventos JSON ({"event": ...}); otros payloads se muestran tal cual
+const parseStreamEvent = (chunk: string): StreamEvent | null => {
+  try {
+    const parsed = JSON.parse(chunk);
+    return parsed && typeof parsed === "object" && "event" in parsed
+      ? (parsed as StreamEvent)
+      : null;
+  } catch {
+    return null;
+  }
+};
+
 const readSseStream = async (
   response: Response,
   onChunk: (chunk: string) => void,
@@ -278,8 +300,30 @@ export default function Home() {
         await readSseStream(
           response,
           (chunk) => {
-            outputBuffer += chunk;
-            setOutput((previous) => previous + chunk);
+            const event = parseStreamEvent(chunk);
+            if (!event) {
+              outputBuffer += chunk;
+              setOutput((previous) => previous + chunk);
+              return;
+            }
+            if (event.event === "text" && event.data) {
+              const text = event.data;
+              outputBuffer += text;
+              setOutput((previous) => previous + text);
+            } else if (event.event === "tool_start") {
+              appendLog(`tool.start=${event.name}`);
+            } else if (event.event === "tool_end") {
+              appendLog(
+                `tool.end=${event.name} status=${event.status} ms=${event.durationMs}`,
+              );
+            } else if (event.event === "error") {
+              const text = `\n${event.error ?? "Error"}`;
+              outputBuffer += text;
+              setOutput((previous) => previous + text);
+            } else if (event.event === "done" && !outputBuffer && event.response) {
+              outputBuffer = event.response;
+              setOutput(event.response);
+            }
           },
           (line) => {
             if (line.startsWith(":")) {